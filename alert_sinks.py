@@ -0,0 +1,158 @@
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+
+class FileSink:
+    """Дописывает оповещения в файл, по одному JSON-объекту на строку"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def send(self, alert):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(alert.to_dict(), ensure_ascii=False, default=str) + '\n')
+
+
+class WebhookSink:
+    """Отправляет оповещение POST-запросом с телом JSON"""
+
+    def __init__(self, url, timeout=5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        body = json.dumps(alert.to_dict(), ensure_ascii=False, default=str).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class DesktopSink:
+    """Системное уведомление средствами ОС, без дополнительных библиотек"""
+
+    def __init__(self, title="Network Pulse Pro", runner=subprocess.run):
+        self.title = title
+        self._run = runner
+
+    def command(self, alert):
+        if sys.platform == 'win32':
+            script = (
+                "Add-Type -AssemblyName System.Windows.Forms;"
+                "$n = New-Object System.Windows.Forms.NotifyIcon;"
+                "$n.Icon = [System.Drawing.SystemIcons]::Information;"
+                "$n.Visible = $true;"
+                f"$n.ShowBalloonTip(5000, '{_quote_ps(self.title)}', '{_quote_ps(alert.message)}', 'Info');"
+                "Start-Sleep -Seconds 6; $n.Dispose()"
+            )
+            return ['powershell', '-NoProfile', '-WindowStyle', 'Hidden', '-Command', script]
+        if sys.platform == 'darwin':
+            return ['osascript', '-e',
+                    f'display notification {json.dumps(alert.message)} with title {json.dumps(self.title)}']
+        return ['notify-send', self.title, alert.message]
+
+    def send(self, alert):
+        self._run(self.command(alert), capture_output=True, timeout=10)
+
+
+def _quote_ps(text):
+    return str(text).replace("'", "''")
+
+
+class AlertDispatcher:
+    """Рассылка оповещений с подавлением повторов и ограничением частоты.
+
+    Оповещение с тем же ключом (вид и цель) не повторяется чаще, чем раз в
+    dedup_seconds; смена состояния цели (авария после восстановления)
+    снимает подавление. Общая частота ограничена корзиной токенов: burst
+    оповещений сразу и rate в секунду далее. Проверка стоит O(1), доставка
+    в получатели выполняется в отдельном потоке, так что медленный webhook
+    не задерживает проверки. Ошибки доставки передаются в
+    on_error(получатель, оповещение, исключение).
+    """
+
+    def __init__(self, sinks=(), dedup_seconds=300, burst=10, rate=10 / 60, clock=time.monotonic,
+                 on_error=None):
+        self.sinks = list(sinks)
+        self.dedup_seconds = dedup_seconds
+        self.burst = burst
+        self.rate = rate
+        self.on_error = on_error
+        self._clock = clock
+        self._last_sent = {}
+        self._pruned = clock()
+        self._tokens = float(burst)
+        self._refilled = clock()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self.sent = 0
+        self.deduplicated = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def dispatch(self, alert):
+        """Принимает оповещение. Возвращает False, если оно подавлено"""
+        now = self._clock()
+        with self._lock:
+            opposite = alert.opposite_key
+            if opposite is not None:
+                self._last_sent.pop(opposite, None)
+            if now - self._pruned >= self.dedup_seconds:
+                # Истекшие записи больше ничего не подавляют
+                self._last_sent = {key: ts for key, ts in self._last_sent.items()
+                                   if now - ts < self.dedup_seconds}
+                self._pruned = now
+            last = self._last_sent.get(alert.key)
+            if last is not None and now - last < self.dedup_seconds:
+                self.deduplicated += 1
+                return False
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self._tokens < 1:
+                self.rate_limited += 1
+                return False
+            self._tokens -= 1
+            self._last_sent[alert.key] = now
+            self.sent += 1
+        if self.sinks:
+            self._ensure_worker()
+            self._queue.put(alert)
+        return True
+
+    def close(self, timeout=5.0):
+        """Доставляет оставшиеся оповещения и останавливает поток"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._deliver, name='alert-dispatcher', daemon=True)
+                    self._thread.start()
+
+    def _deliver(self):
+        while True:
+            alert = self._queue.get()
+            if alert is None:
+                return
+            for sink in list(self.sinks):
+                try:
+                    sink.send(alert)
+                except Exception as e:
+                    self.errors += 1
+                    if self.on_error is not None:
+                        self.on_error(sink, alert, e)
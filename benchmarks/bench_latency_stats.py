@@ -0,0 +1,65 @@
+"""Бенчмарк скорости приема замеров потоковой статистикой задержки.
+
+Запуск: python benchmarks/bench_latency_stats.py [--samples 200000] [--targets 1000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latency_stats import LatencyStats, LatencyStatsRegistry  # noqa: E402
+
+
+def bench_single_target(samples):
+    stats = LatencyStats()
+    values = [random.lognormvariate(3, 0.5) for _ in range(samples)]
+    started = time.perf_counter()
+    for i, value in enumerate(values):
+        stats.add(value, now=i * 0.01)
+    elapsed = time.perf_counter() - started
+    return samples / elapsed
+
+
+def bench_many_targets(samples, targets):
+    registry = LatencyStatsRegistry()
+    names = [f"10.0.{i // 256}.{i % 256}" for i in range(targets)]
+    values = [random.lognormvariate(3, 0.5) for _ in range(samples)]
+    started = time.perf_counter()
+    for i, value in enumerate(values):
+        registry.add(names[i % targets], value, now=i * 0.001)
+    elapsed = time.perf_counter() - started
+    return samples / elapsed
+
+
+def bench_summary(repeats):
+    stats = LatencyStats()
+    for i in range(100_000):
+        stats.add(random.lognormvariate(3, 0.5), now=i * 0.03)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        stats.summary('1h', now=3000.0)
+    return (time.perf_counter() - started) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples', type=int, default=200_000)
+    parser.add_argument('--targets', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(json.dumps({
+        'benchmark': 'latency_stats_ingest',
+        'samples': args.samples,
+        'single_target_samples_per_s': bench_single_target(args.samples),
+        'targets': args.targets,
+        'multi_target_samples_per_s': bench_many_targets(args.samples, args.targets),
+        'summary_1h_us': bench_summary(1000) * 1e6,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
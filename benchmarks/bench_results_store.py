@@ -0,0 +1,71 @@
+"""Бенчмарк хранилища: append-only сегменты против перезаписи JSON-файла.
+
+Запуск: python benchmarks/bench_results_store.py [--samples 1000000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from results_store import ResultsStore  # noqa: E402
+
+
+def legacy_save(filename, data):
+    """Прежняя схема save_test_result: чтение, добавление, обрезка и перезапись"""
+    if os.path.exists(filename):
+        with open(filename, 'r', encoding='utf-8') as f:
+            existing_data = json.load(f)
+    else:
+        existing_data = []
+    existing_data.append(data)
+    if len(existing_data) > 50:
+        existing_data = existing_data[-50:]
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(existing_data, f, ensure_ascii=False, indent=2)
+
+
+def bench_store(folder, samples):
+    store = ResultsStore(folder)
+    base = time.time()
+    started = time.perf_counter()
+    for i in range(samples):
+        store.append('ping', {'target': '8.8.8.8', 'rtt_ms': 12.5}, ts=base + i * 0.001)
+    store.close()
+    return (time.perf_counter() - started) / samples
+
+
+def bench_legacy(folder, samples):
+    filename = os.path.join(folder, 'speedtest_legacy.json')
+    started = time.perf_counter()
+    for _ in range(samples):
+        legacy_save(filename, {'timestamp': '2024-01-01T00:00:00', 'download': 50.0,
+                               'upload': 10.0, 'ping': 12.5, 'quality': 'Хорошее'})
+    return (time.perf_counter() - started) / samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples', type=int, default=1_000_000)
+    parser.add_argument('--legacy-samples', type=int, default=5_000,
+                        help="прежняя схема слишком медленная для миллиона записей")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        store_cost = bench_store(folder, args.samples)
+        legacy_cost = bench_legacy(folder, args.legacy_samples)
+
+    print(json.dumps({
+        'benchmark': 'results_store_append',
+        'samples': args.samples,
+        'store_us_per_append': store_cost * 1e6,
+        'legacy_us_per_append': legacy_cost * 1e6,
+        'speedup': legacy_cost / store_cost,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
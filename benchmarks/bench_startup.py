@@ -0,0 +1,85 @@
+"""Бенчмарк запуска: время импорта модулей и время до первого кадра окна.
+
+Каждый замер выполняется в новом интерпретаторе. Время до первого кадра
+измеряется только при наличии дисплея.
+
+Запуск: python benchmarks/bench_startup.py [--repeats 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули, которые не должны загружаться до первого использования
+DEFERRED_MODULES = ('speedtest', 'requests', 'psutil', 'tkinter', 'asyncio')
+
+_IMPORT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+_FIRST_FRAME_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import tkinter as tk
+from monitor_engine import NetworkMonitorEngine
+from monitor_gui import ModernNetworkMonitor
+root = tk.Tk()
+app = ModernNetworkMonitor(root, engine=NetworkMonitorEngine(data_dir=sys.argv[1]))
+root.update()
+elapsed = time.perf_counter() - started
+app.on_close()
+print(json.dumps({'seconds': elapsed}))
+"""
+
+
+def _run(script, *args):
+    completed = subprocess.run([sys.executable, '-c', script, *args], cwd=ROOT,
+                               capture_output=True, text=True, timeout=60)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip())
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure_import(module, repeats=5):
+    """Медиана времени импорта module в новом интерпретаторе и загруженные отложенные модули"""
+    results = [_run(_IMPORT_SCRIPT.format(module=module, deferred=DEFERRED_MODULES)) for _ in range(repeats)]
+    return statistics.median(r['seconds'] for r in results), results[-1]['loaded']
+
+
+def measure_first_frame(repeats=3):
+    """Медиана времени от запуска до первого кадра окна или None без дисплея"""
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY'):
+        return None
+    with tempfile.TemporaryDirectory() as data_dir:
+        return statistics.median(_run(_FIRST_FRAME_SCRIPT, data_dir)['seconds'] for _ in range(repeats))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    imports = {}
+    for module in ('monitor_engine', 'network_monitor', 'monitor_daemon', 'monitor_gui'):
+        seconds, loaded = measure_import(module, args.repeats)
+        imports[module] = {'import_ms': seconds * 1000, 'deferred_loaded': loaded}
+    first_frame = measure_first_frame()
+
+    print(json.dumps({
+        'benchmark': 'startup',
+        'imports': imports,
+        'first_frame_ms': first_frame * 1000 if first_frame is not None else None,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Бенчмарк планировщика целей: 10k целей на loopback-стенде в одном ядре.
+
+Запуск: python benchmarks/bench_target_scheduler.py [--targets 10000] [--interval 5] [--duration 15]
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from target_scheduler import TargetScheduler  # noqa: E402
+
+
+def start_listener():
+    """Loopback-стенд: принимает и сразу закрывает соединения"""
+    server = socket.socket()
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(('127.0.0.1', 0))
+    server.listen(4096)
+
+    def accept():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            conn.close()
+
+    threading.Thread(target=accept, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--targets', type=int, default=10_000)
+    parser.add_argument('--interval', type=float, default=5.0)
+    parser.add_argument('--duration', type=float, default=15.0)
+    args = parser.parse_args()
+
+    server = start_listener()
+    port = server.getsockname()[1]
+    failures = 0
+
+    def on_result(target, rtt_ms, error):
+        nonlocal failures
+        if error is not None:
+            failures += 1
+
+    scheduler = TargetScheduler(on_result=on_result, max_concurrency=1024)
+    for i in range(args.targets):
+        scheduler.add_target(f"target-{i}", '127.0.0.1', port, interval=args.interval, timeout=2)
+
+    cpu_started = time.process_time()
+    started = time.monotonic()
+    scheduler.start()
+    time.sleep(args.duration)
+    summary = scheduler.summary()
+    elapsed = time.monotonic() - started
+    cpu = time.process_time() - cpu_started
+    scheduler.stop()
+    server.close()
+
+    expected = args.targets * elapsed / args.interval
+    print(json.dumps({
+        'benchmark': 'target_scheduler_loopback',
+        'targets': args.targets,
+        'interval_s': args.interval,
+        'duration_s': elapsed,
+        'probes_completed': summary['completed'],
+        'probes_expected': expected,
+        'schedule_kept_pct': summary['completed'] / expected * 100,
+        'skipped': summary['skipped'],
+        'failures': failures,
+        'lag_avg_ms': summary['lag_avg_ms'],
+        'lag_max_ms': summary['lag_max_ms'],
+        'cpu_cores_used': cpu / elapsed,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
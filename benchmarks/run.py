@@ -0,0 +1,322 @@
+"""Набор бенчмарков горячих путей монитора на локальных заменах.
+
+Сеть заменяется loopback-сокетами, psutil — генератором счетчиков,
+speedtest — модулем-заглушкой, поэтому результаты воспроизводимы и не
+зависят от внешнего соединения. Результаты выводятся одним документом
+JSON (или пишутся в файл --output) для сравнения между версиями.
+
+Запуск: python benchmarks/run.py [--quick] [--only probe_throughput ...] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import sys
+import tempfile
+import time
+import types
+from collections import namedtuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from event_log import EventLog  # noqa: E402
+from latency import LatencyEngine  # noqa: E402
+from monitor_engine import NetworkMonitorEngine  # noqa: E402
+from ping_process import PingOutputParser  # noqa: E402
+from probe_scheduler import ProbeScheduler  # noqa: E402
+from process_sampler import ProcessSampler  # noqa: E402
+from profiling import Profiler  # noqa: E402
+from speedtest_cache import SpeedtestServerCache  # noqa: E402
+from throughput import SpeedtestBackend  # noqa: E402
+from traffic_sampler import COUNTER_FIELDS, TrafficSampler  # noqa: E402
+
+BENCHMARKS = {}
+
+_Counters = namedtuple('_Counters', COUNTER_FIELDS)
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def per_op(func, count):
+    """Время одной операции, с: func вызывается count раз"""
+    started = time.perf_counter()
+    for i in range(count):
+        func(i)
+    return (time.perf_counter() - started) / count
+
+
+def percentiles(values):
+    ordered = sorted(values)
+    return {
+        'p50': statistics.median(ordered),
+        'p99': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        'max': ordered[-1],
+    }
+
+
+def fake_speedtest_module():
+    """Заглушка speedtest-cli: мгновенные результаты без сети"""
+    server = {'id': '1', 'name': 'Loopback', 'country': 'Local', 'url': 'http://127.0.0.1/upload.php',
+              'd': 0.0, 'latency': 1.0}
+
+    class Speedtest:
+        def __init__(self):
+            self.config = {'client': {'lat': '0', 'lon': '0'}}
+            self.servers = {0.0: [server]}
+            self.results = types.SimpleNamespace(ping=1.0, bytes_received=12_500_000, bytes_sent=2_500_000)
+
+        def get_config(self):
+            return self.config
+
+        def get_servers(self):
+            return self.servers
+
+        def get_best_server(self, servers=None):
+            return dict(server)
+
+        def download(self):
+            return 100_000_000.0
+
+        def upload(self):
+            return 20_000_000.0
+
+    return types.SimpleNamespace(Speedtest=Speedtest)
+
+
+@benchmark('probe_throughput')
+def bench_probe_throughput(quick):
+    """Замеры TCP-задержки на loopback: одиночные и пакетами, плюс разбор вывода ping"""
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(1024)
+    engine = LatencyEngine(timeout=2, prefer_icmp=False, tcp_port=server.getsockname()[1])
+    batch = 50 if quick else 200
+    rounds = 5 if quick else 20
+    try:
+        single = per_op(lambda i: engine.probe('127.0.0.1'), rounds * 5)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            engine.probe_many(['127.0.0.1'] * batch)
+        batch_rate = rounds * batch / (time.perf_counter() - started)
+    finally:
+        server.close()
+
+    lines = [f'64 bytes from 8.8.8.8: icmp_seq={i} ttl=117 time=14.{i % 10} ms' for i in range(1, 20_001)]
+    parser = PingOutputParser('8.8.8.8', 'linux')
+    parse_cost = per_op(lambda i: parser.feed(lines[i]), len(lines) if not quick else 5_000)
+    return {'single_probe_ms': single * 1000, 'batch_probes_per_s': batch_rate, 'batch_size': batch,
+            'ping_line_parse_us': parse_cost * 1e6}
+
+
+@benchmark('save_test_result')
+def bench_save_test_result(quick):
+    """Сохранение результата теста скорости (запись, агрегаты истории, сброс на диск)"""
+    count = 200 if quick else 2000
+    with tempfile.TemporaryDirectory() as folder:
+        engine = NetworkMonitorEngine(data_dir=folder)
+        try:
+            cost = per_op(lambda i: engine.save_test_result(95.0 + i % 10, 20.0, 12.0, "Отличное",
+                                                            details={'backend': 'fake'}), count)
+        finally:
+            engine.stop()
+    return {'per_call_us': cost * 1e6, 'calls': count}
+
+
+@benchmark('log_insert')
+def bench_log_insert(quick):
+    """Добавление записей журнала: готовый текст, шаблон с аргументами и сброс в файл"""
+    count = 20_000 if quick else 200_000
+    log = EventLog()
+    plain = per_op(lambda i: log.append("Мониторинг ping запущен", 'success'), count)
+    template = per_op(lambda i: log.append("{}: {:.0f} мс ✓", 'success', ('Google DNS', 12.0)), count)
+    with tempfile.TemporaryDirectory() as folder:
+        spilled = EventLog(spill_path=os.path.join(folder, 'events.log'))
+        spill = per_op(lambda i: spilled.append("{}: {:.0f} мс ✓", 'success', ('Google DNS', 12.0)), count)
+        spilled.close()
+    return {'plain_us': plain * 1e6, 'template_us': template * 1e6, 'spill_us': spill * 1e6}
+
+
+@benchmark('traffic_sampling')
+def bench_traffic_sampling(quick):
+    """Замер трафика по интерфейсам с поддельным psutil: разбор счетчиков и полный путь движка"""
+    interfaces = 4 if quick else 16
+    count = 2_000 if quick else 20_000
+    tick = [0]
+
+    def counters():
+        tick[0] += 1
+        value = tick[0] * 125_000
+        return {f'eth{n}': _Counters(value, value // 4, value // 1500, value // 6000, 0, 0, 0, 0)
+                for n in range(interfaces)}
+
+    now = [0.0]
+
+    def clock():
+        now[0] += 1.0
+        return now[0]
+
+    sampler = TrafficSampler(counters=counters, clock=clock)
+    sampler.sample()
+    sample_cost = per_op(lambda i: sampler.sample(), count)
+
+    with tempfile.TemporaryDirectory() as folder:
+        engine = NetworkMonitorEngine(data_dir=folder)
+        engine.traffic = TrafficSampler(counters=counters, clock=clock)
+        engine.sample_traffic()
+        try:
+            engine_cost = per_op(lambda i: engine.sample_traffic(), count // 10)
+        finally:
+            engine.stop()
+    return {'interfaces': interfaces, 'sampler_us': sample_cost * 1e6, 'engine_us': engine_cost * 1e6}
+
+
+@benchmark('process_sweep')
+def bench_process_sweep(quick):
+    """Распределение соединений по процессам: тысячи сокетов, из которых меняется 5% за замер"""
+    sockets = 2_000 if quick else 10_000
+    pids = 200 if quick else 1_000
+    sweeps = 20 if quick else 100
+    Connection = namedtuple('Connection', ('pid', 'laddr', 'raddr', 'status'))
+    Io = namedtuple('Io', ('read_chars', 'write_chars'))
+    base = [Connection(1000 + i % pids, ('10.0.0.2', 40000 + i % 20000), (f'192.0.2.{i % 250}', 443),
+                       'ESTABLISHED') for i in range(sockets)]
+    churn = [0]
+
+    def connections():
+        # Каждый замер часть соединений закрывается и открывается заново с другим портом
+        churn[0] += 1
+        changed = sockets // 20
+        start = churn[0] * changed % sockets
+        moved = [c._replace(laddr=('10.0.0.2', 1 + churn[0] % 30000)) for c in base[start:start + changed]]
+        return base[:start] + moved + base[start + changed:]
+
+    class Process:
+        def __init__(self, pid):
+            self.pid = pid
+            self.reads = 0
+
+        def name(self):
+            return f'proc{self.pid}'
+
+        def io_counters(self):
+            self.reads += 1
+            return Io(self.reads * 100_000, self.reads * 10_000)
+
+    opened = [0]
+
+    def open_process(pid):
+        opened[0] += 1
+        return Process(pid)
+
+    now = [0.0]
+
+    def clock():
+        now[0] += 5.0
+        return now[0]
+
+    sampler = ProcessSampler(connections=connections, process=open_process, clock=clock)
+    first = per_op(lambda i: sampler.sample(), 1)
+    steady = per_op(lambda i: sampler.sample(), sweeps)
+    return {'sockets': sockets, 'processes': pids, 'first_sweep_ms': first * 1000,
+            'sweep_ms': steady * 1000, 'process_lookups': opened[0]}
+
+
+@benchmark('scheduler_jitter')
+def bench_scheduler_jitter(quick):
+    """Отклонение интервалов запуска периодических проверок от заданных"""
+    interval = 0.02
+    jobs = 8
+    duration = 1.0 if quick else 5.0
+    starts = {f'job{n}': [] for n in range(jobs)}
+    scheduler = ProbeScheduler(max_workers=4, on_result=lambda result: None)
+    for name, times in starts.items():
+        scheduler.add_job(name, lambda times=times: times.append(time.monotonic()), interval)
+    scheduler.start()
+    time.sleep(duration)
+    scheduler.stop()
+
+    deviations = [abs((b - a) - interval) * 1000 for times in starts.values() for a, b in zip(times, times[1:])]
+    expected = jobs * duration / interval
+    runs = sum(len(times) for times in starts.values())
+    return dict({f'jitter_{key}_ms': value for key, value in percentiles(deviations).items()},
+                runs=runs, missed_ratio=max(0.0, 1 - runs / expected))
+
+
+@benchmark('speed_test_pipeline')
+def bench_speed_test_pipeline(quick):
+    """Полный цикл теста скорости движка с заглушкой speedtest: накладные расходы без сети"""
+    count = 20 if quick else 200
+    with tempfile.TemporaryDirectory() as folder:
+        cache = SpeedtestServerCache(os.path.join(folder, 'speedtest_cache.json'), fake_speedtest_module())
+        engine = NetworkMonitorEngine(data_dir=folder, throughput_backend=SpeedtestBackend(cache))
+        try:
+            cost = per_op(lambda i: engine.speed_test(), count)
+        finally:
+            engine.stop()
+    return {'per_run_ms': cost * 1000, 'runs': count}
+
+
+@benchmark('profiler_overhead')
+def bench_profiler_overhead(quick):
+    """Цена замера этапа: профилирование выключено и включены только таймеры"""
+    count = 50_000 if quick else 500_000
+    profiler = Profiler()
+
+    def stage(i):
+        with profiler.stage('bench'):
+            pass
+
+    disabled = per_op(stage, count)
+    profiler.enable_timers()
+    timers = per_op(stage, count)
+    profiler.disable_timers()
+    return {'disabled_ns': disabled * 1e9, 'timers_ns': timers * 1e9}
+
+
+def run(names=None, quick=False):
+    """Запускает бенчмарки и возвращает документ с результатами"""
+    results = []
+    for name, func in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        started = time.perf_counter()
+        metrics = func(quick)
+        results.append({'name': name, 'seconds': time.perf_counter() - started, 'metrics': metrics})
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'quick': quick,
+        'timestamp': time.time(),
+        'results': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help="короткие прогоны (для проверки в CI)")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="запустить только эти бенчмарки")
+    parser.add_argument('--output', help="файл для результатов JSON (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    document = run(args.only, args.quick)
+    text = json.dumps(document, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+import copy
+import json
+import os
+
+from dns_probe import DEFAULT_RESOLVERS
+
+# Пороги оценок по умолчанию: задержка в мс, потери в %, скорость в Мбит/с
+DEFAULT_THRESHOLDS = {
+    'ping_good_ms': 100.0,
+    'ping_fair_ms': 200.0,
+    'loss_warning_pct': 2.0,
+    'loss_error_pct': 10.0,
+    'download_good_mbps': 20.0,
+    'download_fair_mbps': 5.0,
+    'upload_good_mbps': 5.0,
+    'upload_fair_mbps': 2.0,
+    'excellent_download_mbps': 50.0,
+    'excellent_upload_mbps': 10.0,
+    'excellent_ping_ms': 50.0,
+}
+
+# Поля разделов: имя -> (тип, минимум). Интервал 0 отключает проверку
+SCHEMA = {
+    'monitor': {
+        'ping_target': (str, None),
+        'ping_interval': (float, 0.1),
+        'status_interval': (float, 0.1),
+        'traffic_interval': (float, 0.1),
+        'process_interval': (float, 0),
+        'dns_interval': (float, 0),
+        'diagnostics_interval': (float, 0),
+        'speedtest_interval': (float, 0),
+    },
+    'thresholds': {name: (float, 0) for name in DEFAULT_THRESHOLDS},
+    'detection': {
+        'fail_threshold': (int, 1),
+        'recover_threshold': (int, 1),
+    },
+    'dns': {
+        'servers': (list, None),
+    },
+}
+
+# Списки записей: поле -> (тип, минимум, значение по умолчанию; обязательное, если None)
+LIST_SCHEMA = {
+    'targets': {
+        'name': (str, None, None),
+        'host': (str, None, None),
+        'port': (int, 1, 443),
+        'interval': (float, 0.1, 5.0),
+        'timeout': (float, 0.1, 2.0),
+    },
+    'diagnostics': {
+        'name': (str, None, None),
+        'address': (str, None, None),
+    },
+}
+
+
+class ConfigError(ValueError):
+    """Ошибки проверки файла настроек: каждая с путем к полю"""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def default_config():
+    """Настройки со значениями по умолчанию (как у движка без файла настроек)"""
+    return {
+        'monitor': {'ping_target': '8.8.8.8', 'ping_interval': 5.0, 'status_interval': 10.0,
+                    'traffic_interval': 1.0, 'process_interval': 5.0, 'dns_interval': 0.0,
+                    'diagnostics_interval': 0.0, 'speedtest_interval': 0.0},
+        'thresholds': dict(DEFAULT_THRESHOLDS),
+        'detection': {'fail_threshold': 3, 'recover_threshold': 2},
+        'dns': {'servers': list(DEFAULT_RESOLVERS)},
+        'targets': [],
+        'diagnostics': None,
+    }
+
+
+def _check(value, kind, minimum, path, errors):
+    if kind is float and isinstance(value, int) and not isinstance(value, bool):
+        value = float(value)
+    if kind is list:
+        if not isinstance(value, list) or not all(isinstance(item, str) and item for item in value):
+            errors.append(f"{path}: ожидался список строк")
+            return None
+        return list(value)
+    if not isinstance(value, kind) or isinstance(value, bool):
+        errors.append(f"{path}: ожидалось {_TYPE_NAMES[kind]}, получено {value!r}")
+        return None
+    if kind is str and not value.strip():
+        errors.append(f"{path}: пустая строка")
+        return None
+    if minimum is not None and value < minimum:
+        errors.append(f"{path}: значение {value} меньше {minimum}")
+        return None
+    return value
+
+
+_TYPE_NAMES = {str: "строка", int: "целое число", float: "число"}
+
+
+def validate(data, base=None):
+    """Проверяет разобранный файл и накладывает его на base.
+
+    Отсутствующие поля берутся из base (по умолчанию default_config()),
+    неизвестные разделы и поля считаются ошибкой, чтобы опечатка не
+    проходила молча. Возвращает новый словарь настроек или выбрасывает
+    ConfigError со списком всех ошибок.
+    """
+    config = copy.deepcopy(base if base is not None else default_config())
+    errors = []
+    if not isinstance(data, dict):
+        raise ConfigError(["файл настроек должен содержать таблицу (объект)"])
+
+    for section, value in data.items():
+        if section in SCHEMA:
+            _validate_section(section, value, config[section], errors)
+        elif section in LIST_SCHEMA:
+            config[section] = _validate_list(section, value, errors)
+        else:
+            errors.append(f"{section}: неизвестный раздел")
+    _check_names(config['targets'], errors)
+    _check_thresholds(config['thresholds'], errors)
+    if errors:
+        raise ConfigError(errors)
+    return config
+
+
+def _validate_section(section, values, target, errors):
+    """Проверяет поля раздела-таблицы и записывает прошедшие проверку в target"""
+    if not isinstance(values, dict):
+        errors.append(f"{section}: ожидалась таблица")
+        return
+    for key, item in values.items():
+        field = SCHEMA[section].get(key)
+        if field is None:
+            errors.append(f"{section}.{key}: неизвестный параметр")
+            continue
+        checked = _check(item, field[0], field[1], f"{section}.{key}", errors)
+        if checked is not None:
+            target[key] = checked
+
+
+def _check_names(targets, errors):
+    names = [item['name'] for item in targets or ()]
+    for name in sorted({name for name in names if names.count(name) > 1}):
+        errors.append(f"targets: имя {name!r} повторяется")
+
+
+def _check_thresholds(thresholds, errors):
+    for good, fair in (('ping_good_ms', 'ping_fair_ms'), ('loss_warning_pct', 'loss_error_pct')):
+        if thresholds[good] > thresholds[fair]:
+            errors.append(f"thresholds.{good}: больше чем {fair}")
+    for good, fair in (('download_good_mbps', 'download_fair_mbps'), ('upload_good_mbps', 'upload_fair_mbps')):
+        if thresholds[good] < thresholds[fair]:
+            errors.append(f"thresholds.{good}: меньше чем {fair}")
+
+
+def _validate_list(section, items, errors):
+    if not isinstance(items, list):
+        errors.append(f"{section}: ожидался список таблиц")
+        return []
+    fields = LIST_SCHEMA[section]
+    result = []
+    for index, item in enumerate(items):
+        path = f"{section}[{index}]"
+        if not isinstance(item, dict):
+            errors.append(f"{path}: ожидалась таблица")
+            continue
+        for key in item:
+            if key not in fields:
+                errors.append(f"{path}.{key}: неизвестный параметр")
+        entry = {}
+        for key, (kind, minimum, default) in fields.items():
+            if key not in item:
+                if default is None:
+                    errors.append(f"{path}.{key}: обязательный параметр")
+                entry[key] = default
+                continue
+            entry[key] = _check(item[key], kind, minimum, f"{path}.{key}", errors)
+        result.append(entry)
+    return result
+
+
+def parse(text, path):
+    """Разбирает текст файла настроек по расширению: .toml или .json"""
+    if path.endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ConfigError([f"{path}: для TOML нужен Python 3.11+ или пакет tomli"]) from None
+        try:
+            return tomllib.loads(text)
+        except tomllib.TOMLDecodeError as e:
+            raise ConfigError([f"{path}: {e}"]) from None
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ConfigError([f"{path}: {e}"]) from None
+
+
+def load(path, base=None):
+    """Читает и проверяет файл настроек"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return validate(parse(f.read(), path), base)
+
+
+class ConfigWatcher:
+    """Следит за файлом настроек опросом времени изменения.
+
+    poll() дешев (один stat) и вызывается периодически. При изменении
+    файла он перечитывается; если настройки изменились и прошли проверку,
+    вызывается on_change(старые, новые). Ошибочный файл не применяется, а
+    передается в on_error, прежние настройки продолжают действовать.
+    Удаление файла возвращает настройки к base.
+    """
+
+    def __init__(self, path, base, on_change, on_error=None):
+        self.path = path
+        self.base = base
+        self.on_change = on_change
+        self.on_error = on_error
+        self.current = copy.deepcopy(base)
+        self._signature = None
+
+    def poll(self):
+        """Проверяет файл. Возвращает True, если применены новые настройки"""
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature == self._signature:
+            return False
+        self._signature = signature
+
+        try:
+            config = load(self.path, self.base) if signature is not None else copy.deepcopy(self.base)
+        except (ConfigError, OSError, UnicodeDecodeError) as e:
+            if self.on_error is not None:
+                self.on_error(e)
+            return False
+        if config == self.current:
+            return False
+        previous, self.current = self.current, config
+        self.on_change(previous, config)
+        return True
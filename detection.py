@@ -0,0 +1,251 @@
+import math
+import threading
+import time
+
+
+# Парные виды оповещений: смена состояния снимает подавление повтора противоположного вида
+OPPOSITE_KINDS = {
+    'outage': 'recovered', 'recovered': 'outage',
+    'latency_anomaly': 'latency_normal', 'latency_normal': 'latency_anomaly',
+    'throughput_drop': 'throughput_normal', 'throughput_normal': 'throughput_drop',
+}
+
+
+class Alert:
+    """Оповещение детектора: смена состояния цели или аномалия"""
+    __slots__ = ('kind', 'target', 'message', 'level', 'ts', 'data')
+
+    def __init__(self, kind, target, message, level, ts=None, data=None):
+        self.kind = kind
+        self.target = target
+        self.message = message
+        self.level = level
+        self.ts = time.time() if ts is None else ts
+        self.data = data or {}
+
+    @property
+    def key(self):
+        """Ключ для подавления повторов"""
+        return f'{self.kind}:{self.target}'
+
+    @property
+    def opposite_key(self):
+        """Ключ оповещения о противоположном состоянии той же цели или None"""
+        opposite = OPPOSITE_KINDS.get(self.kind)
+        return f'{opposite}:{self.target}' if opposite is not None else None
+
+    def to_dict(self):
+        return {'kind': self.kind, 'target': self.target, 'message': self.message,
+                'level': self.level, 'ts': self.ts, **self.data}
+
+
+class UpDownState:
+    """Состояние доступности с гистерезисом.
+
+    Цель считается упавшей после fail_threshold неудач подряд и вернувшейся
+    после recover_threshold успехов подряд, поэтому одиночные потери не
+    порождают ложных аварий.
+    """
+    __slots__ = ('fail_threshold', 'recover_threshold', 'up', 'streak', 'since', 'changed_at')
+
+    def __init__(self, fail_threshold=3, recover_threshold=2):
+        self.fail_threshold = fail_threshold
+        self.recover_threshold = recover_threshold
+        self.up = True
+        self.streak = 0
+        self.since = None
+        # Время, с которого действует текущее состояние
+        self.changed_at = None
+
+    def update(self, ok, ts):
+        """Учитывает результат проверки. Возвращает 'down', 'up' или None"""
+        if ok == self.up:
+            self.streak = 0
+            return None
+        self.streak += 1
+        if self.streak == 1:
+            # Момент первой неудачи (или успеха) и есть начало смены состояния
+            self.since = ts
+        if self.streak >= (self.fail_threshold if self.up else self.recover_threshold):
+            self.up = ok
+            self.streak = 0
+            self.changed_at = self.since
+            return 'up' if ok else 'down'
+        return None
+
+
+class EwmaDetector:
+    """Поиск аномалий по z-оценке относительно экспоненциального среднего.
+
+    Среднее и дисперсия обновляются за O(1). direction='high' ищет рост
+    (задержка), 'low' — падение (скорость). Аномалия начинается при
+    z >= threshold и заканчивается при z < clear_threshold.
+    """
+    __slots__ = ('alpha', 'threshold', 'clear_threshold', 'warmup', 'direction', 'min_std',
+                 'mean', 'variance', 'samples', 'anomalous', 'last_z')
+
+    def __init__(self, alpha=0.05, threshold=4.0, clear_threshold=2.0, warmup=20, direction='high',
+                 min_std=0.05):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.clear_threshold = clear_threshold
+        self.warmup = warmup
+        self.direction = direction
+        # Нижняя граница отклонения как доля среднего: у очень ровного ряда z иначе взлетает от шума
+        self.min_std = min_std
+        self.mean = None
+        self.variance = 0.0
+        self.samples = 0
+        self.anomalous = False
+        self.last_z = 0.0
+
+    def update(self, value):
+        """Учитывает значение. Возвращает 'anomaly', 'cleared' или None"""
+        self.samples += 1
+        if self.mean is None:
+            self.mean = value
+            return None
+
+        std = max(math.sqrt(self.variance), abs(self.mean) * self.min_std, 1e-9)
+        z = (value - self.mean) / std
+        if self.direction == 'low':
+            z = -z
+        self.last_z = z
+
+        # Аномальные значения меньше сдвигают базовую линию
+        alpha = self.alpha / 4 if self.anomalous or z >= self.threshold else self.alpha
+        diff = value - self.mean
+        increment = alpha * diff
+        self.mean += increment
+        self.variance = (1 - alpha) * (self.variance + diff * increment)
+
+        if self.samples <= self.warmup:
+            return None
+        if not self.anomalous and z >= self.threshold:
+            self.anomalous = True
+            return 'anomaly'
+        if self.anomalous and z < self.clear_threshold:
+            self.anomalous = False
+            return 'cleared'
+        return None
+
+
+class _TargetState:
+    __slots__ = ('availability', 'latency')
+
+    def __init__(self, availability, latency):
+        self.availability = availability
+        self.latency = latency
+
+
+class DetectionEngine:
+    """Обнаружение аварий и деградации по потоку результатов проверок.
+
+    Для каждой цели ведутся автомат доступности с гистерезисом и детектор
+    аномалий задержки, для рядов скорости — детектор падения. Обработка
+    замера стоит O(1). Интервалы аварий (начало, конец, длительность)
+    сохраняются в хранилище как вид outages, оповещения передаются в
+    on_alert.
+    """
+
+    def __init__(self, store=None, on_alert=None, fail_threshold=3, recover_threshold=2,
+                 latency_options=None, throughput_options=None):
+        self.store = store
+        self.on_alert = on_alert
+        self.fail_threshold = fail_threshold
+        self.recover_threshold = recover_threshold
+        self.latency_options = dict(latency_options or {}, direction='high')
+        self.throughput_options = dict(throughput_options or {'warmup': 3, 'threshold': 3.0}, direction='low')
+        self._targets = {}
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def configure(self, fail_threshold, recover_threshold):
+        """Меняет пороги гистерезиса, в том числе для уже отслеживаемых целей"""
+        with self._lock:
+            self.fail_threshold = fail_threshold
+            self.recover_threshold = recover_threshold
+            for state in self._targets.values():
+                state.availability.fail_threshold = fail_threshold
+                state.availability.recover_threshold = recover_threshold
+
+    def observe(self, target, rtt_ms, ts=None, latency=True):
+        """Учитывает проверку цели. rtt_ms=None означает неудачу.
+
+        latency=False — учитывается только доступность: значение не является
+        задержкой (например, длительность HTTP-проверки) и не проверяется на
+        аномалии.
+        """
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            state = self._targets.get(target)
+            if state is None:
+                state = self._targets[target] = _TargetState(
+                    UpDownState(self.fail_threshold, self.recover_threshold),
+                    EwmaDetector(**self.latency_options))
+            down_since = state.availability.changed_at
+            transition = state.availability.update(rtt_ms is not None, ts)
+            changed_at = state.availability.changed_at
+            change = state.latency.update(rtt_ms) if latency and rtt_ms is not None else None
+            z = state.latency.last_z
+            baseline = state.latency.mean
+
+        if transition == 'down':
+            self._alert(Alert('outage', target, f"{target}: нет связи", 'error', ts, {'start': changed_at}))
+        elif transition == 'up':
+            # Авария длилась от первой неудачи до первого успешного ответа
+            outage = {'target': target, 'start': down_since, 'end': changed_at,
+                      'duration': changed_at - down_since}
+            if self.store is not None:
+                self.store.append('outages', outage, ts)
+            self._alert(Alert('recovered', target,
+                              f"{target}: связь восстановлена, перерыв {outage['duration']:.0f} с",
+                              'success', ts, outage))
+        if change == 'anomaly':
+            self._alert(Alert('latency_anomaly', target, f"{target}: рост задержки до {rtt_ms:.0f} мс",
+                              'warning', ts, {'rtt_ms': rtt_ms, 'baseline_ms': baseline, 'z': z}))
+        elif change == 'cleared':
+            self._alert(Alert('latency_normal', target, f"{target}: задержка в норме", 'success', ts,
+                              {'rtt_ms': rtt_ms}))
+        return transition
+
+    def observe_throughput(self, series, mbps, ts=None):
+        """Учитывает результат теста скорости (например, series='download')"""
+        with self._lock:
+            detector = self._series.get(series)
+            if detector is None:
+                detector = self._series[series] = EwmaDetector(**self.throughput_options)
+            change = detector.update(mbps)
+            baseline = detector.mean
+        if change == 'anomaly':
+            self._alert(Alert('throughput_drop', series, f"{series}: скорость упала до {mbps:.1f} Мбит/с",
+                              'warning', ts, {'mbps': mbps, 'baseline_mbps': baseline}))
+        elif change == 'cleared':
+            self._alert(Alert('throughput_normal', series, f"{series}: скорость в норме", 'success', ts,
+                              {'mbps': mbps}))
+        return change
+
+    def is_up(self, target):
+        state = self._targets.get(target)
+        return state is None or state.availability.up
+
+    def outage_start(self, target):
+        """Начало текущей аварии цели или None"""
+        state = self._targets.get(target)
+        if state is None or state.availability.up:
+            return None
+        return state.availability.changed_at
+
+    def open_outages(self):
+        """Текущие аварии: {цель: время начала}"""
+        with self._lock:
+            return {target: state.availability.changed_at for target, state in self._targets.items()
+                    if not state.availability.up}
+
+    def remove(self, target):
+        with self._lock:
+            self._targets.pop(target, None)
+
+    def _alert(self, alert):
+        if self.on_alert is not None:
+            self.on_alert(alert)
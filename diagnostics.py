@@ -0,0 +1,237 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Серверы для диагностики по умолчанию
+DEFAULT_TARGETS = [
+    ('Google DNS', '8.8.8.8'),
+    ('Cloudflare', '1.1.1.1'),
+    ('Yandex DNS', '77.88.8.8'),
+    ('Google', 'google.com'),
+    ('Cloudflare DNS', '1.0.0.1')
+]
+
+
+class DiagnosticResult:
+    """Результат проверки одного сервера"""
+    __slots__ = ('name', 'address', 'rtt_ms', 'error')
+
+    def __init__(self, name, address, rtt_ms=None, error=None):
+        self.name = name
+        self.address = address
+        self.rtt_ms = rtt_ms
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.rtt_ms is not None
+
+
+class DiagnosticReport:
+    """Итог диагностики по всем серверам"""
+
+    def __init__(self, results, total, elapsed):
+        self.results = results
+        self.total = total
+        self.elapsed = elapsed
+        self.working = sum(1 for r in results if r.ok)
+        self.success_rate = (self.working / total) * 100 if total else 0.0
+        self.conclusion, self.level = conclude(self.success_rate)
+
+
+def conclude(success_rate):
+    """Возвращает заключение и уровень сообщения по доле доступных серверов"""
+    if success_rate > 80:
+        return "Отличное качество связи", "success"
+    elif success_rate > 50:
+        return "Удовлетворительное качество связи", "warning"
+    return "Проблемы с соединением", "error"
+
+
+def load_targets(path, on_error=None):
+    """Загружает список серверов из JSON: [["имя", "адрес"], ...] или [{"name", "address"}].
+
+    Испорченный файл не останавливает диагностику: используются серверы по
+    умолчанию, а описание ошибки передается в on_error(сообщение).
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+    except FileNotFoundError:
+        return list(DEFAULT_TARGETS)
+    except (ValueError, OSError) as e:
+        return _default_targets(path, e, on_error)
+
+    targets = []
+    try:
+        for item in raw:
+            if isinstance(item, dict):
+                targets.append((item.get('name', item['address']), item['address']))
+            else:
+                name, address = item
+                targets.append((name, address))
+    except (KeyError, TypeError, ValueError) as e:
+        return _default_targets(path, e, on_error)
+    return targets
+
+
+def _default_targets(path, error, on_error):
+    if on_error is not None:
+        on_error(f"{path}: список серверов не прочитан ({error}), используются серверы по умолчанию")
+    return list(DEFAULT_TARGETS)
+
+
+def latency_probe(engine, resolve=None):
+    """Создает функцию проверки на основе LatencyEngine.
+
+    resolve(address) заранее разрешает имя (например, через кэш DnsProbe),
+    чтобы проверка не тратила время на DNS.
+    """
+    def probe(address):
+        sample = engine.probe(resolve(address) if resolve is not None else address)
+        if not sample.ok:
+            raise sample.error
+        return sample.rtt_ms
+    return probe
+
+
+def latency_batch_probe(engine, resolve=None, resolve_workers=16):
+    """Создает функцию проверки списка адресов одним вызовом LatencyEngine.probe_many.
+
+    Все замеры пакета идут одновременно через selectors, поэтому число
+    серверов не ограничено числом потоков. Возвращает список задержек или
+    исключений в порядке адресов; on_value(номер, значение) вызывается по
+    мере получения каждого ответа.
+    """
+    def probe_many(addresses, on_value=None):
+        resolved = list(addresses) if resolve is None else _resolve_all(resolve, addresses, resolve_workers)
+        positions = [i for i, address in enumerate(resolved) if not isinstance(address, Exception)]
+        values = list(resolved)
+
+        def on_sample(index, sample):
+            values[positions[index]] = sample.rtt_ms if sample.ok else sample.error
+            if on_value is not None:
+                on_value(positions[index], values[positions[index]])
+
+        if on_value is not None:
+            for index, value in enumerate(resolved):
+                if isinstance(value, Exception):
+                    on_value(index, value)
+        samples = engine.probe_many([resolved[i] for i in positions], on_sample=on_sample)
+        for index, sample in enumerate(samples):
+            values[positions[index]] = sample.rtt_ms if sample.ok else sample.error
+        return values
+    return probe_many
+
+
+def _resolve_all(resolve, addresses, workers):
+    """Разрешает имена параллельно: адрес или исключение на каждое имя"""
+    def resolve_one(address):
+        try:
+            return resolve(address)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(addresses))),
+                            thread_name_prefix='diagnose-dns') as executor:
+        return list(executor.map(resolve_one, addresses))
+
+
+class _Collector:
+    """Собирает результаты из потоков проверки: каждый сервер учитывается один раз"""
+
+    def __init__(self, targets, on_result):
+        self.targets = targets
+        self.on_result = on_result
+        self.results = []
+        self._reported = set()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def report(self, index, value):
+        with self._lock:
+            if self._closed or index in self._reported:
+                return
+            self._reported.add(index)
+            self._add(index, value)
+
+    def close(self):
+        """Серверы без ответа считаются недоступными, поздние ответы отбрасываются"""
+        with self._lock:
+            self._closed = True
+            for index in range(len(self.targets)):
+                if index not in self._reported:
+                    self._add(index, TimeoutError("deadline exceeded"))
+
+    def _add(self, index, value):
+        name, address = self.targets[index]
+        if isinstance(value, Exception):
+            result = DiagnosticResult(name, address, error=value)
+        else:
+            result = DiagnosticResult(name, address, rtt_ms=value)
+        self.results.append(result)
+        if self.on_result is not None:
+            self.on_result(result)
+
+
+def run_diagnostics(targets, probe=None, on_result=None, max_workers=32, deadline=10.0,
+                    probe_many=None, batch_size=200):
+    """Проверяет все серверы параллельно с общим ограничением по времени.
+
+    probe(address) возвращает задержку в мс или выбрасывает исключение,
+    одновременно идет не больше max_workers проверок. Вместо него можно
+    передать probe_many(addresses, on_value), проверяющий пакет из batch_size
+    адресов; все пакеты проверяются одновременно, поэтому общее время не
+    больше самой долгой проверки. on_result вызывается по мере поступления
+    каждого результата. Серверы, не ответившие до истечения deadline,
+    считаются недоступными.
+    """
+    started = time.monotonic()
+    collector = _Collector(targets, on_result)
+    indexes = list(range(len(targets)))
+    if probe_many is None:
+        batches = [[index] for index in indexes]
+        probe_many = _each(probe)
+    else:
+        batches = [indexes[i:i + batch_size] for i in range(0, len(indexes), batch_size)]
+        max_workers = len(batches)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches))),
+                                  thread_name_prefix='diagnose')
+    try:
+        futures = [executor.submit(_probe_batch, probe_many, targets, batch, collector) for batch in batches]
+        wait(futures, timeout=deadline)
+    finally:
+        # Не ждем зависшие проверки: их результат уже не нужен
+        executor.shutdown(wait=False, cancel_futures=True)
+    collector.close()
+    return DiagnosticReport(collector.results, len(targets), time.monotonic() - started)
+
+
+def _probe_batch(probe_many, targets, batch, collector):
+    def on_value(position, value):
+        collector.report(batch[position], value)
+
+    try:
+        values = probe_many([targets[index][1] for index in batch], on_value)
+    except Exception as e:
+        values = [e] * len(batch)
+    # Для проверок, не сообщающих о каждом ответе сразу
+    for position, value in enumerate(values):
+        on_value(position, value)
+
+
+def _each(probe):
+    """Пакетная проверка из одиночной: результат или исключение на каждый адрес"""
+    def probe_many(addresses, on_value=None):
+        values = []
+        for address in addresses:
+            try:
+                values.append(probe(address))
+            except Exception as e:
+                values.append(e)
+            if on_value is not None:
+                on_value(len(values) - 1, values[-1])
+        return values
+    return probe_many
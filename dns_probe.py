@@ -0,0 +1,365 @@
+import ipaddress
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+
+# Резолверы по умолчанию: те же DNS-серверы, что и в списке диагностики
+DEFAULT_RESOLVERS = ('8.8.8.8', '1.1.1.1', '77.88.8.8')
+DEFAULT_PROBE_NAME = 'google.com'
+
+QTYPE_A = 1
+QTYPE_CNAME = 5
+QTYPE_AAAA = 28
+
+RCODE_NOERROR = 0
+RCODE_NXDOMAIN = 3
+RCODE_NAMES = {0: 'NOERROR', 1: 'FORMERR', 2: 'SERVFAIL', 3: 'NXDOMAIN', 4: 'NOTIMP', 5: 'REFUSED'}
+
+_HEADER = struct.Struct('!HHHHHH')
+_FLAG_QR = 0x8000
+_FLAG_TC = 0x0200
+_FLAG_RD = 0x0100
+
+
+class DnsError(Exception):
+    """Ответ резолвера с кодом ошибки или неразборчивый ответ"""
+
+    def __init__(self, message, rcode=None):
+        super().__init__(message)
+        self.rcode = rcode
+
+
+def build_query(name, qtype=QTYPE_A, ident=0):
+    """Запрос в формате DNS (RFC 1035) с флагом рекурсии"""
+    question = b''
+    for label in name.rstrip('.').split('.'):
+        encoded = label.encode('idna')
+        if not 0 < len(encoded) < 64:
+            raise ValueError(f"{name!r}: недопустимая метка")
+        question += bytes((len(encoded),)) + encoded
+    return _HEADER.pack(ident, _FLAG_RD, 1, 0, 0, 0) + question + b'\0' + struct.pack('!HH', qtype, 1)
+
+
+def _skip_name(data, offset):
+    while True:
+        if offset >= len(data):
+            raise DnsError("обрезанное имя")
+        length = data[offset]
+        if length & 0xc0 == 0xc0:
+            # Ссылка на ранее встреченное имя (сжатие) — два байта
+            return offset + 2
+        offset += 1
+        if length == 0:
+            return offset
+        offset += length
+
+
+def parse_response(data):
+    """Разбирает ответ: (id, rcode, [(тип, ttl, адрес или None)]).
+
+    Флаг TC (ответ обрезан) игнорируется: адресов из начала ответа для
+    замера и кэша достаточно.
+    """
+    if len(data) < _HEADER.size:
+        raise DnsError("короткий ответ")
+    ident, flags, qdcount, ancount, _, _ = _HEADER.unpack_from(data)
+    if not flags & _FLAG_QR:
+        raise DnsError("получен запрос, а не ответ")
+    offset = _HEADER.size
+    for _ in range(qdcount):
+        offset = _skip_name(data, offset) + 4
+
+    answers = []
+    for _ in range(ancount):
+        offset = _skip_name(data, offset)
+        if offset + 10 > len(data):
+            break
+        rtype, _, ttl, length = struct.unpack_from('!HHIH', data, offset)
+        offset += 10
+        rdata = data[offset:offset + length]
+        offset += length
+        if rtype == QTYPE_A and length == 4:
+            answers.append((rtype, ttl, socket.inet_ntop(socket.AF_INET, rdata)))
+        elif rtype == QTYPE_AAAA and length == 16:
+            answers.append((rtype, ttl, socket.inet_ntop(socket.AF_INET6, rdata)))
+        else:
+            answers.append((rtype, ttl, None))
+    return ident, flags & 0xf, answers
+
+
+class DnsTiming:
+    """Результат одного DNS-запроса"""
+    __slots__ = ('server', 'name', 'rtt_ms', 'rcode', 'addresses', 'ttl', 'error')
+
+    def __init__(self, server, name, rtt_ms=None, rcode=None, addresses=(), ttl=None, error=None):
+        self.server = server
+        self.name = name
+        self.rtt_ms = rtt_ms
+        self.rcode = rcode
+        self.addresses = addresses
+        self.ttl = ttl
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return f"DnsTiming({self.server!r}, {self.name!r}, rtt_ms={self.rtt_ms}, error={self.error!r})"
+
+
+class DnsServerResult:
+    """Замер резолвера: запрос без кэша (cold) и из кэша резолвера (warm)"""
+    __slots__ = ('server', 'cold', 'warm')
+
+    def __init__(self, server, cold, warm):
+        self.server = server
+        self.cold = cold
+        self.warm = warm
+
+    @property
+    def ok(self):
+        return self.warm.ok
+
+    def to_dict(self):
+        return {'server': self.server, 'cold_ms': self.cold.rtt_ms, 'warm_ms': self.warm.rtt_ms,
+                'addresses': list(self.warm.addresses), 'ttl': self.warm.ttl,
+                'error': None if self.warm.ok else str(self.warm.error)}
+
+
+class DnsCache:
+    """Кэш имен с учетом TTL из ответа.
+
+    Отрицательные ответы (NXDOMAIN и NOERROR без адресов) хранятся
+    negative_ttl секунд вместе с кодом ответа. При переполнении сначала
+    удаляются просроченные, затем самые старые записи.
+    """
+
+    def __init__(self, max_entries=1024, negative_ttl=30, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name):
+        """Адреса имени (пустой кортеж — адресов нет) или None, если записи нет"""
+        entry = self.entry(name)
+        return None if entry is None else entry[0]
+
+    def entry(self, name):
+        """(адреса, код ответа) или None, если записи нет"""
+        key = name.lower().rstrip('.')
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self.hits += 1
+                return entry[1:]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, name, addresses, ttl, rcode=RCODE_NOERROR):
+        key = name.lower().rstrip('.')
+        addresses = tuple(addresses)
+        if not addresses:
+            ttl = self.negative_ttl
+        if ttl <= 0:
+            return
+        now = self._clock()
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                for stale in [k for k, entry in self._entries.items() if entry[0] <= now]:
+                    del self._entries[stale]
+                while len(self._entries) >= self.max_entries:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (now + ttl, addresses, rcode)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _server_address(server, port):
+    if isinstance(server, tuple):
+        return server
+    return server, port
+
+
+def _server_label(address, port):
+    host, server_port = address
+    return host if server_port == port else f'{host}:{server_port}'
+
+
+class DnsProbe:
+    """Замер времени разрешения имен через заданные резолверы.
+
+    Запросы отправляются напрямую по UDP, без системного резолвера, и
+    меряются time.perf_counter_ns; запросы ко всем резолверам идут
+    одновременно. Запрос без кэша — имя со случайной меткой, которого
+    заведомо нет в кэше резолвера (ответ NXDOMAIN тоже считается ответом).
+    Запрос из кэша — повтор только что запрошенного имени.
+
+    resolve() разрешает имя для других проверок через кэш с учетом TTL,
+    поэтому повторные проверки не тратят время на DNS каждый цикл. Имя без
+    IPv4-адресов разрешается в IPv6-адрес.
+    """
+
+    def __init__(self, servers=DEFAULT_RESOLVERS, port=53, timeout=2.0, cache=None, fallback_ttl=60):
+        self.port = port
+        self.set_servers(servers)
+        self.timeout = timeout
+        self.cache = cache if cache is not None else DnsCache()
+        # TTL для имен, разрешенных системным резолвером (он TTL не сообщает)
+        self.fallback_ttl = fallback_ttl
+
+    def set_servers(self, servers):
+        """Заменяет список резолверов; кэш имен сохраняется"""
+        self.servers = [_server_address(server, self.port) for server in servers]
+
+    def label(self, address):
+        return _server_label(address, self.port)
+
+    def query(self, server, name, qtype=QTYPE_A):
+        """Один запрос к одному резолверу"""
+        return self._exchange([(_server_address(server, self.port), name)], qtype)[0]
+
+    def probe(self, name=DEFAULT_PROBE_NAME):
+        """Замер всех резолверов: список DnsServerResult в порядке servers"""
+        nonce = os.urandom(6).hex()
+        cold = self._exchange([(server, f'{nonce}.{name}') for server in self.servers])
+        # Первый запрос помещает имя в кэш резолвера, замеряется второй
+        primed = self._exchange([(server, name) for server in self.servers])
+        warm = self._exchange([(server, name) for server in self.servers])
+        for timing in primed + warm:
+            if timing.ok:
+                self.cache.put(name, timing.addresses, timing.ttl, timing.rcode)
+                break
+        return [DnsServerResult(self.label(server), c, w) for server, c, w in zip(self.servers, cold, warm)]
+
+    def resolve(self, name):
+        """Адрес имени с учетом кэша. IP-адрес возвращается как есть"""
+        try:
+            ipaddress.ip_address(name)
+            return name
+        except ValueError:
+            pass
+        entry = self.cache.entry(name)
+        addresses, rcode = entry if entry is not None else self._lookup(name)
+        if not addresses and rcode == RCODE_NXDOMAIN:
+            raise DnsError(f"{name}: имя не найдено", RCODE_NXDOMAIN)
+        if not addresses:
+            # NODATA: имя существует, но ни A-, ни AAAA-записей нет
+            raise DnsError(f"{name}: нет адресов", rcode)
+        return addresses[0]
+
+    def _lookup(self, name):
+        timing = self._answer(name, QTYPE_A)
+        if timing is not None and not timing.addresses and timing.rcode == RCODE_NOERROR:
+            # Только IPv6-адреса: LatencyEngine проверяет их по TCP
+            timing = self._answer(name, QTYPE_AAAA) or timing
+        if timing is not None:
+            self.cache.put(name, timing.addresses, timing.ttl, timing.rcode)
+            return timing.addresses, timing.rcode
+        # Резолверы недоступны (например, порт 53 закрыт) — используем системный
+        try:
+            info = socket.getaddrinfo(name, None, 0, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise DnsError(f"{name}: {e}") from e
+        info.sort(key=lambda item: item[0] != socket.AF_INET)
+        addresses = tuple(dict.fromkeys(item[4][0] for item in info))
+        self.cache.put(name, addresses, self.fallback_ttl)
+        return addresses, RCODE_NOERROR
+
+    def _answer(self, name, qtype):
+        """Первый успешный ответ резолверов или None, если ответа нет"""
+        for timing in self._exchange([(server, name) for server in self.servers], qtype, first=True):
+            if timing.ok:
+                return timing
+        return None
+
+    def _exchange(self, queries, qtype=QTYPE_A, first=False):
+        """Отправляет запросы [(адрес резолвера, имя)] одновременно.
+
+        Каждый запрос идет с отдельного сокета (случайный порт и id). При
+        first=True ожидание заканчивается на первом успешном ответе.
+        """
+        timings = [None] * len(queries)
+        pending = {}
+        with selectors.DefaultSelector() as selector:
+            try:
+                for index, (server, name) in enumerate(queries):
+                    label = self.label(server)
+                    ident = int.from_bytes(os.urandom(2), 'big')
+                    try:
+                        family = socket.AF_INET6 if ':' in server[0] else socket.AF_INET
+                        sock = socket.socket(family, socket.SOCK_DGRAM)
+                        sock.setblocking(False)
+                        sock.connect(server)
+                        started = time.perf_counter_ns()
+                        sock.send(build_query(name, qtype, ident))
+                    except (OSError, ValueError) as e:
+                        timings[index] = DnsTiming(label, name, error=e)
+                        continue
+                    pending[sock] = (index, label, name, ident, started)
+                    selector.register(sock, selectors.EVENT_READ)
+                self._wait(selector, pending, timings, first)
+            finally:
+                for sock in pending:
+                    selector.unregister(sock)
+                    sock.close()
+
+        for index, (server, name) in enumerate(queries):
+            if timings[index] is None:
+                timings[index] = DnsTiming(self.label(server), name, error=TimeoutError("timed out"))
+        return timings
+
+    def _wait(self, selector, pending, timings, first):
+        deadline = time.perf_counter_ns() + int(self.timeout * 1e9)
+        while pending:
+            remaining = (deadline - time.perf_counter_ns()) / 1e9
+            if remaining <= 0:
+                return
+            for key, _ in selector.select(remaining):
+                sock = key.fileobj
+                index, label, name, ident, started = pending[sock]
+                try:
+                    data = sock.recv(4096)
+                except (BlockingIOError, InterruptedError):
+                    continue
+                except OSError as e:
+                    # ICMP port unreachable: резолвер не слушает порт
+                    timing = DnsTiming(label, name, error=e)
+                else:
+                    finished = time.perf_counter_ns()
+                    timing = self._timing(label, name, ident, data, (finished - started) / 1e6)
+                    if timing is None:
+                        continue
+                timings[index] = timing
+                del pending[sock]
+                selector.unregister(sock)
+                sock.close()
+                if first and timing.ok:
+                    return
+
+    @staticmethod
+    def _timing(label, name, ident, data, rtt_ms):
+        try:
+            response_id, rcode, answers = parse_response(data)
+        except DnsError as e:
+            return DnsTiming(label, name, rtt_ms=None, error=e)
+        if response_id != ident:
+            # Чужой или запоздавший ответ — ждем дальше
+            return None
+        if rcode not in (RCODE_NOERROR, RCODE_NXDOMAIN):
+            return DnsTiming(label, name, rcode=rcode,
+                             error=DnsError(f"{label}: {RCODE_NAMES.get(rcode, rcode)}", rcode))
+        addresses = tuple(address for _, _, address in answers if address is not None)
+        ttl = min((answer_ttl for _, answer_ttl, _ in answers), default=None)
+        return DnsTiming(label, name, rtt_ms=rtt_ms, rcode=rcode, addresses=addresses, ttl=ttl)
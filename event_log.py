@@ -0,0 +1,143 @@
+import os
+import queue
+import threading
+import time
+from array import array
+from datetime import datetime
+
+LEVELS = ('info', 'success', 'warning', 'error')
+_LEVEL_IDS = {level: index for index, level in enumerate(LEVELS)}
+
+
+class EventLog:
+    """Журнал событий фиксированной емкости.
+
+    Записи хранятся в кольцевом буфере из компактных массивов: время,
+    уровень, номер шаблона сообщения и его аргументы. Старые записи
+    вытесняются новыми, поэтому память не растет за время сессии. Полная
+    история при необходимости сбрасывается в файл с ротацией по размеру.
+    Файл пишет фоновый поток, поэтому append() не ждет диска; если диск не
+    успевает и очередь из max_pending записей заполнена, лишние записи в
+    файл не попадают (их число — spill_dropped).
+    """
+
+    def __init__(self, capacity=10000, spill_path=None, max_bytes=5 * 1024 * 1024,
+                 backup_count=3, max_templates=1024, max_pending=10000):
+        self.capacity = capacity
+        self.total = 0
+        self._ts = array('d', [0.0]) * capacity
+        self._level = array('B', [0]) * capacity
+        self._template = array('H', [0]) * capacity
+        self._args = [None] * capacity
+        # Шаблон 0 означает, что в args лежит уже готовый текст
+        self._templates = [None]
+        self._template_ids = {}
+        self._max_templates = max_templates
+        self._lock = threading.Lock()
+
+        self.spill_path = spill_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._spill = None
+        self._spill_queue = None
+        self._spill_thread = None
+        self.spill_dropped = 0
+        if spill_path:
+            os.makedirs(os.path.dirname(spill_path) or '.', exist_ok=True)
+            self._spill = open(spill_path, 'ab')
+            self._spill_queue = queue.Queue(max_pending)
+            self._spill_thread = threading.Thread(target=self._spill_loop, name='event-log-spill', daemon=True)
+            self._spill_thread.start()
+
+    def append(self, message, level='info', args=(), ts=None):
+        """Добавляет запись. message — готовый текст или шаблон str.format для args"""
+        ts = time.time() if ts is None else ts
+        template_id = self._template_id(message) if args else 0
+        payload = args if template_id else (message.format(*args) if args else message)
+        with self._lock:
+            slot = self.total % self.capacity
+            self._ts[slot] = ts
+            self._level[slot] = _LEVEL_IDS.get(level, 0)
+            self._template[slot] = template_id
+            self._args[slot] = payload
+            self.total += 1
+        if self._spill_queue is not None:
+            try:
+                self._spill_queue.put_nowait((ts, level, message, args))
+            except queue.Full:
+                self.spill_dropped += 1
+        return slot
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def format(self, slot):
+        """Возвращает (время, уровень, текст) записи в ячейке slot"""
+        template_id = self._template[slot]
+        text = self._args[slot]
+        if template_id:
+            text = self._templates[template_id].format(*text)
+        return self._ts[slot], LEVELS[self._level[slot]], text
+
+    def tail(self, count):
+        """Последние count записей от старых к новым"""
+        with self._lock:
+            count = min(count, len(self))
+            return [self.format((self.total - count + i) % self.capacity) for i in range(count)]
+
+    def close(self):
+        """Дописывает очередь в файл и закрывает его"""
+        if self._spill_thread is None:
+            return
+        self._spill_queue.put(None)
+        self._spill_thread.join()
+        self._spill_thread = None
+        self._spill_queue = None
+        self._spill.close()
+        self._spill = None
+
+    def _template_id(self, template):
+        template_id = self._template_ids.get(template)
+        if template_id is not None:
+            return template_id
+        with self._lock:
+            if len(self._templates) >= self._max_templates:
+                # Таблица шаблонов переполнена: храним текст как есть
+                return 0
+            template_id = self._template_ids.setdefault(template, len(self._templates))
+            if template_id == len(self._templates):
+                self._templates.append(template)
+        return template_id
+
+    def _spill_loop(self):
+        while True:
+            batch = [self._spill_queue.get()]
+            while batch[-1] is not None:
+                try:
+                    batch.append(self._spill_queue.get_nowait())
+                except queue.Empty:
+                    break
+            for item in batch:
+                if item is None:
+                    return
+                ts, level, message, args = item
+                self._write_spill(ts, level, message.format(*args) if args else message)
+            self._spill.flush()
+
+    def _write_spill(self, ts, level, text):
+        stamp = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+        self._spill.write(f"[{stamp}] {level.upper()}: {text}\n".encode('utf-8'))
+        if self._spill.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._spill.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.spill_path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.spill_path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.spill_path, f"{self.spill_path}.1")
+        else:
+            os.remove(self.spill_path)
+        self._spill = open(self.spill_path, 'ab')
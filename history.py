@@ -0,0 +1,324 @@
+import csv
+import json
+import math
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime
+
+# Уровни агрегации: имя и длительность интервала в секундах
+RESOLUTIONS = (('1m', 60), ('1h', 3600), ('1d', 86400))
+
+# Поля записей хранилища, для которых ведутся агрегаты
+ROLLUP_FIELDS = {
+    'ping': ('rtt_ms',),
+    'traffic': ('rx_bps', 'tx_bps'),
+    'speedtest': ('download', 'upload', 'ping'),
+    'dns': ('cold_ms', 'warm_ms'),
+    'diagnostic': ('rtt_ms',),
+}
+
+# Длина сегментов хранилища для агрегатов: в сегменте десятки записей каждого ряда
+ROLLUP_SEGMENT_SECONDS = {'rollup_1m': 3600, 'rollup_1h': 86400, 'rollup_1d': 30 * 86400}
+
+# Колонки результата запроса
+COLUMNS = ('ts', 'avg', 'min', 'max', 'p95', 'count')
+
+_GROWTH = math.log(1.02)
+_COLUMNAR_MAGIC = b'NPCOL1\n'
+
+
+def series_key(kind, field, target=None):
+    """Имя ряда: вид:поле или вид:поле:цель"""
+    return f'{kind}:{field}:{target}' if target is not None else f'{kind}:{field}'
+
+
+def _bucket(value):
+    # Логарифмические корзины с шагом 2% без ограничения диапазона
+    return -math.inf if value <= 0 else math.floor(math.log(value) / _GROWTH)
+
+
+def _bucket_value(index):
+    return 0.0 if index == -math.inf else math.exp((index + 0.5) * _GROWTH)
+
+
+class _Rollup:
+    """Агрегат значений ряда за один интервал"""
+    __slots__ = ('count', 'lost', 'total', 'min', 'max', 'hist')
+
+    def __init__(self):
+        self.count = 0
+        self.lost = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.hist = {}
+
+    def add(self, value):
+        if value is None:
+            self.lost += 1
+            return
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        bucket = _bucket(value)
+        self.hist[bucket] = self.hist.get(bucket, 0) + 1
+
+    def to_record(self, series):
+        record = {'series': series, 'count': self.count, 'lost': self.lost,
+                  'avg': None, 'min': None, 'max': None, 'p50': None, 'p95': None, 'p99': None}
+        if self.count:
+            record.update(avg=self.total / self.count, min=self.min, max=self.max)
+            targets = sorted((math.ceil(self.count * p / 100), p) for p in (50, 95, 99))
+            seen = position = 0
+            for bucket in sorted(self.hist):
+                seen += self.hist[bucket]
+                while position < len(targets) and seen >= targets[position][0]:
+                    # Перцентиль не выходит за наблюдаемый диапазон
+                    value = min(max(_bucket_value(bucket), self.min), self.max)
+                    record[f'p{targets[position][1]}'] = value
+                    position += 1
+        return record
+
+
+def _merge(first, second):
+    """Объединяет два агрегата одного интервала (например, до и после перезапуска)"""
+    if not second['count']:
+        return dict(first, lost=first['lost'] + second['lost'])
+    if not first['count']:
+        return dict(second, lost=first['lost'] + second['lost'])
+    count = first['count'] + second['count']
+    # Перцентили берем у большей части: точное слияние без гистограмм невозможно
+    merged = dict(first if first['count'] >= second['count'] else second)
+    merged.update(count=count, lost=first['lost'] + second['lost'],
+                  avg=(first['avg'] * first['count'] + second['avg'] * second['count']) / count,
+                  min=min(first['min'], second['min']), max=max(first['max'], second['max']))
+    return merged
+
+
+def lttb(xs, ys, threshold):
+    """Индексы точек, выбранных алгоритмом Largest-Triangle-Three-Buckets"""
+    length = len(xs)
+    if threshold >= length or threshold < 3:
+        return list(range(length))
+
+    selected = [0]
+    every = (length - 2) / (threshold - 2)
+    previous = 0
+    for i in range(threshold - 2):
+        # Среднее следующей корзины служит третьей вершиной треугольника
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, length)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        px, py = xs[previous], ys[previous]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((px - avg_x) * (ys[j] - py) - (px - xs[j]) * (avg_y - py))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        previous = best
+    selected.append(length - 1)
+    return selected
+
+
+class History:
+    """История измерений: агрегаты по интервалам и выборка для графиков.
+
+    Каждый замер за O(1) добавляется в открытые агрегаты 1 мин, 1 ч и 1 сутки
+    (count, min, max, avg и перцентили по логарифмической гистограмме).
+    Закрытые агрегаты пишутся в хранилище как виды rollup_1m, rollup_1h и
+    rollup_1d. Запрос выбирает самый подробный уровень, на котором диапазон
+    умещается в max_buckets интервалов (для коротких диапазонов — исходные
+    замеры), и прореживает результат до max_points алгоритмом LTTB.
+    """
+
+    def __init__(self, store, resolutions=RESOLUTIONS, fields=ROLLUP_FIELDS, clock=time.time):
+        self.store = store
+        self.resolutions = resolutions
+        self.fields = fields
+        self._clock = clock
+        self._current = {name: None for name, _ in resolutions}
+        self._open = {name: {} for name, _ in resolutions}
+        self._lock = threading.Lock()
+
+    def record(self, kind, record, ts=None):
+        """Учитывает запись хранилища вида kind"""
+        fields = self.fields.get(kind)
+        if not fields:
+            return
+        ts = self._clock() if ts is None else ts
+        target = record.get('target')
+        for field in fields:
+            if field in record:
+                self.add(series_key(kind, field, target), record[field], ts)
+
+    def add(self, series, value, ts=None):
+        """Добавляет значение ряда. value=None означает потерю"""
+        ts = self._clock() if ts is None else ts
+        closed = []
+        with self._lock:
+            for name, seconds in self.resolutions:
+                start = ts // seconds * seconds
+                current = self._current[name]
+                if current is None or start > current:
+                    closed.extend(self._close(name))
+                    self._current[name] = current = start
+                rollup = self._open[name].get(series)
+                if rollup is None:
+                    rollup = self._open[name][series] = _Rollup()
+                rollup.add(value)
+        self._write(closed)
+
+    def tick(self, now=None):
+        """Закрывает завершившиеся интервалы рядов, в которые давно не было замеров"""
+        now = self._clock() if now is None else now
+        closed = []
+        with self._lock:
+            for name, seconds in self.resolutions:
+                current = self._current[name]
+                if current is not None and current + seconds <= now:
+                    closed.extend(self._close(name))
+                    self._current[name] = None
+        self._write(closed)
+
+    def flush(self):
+        """Записывает и открытые агрегаты; при продолжении интервала они будут объединены"""
+        closed = []
+        with self._lock:
+            for name, _ in self.resolutions:
+                closed.extend(self._close(name))
+        self._write(closed)
+        self.store.flush()
+
+    def _close(self, name):
+        """Забирает открытые агрегаты уровня name. Вызывается под блокировкой"""
+        current = self._current[name]
+        kind = f'rollup_{name}'
+        closed = [(kind, rollup.to_record(series), current) for series, rollup in self._open[name].items()]
+        self._open[name] = {}
+        return closed
+
+    def _write(self, closed):
+        # Запись на диск идет без блокировки, чтобы замеры из других потоков не ждали ее
+        for kind, record, ts in closed:
+            self.store.append(kind, record, ts=ts)
+
+    def query(self, series, start, end=None, max_points=1000, max_buckets=5000, raw_span=6 * 3600):
+        """Колонки ряда за [start, end), не больше max_points точек"""
+        end = self._clock() if end is None else end
+        resolution = 'raw'
+        if end - start > raw_span:
+            for name, seconds in self.resolutions:
+                resolution = name
+                if (end - start) / seconds <= max_buckets:
+                    break
+
+        columns = {column: [] for column in COLUMNS}
+        if resolution == 'raw':
+            self._read_raw(series, start, end, columns)
+        else:
+            self._read_rollups(series, resolution, start, end, columns)
+
+        indices = lttb(columns['ts'], columns['avg'], max_points)
+        if len(indices) < len(columns['ts']):
+            columns = {column: [values[i] for i in indices] for column, values in columns.items()}
+        columns['series'] = series
+        columns['resolution'] = resolution
+        return columns
+
+    def _read_raw(self, series, start, end, columns):
+        kind, field, *target = series.split(':', 2)
+        target = target[0] if target else None
+        # Хранилище читает только записи нужной цели
+        for record in self.store.query(kind, start, end, key=target):
+            value = record.get(field)
+            if value is None:
+                continue
+            for column, item in zip(COLUMNS, (record['ts'], value, value, value, value, 1)):
+                columns[column].append(item)
+
+    def _read_rollups(self, series, resolution, start, end, columns):
+        seconds = dict(self.resolutions)[resolution]
+        aligned = start // seconds * seconds
+        rows = []
+        # Агрегаты хранятся с ключом-рядом, поэтому чужие ряды не читаются
+        for record in self.store.query(f'rollup_{resolution}', aligned, end, key=series):
+            if rows and rows[-1]['ts'] == record['ts']:
+                rows[-1] = dict(_merge(rows[-1], record), ts=record['ts'])
+            else:
+                rows.append(record)
+
+        # Текущий, еще не записанный интервал
+        with self._lock:
+            current = self._current[resolution]
+            rollup = self._open[resolution].get(series)
+            if rollup is not None and aligned <= current < end:
+                record = dict(rollup.to_record(series), ts=current)
+                if rows and rows[-1]['ts'] == current:
+                    record = dict(_merge(rows[-1], record), ts=current)
+                    rows.pop()
+                rows.append(record)
+
+        for row in rows:
+            if not row['count']:
+                continue
+            for column in COLUMNS:
+                columns[column].append(row[column])
+
+    def series_names(self):
+        """Ряды, по которым есть открытые агрегаты"""
+        with self._lock:
+            return sorted({series for rollups in self._open.values() for series in rollups})
+
+
+def export_csv(path, columns):
+    """Сохраняет результат запроса в CSV"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(('time',) + COLUMNS)
+        for row in zip(*(columns[column] for column in COLUMNS)):
+            writer.writerow((datetime.fromtimestamp(row[0]).isoformat(),) + row)
+
+
+def export_columnar(path, columns):
+    """Сохраняет результат запроса в колоночном двоичном формате.
+
+    После заголовка (сигнатура и строка JSON с описанием) каждая колонка
+    лежит одним непрерывным массивом float64, пропуски записаны как NaN.
+    """
+    header = {'series': columns.get('series'), 'resolution': columns.get('resolution'),
+              'columns': list(COLUMNS), 'rows': len(columns['ts']), 'dtype': '<f8'}
+    with open(path, 'wb') as f:
+        f.write(_COLUMNAR_MAGIC)
+        f.write(json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n')
+        for column in COLUMNS:
+            values = array('d', (math.nan if v is None else v for v in columns[column]))
+            if sys.byteorder != 'little':
+                values.byteswap()
+            values.tofile(f)
+
+
+def read_columnar(path):
+    """Читает файл, сохраненный export_columnar"""
+    with open(path, 'rb') as f:
+        if f.read(len(_COLUMNAR_MAGIC)) != _COLUMNAR_MAGIC:
+            raise ValueError(f"{path}: неизвестный формат")
+        header = json.loads(f.readline())
+        columns = {'series': header['series'], 'resolution': header['resolution']}
+        for column in header['columns']:
+            values = array('d')
+            values.fromfile(f, header['rows'])
+            if sys.byteorder != 'little':
+                values.byteswap()
+            columns[column] = values.tolist()
+    return columns
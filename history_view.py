@@ -0,0 +1,148 @@
+import time
+import tkinter as tk
+from datetime import datetime
+from tkinter import ttk, filedialog, messagebox
+
+from history import export_columnar, export_csv
+
+# Диапазоны просмотра: подпись и длительность в секундах
+RANGES = (("1 ч", 3600), ("24 ч", 86400), ("7 д", 7 * 86400), ("30 д", 30 * 86400))
+
+CHART_WIDTH = 860
+CHART_HEIGHT = 360
+_MARGIN_LEFT = 60
+_MARGIN_RIGHT = 20
+_MARGIN_Y = 20
+
+
+class HistoryView:
+    """Окно истории: график ряда за выбранный диапазон и экспорт.
+
+    Данные загружает движок в фоновом потоке (событие history), окно только
+    рисует уже прореженные точки: линию среднего и полосу min/max.
+    """
+
+    def __init__(self, root, engine, colors):
+        self.engine = engine
+        self.colors = colors
+        self.columns = None
+        self.range_seconds = RANGES[1][1]
+
+        self.window = tk.Toplevel(root)
+        self.window.title("📈 История измерений")
+        self.window.configure(bg=colors['bg'])
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        controls = tk.Frame(self.window, bg=colors['bg'])
+        controls.pack(fill='x', padx=10, pady=10)
+
+        series = [f'ping:rtt_ms:{engine.ping_target}', 'traffic:rx_bps', 'traffic:tx_bps',
+                  'speedtest:download', 'speedtest:upload']
+        series += [name for name in engine.history.series_names() if name not in series]
+        self.series_var = tk.StringVar(value=series[0])
+        selector = ttk.Combobox(controls, textvariable=self.series_var, values=series, width=36, state='readonly')
+        selector.pack(side='left')
+        selector.bind('<<ComboboxSelected>>', lambda e: self.reload())
+
+        for label, seconds in RANGES:
+            tk.Button(controls, text=label, command=lambda s=seconds: self.set_range(s),
+                      bg=colors['card_bg'], fg=colors['text_primary'], relief='flat',
+                      padx=10).pack(side='left', padx=(8, 0))
+
+        for label, command in (("CSV", self.export_csv), ("Колонки", self.export_columnar)):
+            tk.Button(controls, text=label, command=command,
+                      bg=colors['accent'], fg='black', relief='flat',
+                      padx=10).pack(side='right', padx=(8, 0))
+
+        self.info_label = tk.Label(self.window, text="Загрузка...", font=('Arial', 10),
+                                   bg=colors['bg'], fg=colors['text_secondary'])
+        self.info_label.pack(fill='x', padx=10)
+
+        self.canvas = tk.Canvas(self.window, width=CHART_WIDTH, height=CHART_HEIGHT,
+                                bg=colors['card_bg'], highlightthickness=0)
+        self.canvas.pack(padx=10, pady=10)
+        self.reload()
+
+    def set_range(self, seconds):
+        self.range_seconds = seconds
+        self.reload()
+
+    def reload(self):
+        """Запрашивает у движка точки ряда; ответ придет событием history"""
+        self.info_label.config(text="Загрузка...")
+        now = time.time()
+        self.engine.load_history(self.series_var.get(), now - self.range_seconds, now,
+                                 max_points=CHART_WIDTH - _MARGIN_LEFT - _MARGIN_RIGHT)
+
+    def show(self, columns):
+        """Рисует результат запроса, если он относится к выбранному ряду"""
+        if columns.get('series') != self.series_var.get():
+            return
+        self.columns = columns
+        self.info_label.config(text=f"Точек: {len(columns['ts'])}, уровень: {columns['resolution']}")
+        self.draw()
+
+    def draw(self):
+        canvas = self.canvas
+        canvas.delete('all')
+        columns = self.columns
+        if not columns or not columns['ts']:
+            canvas.create_text(CHART_WIDTH // 2, CHART_HEIGHT // 2, text="Нет данных за выбранный период",
+                               fill=self.colors['text_secondary'], font=('Arial', 12))
+            return
+
+        ts = columns['ts']
+        low = min(columns['min'])
+        high = max(columns['max'])
+        if high == low:
+            high = low + 1
+        start, end = ts[0], ts[-1] if ts[-1] > ts[0] else ts[0] + 1
+        plot_width = CHART_WIDTH - _MARGIN_LEFT - _MARGIN_RIGHT
+        plot_height = CHART_HEIGHT - 2 * _MARGIN_Y
+
+        def x(t):
+            return _MARGIN_LEFT + (t - start) / (end - start) * plot_width
+
+        def y(v):
+            return _MARGIN_Y + (high - v) / (high - low) * plot_height
+
+        # Полоса min/max и линия среднего, каждая одной фигурой
+        if len(ts) > 1:
+            band = [coord for t, v in zip(ts, columns['max']) for coord in (x(t), y(v))]
+            band += [coord for t, v in zip(reversed(ts), reversed(columns['min'])) for coord in (x(t), y(v))]
+            canvas.create_polygon(*band, fill='#1f4d3a', outline='')
+            line = [coord for t, v in zip(ts, columns['avg']) for coord in (x(t), y(v))]
+            canvas.create_line(*line, fill=self.colors['accent'], width=2)
+        else:
+            canvas.create_oval(x(ts[0]) - 3, y(columns['avg'][0]) - 3, x(ts[0]) + 3, y(columns['avg'][0]) + 3,
+                               fill=self.colors['accent'], outline='')
+
+        axis = self.colors['text_secondary']
+        for value in (low, (low + high) / 2, high):
+            canvas.create_text(_MARGIN_LEFT - 6, y(value), text=f"{value:.4g}", anchor='e', fill=axis,
+                               font=('Arial', 8))
+        time_format = '%H:%M' if end - start <= 86400 else '%d.%m'
+        for t in (start, (start + end) / 2, end):
+            canvas.create_text(x(t), CHART_HEIGHT - 6, text=datetime.fromtimestamp(t).strftime(time_format),
+                               fill=axis, font=('Arial', 8))
+
+    def export_csv(self):
+        self._export(export_csv, '.csv', [("CSV", '*.csv')])
+
+    def export_columnar(self):
+        self._export(export_columnar, '.npcol', [("Колоночный формат", '*.npcol')])
+
+    def _export(self, writer, extension, filetypes):
+        if not self.columns:
+            return
+        path = filedialog.asksaveasfilename(parent=self.window, defaultextension=extension, filetypes=filetypes)
+        if not path:
+            return
+        try:
+            writer(path, self.columns)
+        except OSError as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить: {e}", parent=self.window)
+
+    def close(self):
+        self.window.destroy()
+        self.window = None
@@ -0,0 +1,174 @@
+import http.client
+import socket
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Легкие адреса проверки доступности: отвечают 204 без тела
+DEFAULT_ENDPOINTS = (
+    'http://connectivitycheck.gstatic.com/generate_204',
+    'http://cp.cloudflare.com/generate_204',
+)
+
+_RETRYABLE_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                     http.client.BadStatusLine, ConnectionResetError, BrokenPipeError)
+
+
+class HttpTiming:
+    """Результат HTTP-проверки с разбивкой по этапам, мс"""
+    __slots__ = ('url', 'status', 'dns_ms', 'connect_ms', 'tls_ms', 'first_byte_ms',
+                 'total_ms', 'reused', 'body_bytes', 'error')
+
+    def __init__(self, url):
+        self.url = url
+        self.status = None
+        self.dns_ms = None
+        self.connect_ms = None
+        self.tls_ms = None
+        self.first_byte_ms = None
+        self.total_ms = None
+        self.reused = False
+        self.body_bytes = 0
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.error is None and self.status is not None and self.status < 400
+
+    def to_dict(self):
+        result = {name: getattr(self, name) for name in self.__slots__}
+        result['error'] = None if self.error is None else str(self.error)
+        return result
+
+
+class _PooledConnection:
+    __slots__ = ('connection', 'lock')
+
+    def __init__(self):
+        self.connection = None
+        self.lock = threading.Lock()
+
+
+class HttpProbe:
+    """Проверка доступности по HTTP с постоянными keep-alive соединениями.
+
+    Для каждого хоста держится одно соединение, поэтому повторные проверки
+    не тратят время на DNS, TCP и TLS. При установке нового соединения
+    этапы (DNS, connect, TLS) замеряются по отдельности, время до первого
+    байта — для каждого запроса. По умолчанию отправляется HEAD к
+    generate_204-адресам, так что тело ответа не скачивается.
+    """
+
+    def __init__(self, endpoints=DEFAULT_ENDPOINTS, method='HEAD', timeout=5.0,
+                 user_agent='NetworkPulsePro/1.0'):
+        self.endpoints = list(endpoints)
+        self.method = method
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self._pool = {}
+        self._pool_lock = threading.Lock()
+        self._ssl_context = None
+
+    def check_any(self):
+        """Проверяет адреса по очереди и возвращает первый успешный результат (или последний)"""
+        timing = None
+        for url in self.endpoints:
+            timing = self.check(url)
+            if timing.ok:
+                return timing
+        return timing
+
+    def check(self, url):
+        """Выполняет один запрос и возвращает HttpTiming"""
+        timing = HttpTiming(url)
+        parts = urlsplit(url)
+        secure = parts.scheme == 'https'
+        port = parts.port or (443 if secure else 80)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        pooled = self._pooled(parts.scheme, parts.hostname, port)
+        started = time.perf_counter()
+        with pooled.lock:
+            try:
+                # Переиспользованное соединение могло быть закрыто сервером: пробуем еще раз
+                for attempt in range(2):
+                    timing.reused = pooled.connection is not None
+                    if pooled.connection is None:
+                        pooled.connection = self._connect(parts.hostname, port, secure, timing)
+                    try:
+                        if self._request(pooled.connection, parts.hostname, path, timing):
+                            self._discard(pooled)
+                        break
+                    except _RETRYABLE_ERRORS:
+                        self._discard(pooled)
+                        if not timing.reused or attempt:
+                            raise
+            except Exception as e:
+                self._discard(pooled)
+                timing.error = e
+        timing.total_ms = (time.perf_counter() - started) * 1000
+        return timing
+
+    def close(self):
+        with self._pool_lock:
+            for pooled in self._pool.values():
+                self._discard(pooled)
+            self._pool.clear()
+
+    def _pooled(self, scheme, host, port):
+        key = (scheme, host, port)
+        with self._pool_lock:
+            pooled = self._pool.get(key)
+            if pooled is None:
+                pooled = self._pool[key] = _PooledConnection()
+        return pooled
+
+    def _connect(self, host, port, secure, timing):
+        mark = time.perf_counter()
+        family, socktype, proto, _, address = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)[0]
+        now = time.perf_counter()
+        timing.dns_ms, mark = (now - mark) * 1000, now
+
+        sock = socket.socket(family, socktype, proto)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(address)
+            now = time.perf_counter()
+            timing.connect_ms, mark = (now - mark) * 1000, now
+            if secure:
+                if self._ssl_context is None:
+                    self._ssl_context = ssl.create_default_context()
+                sock = self._ssl_context.wrap_socket(sock, server_hostname=host)
+                timing.tls_ms = (time.perf_counter() - mark) * 1000
+        except Exception:
+            sock.close()
+            raise
+
+        connection_class = http.client.HTTPSConnection if secure else http.client.HTTPConnection
+        connection = connection_class(host, port, timeout=self.timeout)
+        connection.sock = sock
+        return connection
+
+    def _request(self, connection, host, path, timing):
+        """Отправляет запрос. Возвращает True, если сервер закрывает соединение"""
+        mark = time.perf_counter()
+        connection.request(self.method, path, headers={
+            'Host': host,
+            'User-Agent': self.user_agent,
+            'Connection': 'keep-alive',
+        })
+        response = connection.getresponse()
+        timing.first_byte_ms = (time.perf_counter() - mark) * 1000
+        timing.status = response.status
+        # Дочитываем ответ, иначе соединение нельзя переиспользовать
+        timing.body_bytes = len(response.read())
+        return response.will_close
+
+    @staticmethod
+    def _discard(pooled):
+        if pooled.connection is not None:
+            pooled.connection.close()
+            pooled.connection = None
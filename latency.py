@@ -0,0 +1,264 @@
+import errno
+import itertools
+import os
+import selectors
+import socket
+import struct
+import time
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+# Ошибки connect(), которые означают, что хост ответил (пусть и отказом)
+_REACHABLE_ERRNOS = (0, errno.ECONNREFUSED, getattr(errno, 'WSAECONNREFUSED', errno.ECONNREFUSED))
+_IN_PROGRESS_ERRNOS = (0, errno.EINPROGRESS, errno.EWOULDBLOCK,
+                       getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK))
+
+
+class LatencySample:
+    """Результат одного замера задержки"""
+    __slots__ = ('host', 'port', 'method', 'rtt_ms', 'error', 'ttl')
+
+    def __init__(self, host, port, method, rtt_ms=None, error=None, ttl=None):
+        self.host = host
+        self.port = port
+        self.method = method
+        self.rtt_ms = rtt_ms
+        self.error = error
+        self.ttl = ttl
+
+    @property
+    def ok(self):
+        return self.rtt_ms is not None
+
+    def __repr__(self):
+        return f"LatencySample({self.host!r}, {self.method}, rtt_ms={self.rtt_ms}, error={self.error!r})"
+
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def _echo_request(ident, seq, payload=b'netpulse'):
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    checksum = _checksum(header + payload)
+    return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, checksum, ident, seq) + payload
+
+
+def _parse_echo_reply(packet):
+    """Номер пакета из ICMP echo reply или None.
+
+    Linux отдает в datagram-сокет только ICMP-сообщение, macOS и BSD — вместе
+    с IP-заголовком, длина которого берется из поля IHL.
+    """
+    offset = (packet[0] & 0x0f) * 4 if packet and packet[0] >> 4 == 4 else 0
+    if len(packet) < offset + 8:
+        return None
+    icmp_type, _, _, _, seq = struct.unpack_from('!BBHHH', packet, offset)
+    return seq if icmp_type == ICMP_ECHO_REPLY else None
+
+
+class LatencyEngine:
+    """Замер задержки без запуска внешних процессов.
+
+    Использует непривилегированные ICMP datagram-сокеты там, где их разрешает
+    ОС, и время установки TCP-соединения в остальных случаях. Все замеры
+    выполняются параллельно через selectors и меряются time.perf_counter_ns.
+    """
+
+    def __init__(self, timeout=2.0, tcp_port=443, prefer_icmp=True):
+        self.timeout = timeout
+        self.tcp_port = tcp_port
+        self.prefer_icmp = prefer_icmp
+        self._icmp_available = None
+        self._seq = itertools.count(1)
+        self._ident = os.getpid() & 0xffff
+
+    @property
+    def icmp_available(self):
+        """Проверяет (один раз), разрешены ли ICMP datagram-сокеты"""
+        if self._icmp_available is None:
+            try:
+                socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP).close()
+                self._icmp_available = True
+            except (OSError, AttributeError):
+                self._icmp_available = False
+        return self._icmp_available
+
+    def probe(self, host, port=None):
+        """Измеряет задержку до одного хоста"""
+        return self.probe_many([(host, port)])[0]
+
+    def probe_many(self, targets, on_sample=None):
+        """Измеряет задержку до всех целей одновременно.
+
+        targets — список хостов или пар (host, port). Цели с явным портом
+        всегда проверяются через TCP. Результаты возвращаются в порядке целей,
+        а on_sample(номер цели, замер) вызывается сразу по готовности каждого.
+        """
+        normalized = [t if isinstance(t, tuple) else (t, None) for t in targets]
+        samples = _Samples(len(normalized), on_sample)
+        methods = ['tcp'] * len(normalized)
+        icmp_jobs = []
+        tcp_jobs = []
+
+        for index, (host, port) in enumerate(normalized):
+            try:
+                methods[index], port, info = self._resolve(host, port)
+            except OSError as e:
+                samples[index] = LatencySample(host, port, methods[index], error=e)
+                continue
+            job = (index, host, port, info)
+            (icmp_jobs if methods[index] == 'icmp' else tcp_jobs).append(job)
+
+        self._measure(icmp_jobs, tcp_jobs, samples)
+
+        for index, (host, port) in enumerate(normalized):
+            if samples[index] is None:
+                samples[index] = LatencySample(host, port, methods[index], error=TimeoutError("timed out"))
+        return list(samples)
+
+    def _resolve(self, host, port):
+        """Способ замера, порт и адрес цели. Разрешение имен не входит в измеряемое время"""
+        if port is None and self.prefer_icmp and self.icmp_available:
+            try:
+                return 'icmp', None, socket.getaddrinfo(host, None, socket.AF_INET, socket.SOCK_STREAM)[0]
+            except socket.gaierror:
+                # ICMP-сокет только для IPv4: цель без IPv4-адреса проверяется по TCP
+                pass
+        port = port or self.tcp_port
+        return 'tcp', port, socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)[0]
+
+    def _measure(self, icmp_jobs, tcp_jobs, samples):
+        deadline = time.perf_counter_ns() + int(self.timeout * 1e9)
+        with selectors.DefaultSelector() as selector:
+            pending = {}
+            try:
+                # Сокеты создаются внутри try, чтобы сбой на середине не оставил открытыми уже созданные
+                self._start_tcp(tcp_jobs, selector, pending, samples)
+                self._start_icmp(icmp_jobs, selector, pending, samples)
+                self._wait(selector, pending, samples, deadline)
+            finally:
+                for sock in list(pending):
+                    self._close(selector, sock, pending)
+
+    def _start_tcp(self, jobs, selector, pending, samples):
+        for index, host, port, (family, _, _, _, address) in jobs:
+            try:
+                sock = socket.socket(family, socket.SOCK_STREAM)
+            except OSError as e:
+                samples[index] = LatencySample(host, port, 'tcp', error=e)
+                continue
+            try:
+                sock.setblocking(False)
+                started = time.perf_counter_ns()
+                code = sock.connect_ex(address)
+            except OSError as e:
+                sock.close()
+                samples[index] = LatencySample(host, port, 'tcp', error=e)
+                continue
+            if code in _IN_PROGRESS_ERRNOS:
+                pending[sock] = ('tcp', index, host, port, started)
+                selector.register(sock, selectors.EVENT_WRITE)
+                continue
+            # Немедленный отказ (например, RST с localhost) тоже означает, что хост ответил
+            samples[index] = _tcp_sample(host, port, code, started)
+            sock.close()
+
+    def _start_icmp(self, jobs, selector, pending, samples):
+        if not jobs:
+            return
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        inflight = {}
+        pending[sock] = ('icmp', inflight)
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ)
+        for index, host, port, info in jobs:
+            seq = next(self._seq) & 0xffff
+            address = info[4][0]
+            started = time.perf_counter_ns()
+            try:
+                sock.sendto(_echo_request(self._ident, seq), (address, 0))
+            except OSError as e:
+                samples[index] = LatencySample(host, None, 'icmp', error=e)
+                continue
+            inflight[(address, seq)] = (index, host, started)
+        if not inflight:
+            self._close(selector, sock, pending)
+
+    def _wait(self, selector, pending, samples, deadline):
+        while pending:
+            remaining = (deadline - time.perf_counter_ns()) / 1e9
+            if remaining <= 0:
+                return
+            for key, _ in selector.select(remaining):
+                sock = key.fileobj
+                entry = pending.get(sock)
+                if entry is None:
+                    continue
+                if entry[0] == 'tcp':
+                    self._finish_tcp(selector, sock, pending, samples)
+                else:
+                    self._finish_icmp(selector, sock, pending, samples)
+
+    def _finish_tcp(self, selector, sock, pending, samples):
+        _, index, host, port, started = pending[sock]
+        code = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        samples[index] = _tcp_sample(host, port, code, started)
+        self._close(selector, sock, pending)
+
+    def _finish_icmp(self, selector, sock, pending, samples):
+        inflight = pending[sock][1]
+        while True:
+            try:
+                packet, (address, _) = sock.recvfrom(1024)
+            except (BlockingIOError, InterruptedError):
+                break
+            finished = time.perf_counter_ns()
+            seq = _parse_echo_reply(packet)
+            if seq is None:
+                continue
+            # Ядро подменяет идентификатор, поэтому сверяем адрес и номер
+            job = inflight.pop((address, seq), None)
+            if job is None:
+                continue
+            index, host, started = job
+            samples[index] = LatencySample(host, None, 'icmp', rtt_ms=(finished - started) / 1e6)
+        if not inflight:
+            self._close(selector, sock, pending)
+
+    @staticmethod
+    def _close(selector, sock, pending):
+        if pending.pop(sock, None) is None:
+            return
+        try:
+            selector.unregister(sock)
+        except KeyError:
+            pass
+        sock.close()
+
+
+class _Samples(list):
+    """Список замеров, сообщающий о каждом новом замере"""
+
+    def __init__(self, size, on_sample):
+        super().__init__([None] * size)
+        self.on_sample = on_sample
+
+    def __setitem__(self, index, sample):
+        super().__setitem__(index, sample)
+        if self.on_sample is not None:
+            self.on_sample(index, sample)
+
+
+def _tcp_sample(host, port, code, started):
+    """Результат TCP-замера по коду connect()"""
+    finished = time.perf_counter_ns()
+    if code in _REACHABLE_ERRNOS:
+        return LatencySample(host, port, 'tcp', rtt_ms=(finished - started) / 1e6)
+    return LatencySample(host, port, 'tcp', error=OSError(code, os.strerror(code)))
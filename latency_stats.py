@@ -0,0 +1,180 @@
+import math
+import threading
+import time
+
+# Логарифмические корзины гистограммы: от 0.01 мс до 60 с с шагом 5%
+MIN_MS = 0.01
+MAX_MS = 60000.0
+GROWTH = 1.05
+_LOG_GROWTH = math.log(GROWTH)
+MAX_BUCKET = int(math.log(MAX_MS / MIN_MS) / _LOG_GROWTH) + 1
+
+# Окна статистики: имя, длительность в секундах и число интервалов в кольце
+WINDOWS = (('1m', 60, 12), ('5m', 300, 10), ('1h', 3600, 12))
+
+
+def bucket_index(rtt_ms):
+    if rtt_ms <= MIN_MS:
+        return 0
+    return min(int(math.log(rtt_ms / MIN_MS) / _LOG_GROWTH) + 1, MAX_BUCKET)
+
+
+def bucket_value(index):
+    """Представительное значение корзины (геометрическая середина)"""
+    if index == 0:
+        return MIN_MS
+    return MIN_MS * GROWTH ** (index - 0.5)
+
+
+class _Slot:
+    __slots__ = ('epoch', 'count', 'lost', 'total', 'hist', 'deltas', 'delta_total')
+
+    def __init__(self):
+        self.epoch = -1
+        self.count = 0
+        self.lost = 0
+        self.total = 0.0
+        self.hist = {}
+        # Разности соседних задержек |D| для джиттера окна
+        self.deltas = 0
+        self.delta_total = 0.0
+
+
+class _Window:
+    """Кольцо интервалов фиксированной длины, покрывающее окно span секунд"""
+    __slots__ = ('span', 'slot_seconds', 'slots')
+
+    def __init__(self, span, slot_count):
+        self.span = span
+        self.slot_seconds = span / slot_count
+        self.slots = [_Slot() for _ in range(slot_count)]
+
+    def add(self, now, bucket, rtt_ms, delta):
+        epoch = int(now // self.slot_seconds)
+        slot = self.slots[epoch % len(self.slots)]
+        if slot.epoch != epoch:
+            slot.epoch = epoch
+            slot.count = slot.lost = slot.deltas = 0
+            slot.total = slot.delta_total = 0.0
+            slot.hist.clear()
+        if rtt_ms is None:
+            slot.lost += 1
+        else:
+            slot.count += 1
+            slot.total += rtt_ms
+            slot.hist[bucket] = slot.hist.get(bucket, 0) + 1
+        if delta is not None:
+            slot.deltas += 1
+            slot.delta_total += delta
+
+    def live_slots(self, now):
+        current = int(now // self.slot_seconds)
+        oldest = current - len(self.slots)
+        return [slot for slot in self.slots if oldest < slot.epoch <= current]
+
+
+class LatencyStats:
+    """Потоковая статистика задержки одной цели.
+
+    Перцентили считаются по логарифмической гистограмме (погрешность ~2.5%),
+    джиттер окна — средняя разность соседних задержек |D| за окно (к ней же
+    сходится оценка RFC 3550), потери — по доле неответивших проверок.
+    Атрибут jitter хранит оценку RFC 3550 (J += (|D| - J) / 16) за все время.
+    Память ограничена числом корзин и интервалов и не зависит от числа замеров.
+    """
+
+    def __init__(self, windows=WINDOWS, clock=time.monotonic):
+        self._clock = clock
+        self._windows = {name: _Window(span, slots) for name, span, slots in windows}
+        self._previous = None
+        self._lock = threading.Lock()
+        self.jitter = 0.0
+        self.samples = 0
+
+    def add(self, rtt_ms, now=None):
+        """Учитывает замер. rtt_ms=None означает потерю"""
+        now = self._clock() if now is None else now
+        bucket = None if rtt_ms is None else bucket_index(rtt_ms)
+        with self._lock:
+            delta = None
+            if rtt_ms is not None:
+                if self._previous is not None:
+                    delta = abs(rtt_ms - self._previous)
+                    self.jitter += (delta - self.jitter) / 16
+                self._previous = rtt_ms
+            for window in self._windows.values():
+                window.add(now, bucket, rtt_ms, delta)
+            self.samples += 1
+
+    def summary(self, window='1m', now=None):
+        """Сводка за окно: count, lost, loss_pct, avg, p50, p95, p99, jitter"""
+        now = self._clock() if now is None else now
+        with self._lock:
+            slots = self._windows[window].live_slots(now)
+            count = sum(slot.count for slot in slots)
+            lost = sum(slot.lost for slot in slots)
+            total = sum(slot.total for slot in slots)
+            deltas = sum(slot.deltas for slot in slots)
+            delta_total = sum(slot.delta_total for slot in slots)
+            merged = {}
+            for slot in slots:
+                for bucket, hits in slot.hist.items():
+                    merged[bucket] = merged.get(bucket, 0) + hits
+
+        result = {
+            'window': window,
+            'count': count,
+            'lost': lost,
+            'loss_pct': lost * 100 / (count + lost) if count + lost else 0.0,
+            'avg': total / count if count else None,
+            'jitter': delta_total / deltas if deltas else None,
+        }
+        result.update(_percentiles(merged, count, (50, 95, 99)))
+        return result
+
+
+def _percentiles(hist, count, percents):
+    result = {f'p{p}': None for p in percents}
+    if not count:
+        return result
+    targets = sorted((math.ceil(count * p / 100), p) for p in percents)
+    seen = 0
+    position = 0
+    for bucket in sorted(hist):
+        seen += hist[bucket]
+        while position < len(targets) and seen >= targets[position][0]:
+            result[f'p{targets[position][1]}'] = bucket_value(bucket)
+            position += 1
+    return result
+
+
+class LatencyStatsRegistry:
+    """Статистика задержки по всем целям"""
+
+    def __init__(self, windows=WINDOWS, clock=time.monotonic):
+        self._windows = windows
+        self._clock = clock
+        self._targets = {}
+        self._lock = threading.Lock()
+
+    def add(self, target, rtt_ms, now=None):
+        stats = self._targets.get(target)
+        if stats is None:
+            with self._lock:
+                stats = self._targets.setdefault(target, LatencyStats(self._windows, self._clock))
+        stats.add(rtt_ms, now)
+        return stats
+
+    def remove(self, target):
+        with self._lock:
+            self._targets.pop(target, None)
+
+    def get(self, target):
+        return self._targets.get(target)
+
+    def summary(self, target, window='1m', now=None):
+        stats = self._targets.get(target)
+        return stats.summary(window, now) if stats is not None else None
+
+    def targets(self):
+        return list(self._targets)
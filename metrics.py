@@ -0,0 +1,276 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Границы гистограмм задержки по умолчанию, секунды
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    """Каноническая запись числа OpenMetrics: целые как есть, дробные через repr (1.0)"""
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _labels_text(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Child:
+    """Значение метрики с конкретным набором меток.
+
+    Каждый экземпляр защищен своим замком, так что потоки проверок разных
+    целей не мешают друг другу. Строки экспозиции кэшируются до следующего
+    изменения значения.
+    """
+    __slots__ = ('lock', 'labels', 'dirty', 'lines')
+
+    def __init__(self, labels):
+        self.lock = threading.Lock()
+        self.labels = labels
+        self.dirty = True
+        self.lines = ''
+
+    def render(self, family):
+        with self.lock:
+            if self.dirty:
+                self.lines = self._render(family)
+                self.dirty = False
+            return self.lines
+
+
+class _CounterChild(_Child):
+    __slots__ = ('value',)
+
+    def __init__(self, labels):
+        super().__init__(labels)
+        self.value = 0
+
+    def inc(self, amount=1):
+        if amount < 0:
+            raise ValueError("счетчик не может уменьшаться")
+        with self.lock:
+            self.value += amount
+            self.dirty = True
+
+    def _render(self, family):
+        return f'{family.name}_total{_labels_text(family.labelnames, self.labels)} {_format_value(self.value)}\n'
+
+
+class _GaugeChild(_Child):
+    __slots__ = ('value',)
+
+    def __init__(self, labels):
+        super().__init__(labels)
+        self.value = 0
+
+    def set(self, value):
+        with self.lock:
+            self.value = value
+            self.dirty = True
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+            self.dirty = True
+
+    def _render(self, family):
+        return f'{family.name}{_labels_text(family.labelnames, self.labels)} {_format_value(self.value)}\n'
+
+
+class _HistogramChild(_Child):
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, labels, bounds):
+        super().__init__(labels)
+        self.bounds = bounds
+        # Счетчики по корзинам без накопления: накопленные суммы считаются при выдаче
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            self.dirty = True
+
+    def _render(self, family):
+        names, values = family.labelnames, self.labels
+        lines = []
+        cumulative = 0
+        for bound, hits in zip(self.bounds + (math.inf,), self.counts):
+            cumulative += hits
+            labels = _labels_text(names, values, f'le="{_format_value(float(bound))}"')
+            lines.append(f'{family.name}_bucket{labels} {cumulative}\n')
+        labels = _labels_text(names, values)
+        lines.append(f'{family.name}_count{labels} {self.count}\n')
+        lines.append(f'{family.name}_sum{labels} {_format_value(self.sum)}\n')
+        return ''.join(lines)
+
+
+class MetricFamily:
+    """Метрика со всеми наборами меток: counter, gauge или histogram"""
+
+    _child_classes = {'counter': _CounterChild, 'gauge': _GaugeChild, 'histogram': _HistogramChild}
+
+    def __init__(self, name, kind, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.kind = kind
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children = {}
+        self._lock = threading.Lock()
+        self._header = f'# TYPE {name} {kind}\n# HELP {name} {_escape(documentation)}\n'
+        if not self.labelnames:
+            self.labels()
+
+    def labels(self, *values):
+        """Значение метрики для набора меток (создается при первом обращении)"""
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: ожидаются метки {self.labelnames}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._new_child(values)
+                    self._children[values] = child
+        return child
+
+    def remove(self, *values):
+        with self._lock:
+            self._children.pop(tuple(str(value) for value in values), None)
+
+    # Короткие формы для метрик без меток
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _new_child(self, values):
+        if self.kind == 'histogram':
+            return _HistogramChild(values, self.buckets)
+        return self._child_classes[self.kind](values)
+
+    def render(self):
+        children = list(self._children.values())
+        return self._header + ''.join(child.render(self) for child in children)
+
+
+class MetricsRegistry:
+    """Реестр метрик с выдачей в текстовом формате OpenMetrics.
+
+    Обновления стоят одного захвата замка конкретного значения. Текст
+    выдачи собирается из кэшированных строк неизменившихся значений и
+    дополнительно кэшируется на max_age секунд, так что частые запросы
+    /metrics при тысячах целей не тормозят проверки.
+    """
+
+    def __init__(self, max_age=1.0, clock=time.monotonic):
+        self.max_age = max_age
+        self._clock = clock
+        self._families = {}
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+        self._cached = None
+        self._cached_at = None
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(MetricFamily(name, 'counter', documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(MetricFamily(name, 'gauge', documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(MetricFamily(name, 'histogram', documentation, labelnames, buckets))
+
+    def _register(self, family):
+        with self._lock:
+            if family.name in self._families:
+                raise ValueError(f"метрика {family.name} уже зарегистрирована")
+            self._families[family.name] = family
+        return family
+
+    def get(self, name):
+        return self._families.get(name)
+
+    def exposition(self):
+        """Текст OpenMetrics в байтах"""
+        with self._render_lock:
+            now = self._clock()
+            if self._cached is None or now - self._cached_at >= self.max_age:
+                families = list(self._families.values())
+                text = ''.join(family.render() for family in families) + '# EOF\n'
+                self._cached = text.encode('utf-8')
+                self._cached_at = now
+            return self._cached
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.registry.exposition()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """HTTP-сервер с единственным адресом /metrics"""
+    daemon_threads = True
+
+    def __init__(self, registry, host='127.0.0.1', port=9108):
+        super().__init__((host, port), _MetricsHandler)
+        self.registry = registry
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/metrics'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,159 @@
+"""Консольный режим Network Pulse Pro для серверов без графической оболочки.
+
+Запуск: python -m monitor_daemon [--ping-interval 5] [--diagnostics-interval 300]
+Каждое событие движка выводится одной строкой JSON в stdout.
+"""
+import argparse
+import json
+import queue
+import signal
+import sys
+import threading
+import time
+
+from alert_sinks import DesktopSink, FileSink, WebhookSink
+from dns_probe import DEFAULT_RESOLVERS
+from http_probe import DEFAULT_ENDPOINTS
+from monitor_engine import NetworkMonitorEngine
+from throughput import HttpThroughputBackend
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='monitor_daemon',
+                                     description="Network Pulse Pro без графического интерфейса")
+    parser.add_argument('--data-dir', help="папка для хранения результатов")
+    parser.add_argument('--config',
+                        help="файл настроек TOML или JSON (по умолчанию config.toml в папке данных); "
+                             "изменения применяются без перезапуска и имеют приоритет над флагами")
+    parser.add_argument('--ping-target', default='8.8.8.8', help="цель мониторинга задержки")
+    parser.add_argument('--ping-method', choices=('socket', 'subprocess'), default='socket',
+                        help="замер задержки через сокеты или системной утилитой ping")
+    parser.add_argument('--ping-interval', type=float, default=5, help="интервал замера задержки, с")
+    parser.add_argument('--status-interval', type=float, default=10, help="интервал проверки соединения, с")
+    parser.add_argument('--http-endpoint', action='append', dest='http_endpoints',
+                        help="адрес HTTP-проверки доступности (можно указать несколько раз)")
+    parser.add_argument('--traffic-interval', type=float, default=1, help="интервал замера трафика, с")
+    parser.add_argument('--process-interval', type=float, default=5,
+                        help="интервал замера сетевой активности процессов, с (0 — отключен)")
+    parser.add_argument('--top-processes', type=int, default=5,
+                        help="сколько самых активных процессов выводить")
+    parser.add_argument('--diagnostics-interval', type=float, default=0,
+                        help="интервал полной диагностики, с (0 — отключена)")
+    parser.add_argument('--dns-interval', type=float, default=0,
+                        help="интервал замера времени разрешения имен, с (0 — отключен)")
+    parser.add_argument('--dns-server', action='append', dest='dns_servers',
+                        help="резолвер для замера DNS (можно указать несколько раз)")
+    parser.add_argument('--speedtest-interval', type=float, default=0,
+                        help="интервал теста скорости, с (0 — отключен)")
+    parser.add_argument('--throughput-url',
+                        help="адрес скачивания для HTTP-теста скорости вместо speedtest-cli")
+    parser.add_argument('--throughput-upload-url', help="адрес отправки для HTTP-теста скорости")
+    parser.add_argument('--throughput-streams', type=int, default=4, help="число параллельных потоков")
+    parser.add_argument('--throughput-duration', type=float, default=10,
+                        help="длительность каждого направления HTTP-теста, с")
+    parser.add_argument('--targets-file',
+                        help="JSON-список целей [{\"name\", \"host\", \"port\", \"interval\", \"timeout\"}]")
+    parser.add_argument('--metrics-port', type=int, default=0,
+                        help="порт HTTP-адреса /metrics в формате OpenMetrics (0 — отключен)")
+    parser.add_argument('--metrics-host', default='127.0.0.1', help="адрес для /metrics")
+    parser.add_argument('--alert-webhook', action='append', default=[],
+                        help="адрес для POST-оповещений об авариях (можно указать несколько раз)")
+    parser.add_argument('--alert-file', help="файл для оповещений (JSON Lines)")
+    parser.add_argument('--desktop-alerts', action='store_true', help="системные уведомления об авариях")
+    parser.add_argument('--profile', action='store_true',
+                        help="профилировать с запуска (таймеры этапов, cProfile, tracemalloc); "
+                             "отчет сохраняется при остановке в папку profiles. Во время работы "
+                             "профилирование включается созданием файла profiling.on в папке данных")
+    parser.add_argument('--duration', type=float, default=0,
+                        help="время работы, с (0 — до сигнала остановки)")
+    return parser
+
+
+def write_event(event, output):
+    record = event.to_dict()
+    if event.kind == 'log':
+        # Шаблон сообщения раскрываем, аргументы оставляем для машинной обработки
+        args = record.get('args') or ()
+        record['message'] = record['message'].format(*args) if args else record['message']
+    output.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+    output.flush()
+
+
+def load_watch_targets(path):
+    """Читает цели многоцелевого мониторинга из JSON"""
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    return [(item.get('name', f"{item['host']}:{item.get('port', 443)}"), item['host'],
+             item.get('port', 443), item.get('interval', 5.0), item.get('timeout', 2.0))
+            for item in raw]
+
+
+def run(engine, args, output=sys.stdout, stop_event=None):
+    """Запускает движок и выводит события, пока не будет установлен stop_event"""
+    stop_event = stop_event or threading.Event()
+    events = queue.Queue()
+    engine.subscribe(events.put)
+    if args.profile:
+        engine.profiler.start()
+    if args.metrics_port:
+        engine.serve_metrics(args.metrics_port, args.metrics_host)
+    engine.start()
+    engine.start_ping_monitoring()
+    if args.targets_file:
+        for key, host, port, interval, timeout in load_watch_targets(args.targets_file):
+            engine.watch_target(key, host, port, interval, timeout)
+
+    deadline = time.monotonic() + args.duration if args.duration > 0 else None
+    try:
+        while not stop_event.is_set():
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            try:
+                write_event(events.get(timeout=0.5), output)
+            except queue.Empty:
+                continue
+    finally:
+        engine.stop()
+        # Выводим события, опубликованные до остановки
+        while True:
+            try:
+                write_event(events.get_nowait(), output)
+            except queue.Empty:
+                break
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    backend = None
+    if args.throughput_url:
+        backend = HttpThroughputBackend(args.throughput_url, args.throughput_upload_url,
+                                        streams=args.throughput_streams, duration=args.throughput_duration)
+    sinks = [WebhookSink(url) for url in args.alert_webhook]
+    if args.alert_file:
+        sinks.append(FileSink(args.alert_file))
+    if args.desktop_alerts:
+        sinks.append(DesktopSink())
+    engine = NetworkMonitorEngine(data_dir=args.data_dir, ping_target=args.ping_target,
+                                  ping_interval=args.ping_interval,
+                                  status_interval=args.status_interval,
+                                  traffic_interval=args.traffic_interval,
+                                  http_endpoints=args.http_endpoints or DEFAULT_ENDPOINTS,
+                                  throughput_backend=backend, alert_sinks=sinks,
+                                  ping_method=args.ping_method,
+                                  dns_servers=args.dns_servers or DEFAULT_RESOLVERS,
+                                  process_interval=args.process_interval, top_processes=args.top_processes,
+                                  dns_interval=args.dns_interval, diagnostics_interval=args.diagnostics_interval,
+                                  speedtest_interval=args.speedtest_interval, config_path=args.config)
+    stop_event = threading.Event()
+
+    def stop(signum, frame):
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    run(engine, args, stop_event=stop_event)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,813 @@
+import importlib.util
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import diagnostics
+from alert_sinks import AlertDispatcher
+from config import DEFAULT_THRESHOLDS, ConfigWatcher, default_config
+from detection import DetectionEngine
+from dns_probe import DEFAULT_PROBE_NAME, DEFAULT_RESOLVERS, DnsProbe
+from history import ROLLUP_SEGMENT_SECONDS, History
+from http_probe import HttpProbe, DEFAULT_ENDPOINTS
+from latency import LatencyEngine
+from latency_stats import LatencyStatsRegistry
+from metrics import MetricsRegistry, MetricsServer
+from ping_process import PingBackend
+from process_sampler import ProcessSampler
+from probe_scheduler import ProbeScheduler
+from profiling import Profiler
+from results_store import ResultsStore
+from speedtest_cache import SpeedtestServerCache
+from throughput import SpeedtestBackend
+from traffic_sampler import COUNTER_FIELDS, TrafficSampler
+
+# speedtest импортируется только при первом тесте скорости
+SPEEDTEST_AVAILABLE = importlib.util.find_spec('speedtest') is not None
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'network_data')
+
+
+# Периодические проверки с интервалом из настроек: задача, параметр, метод движка
+INTERVAL_JOBS = (
+    ('status', 'status_interval', 'check_status'),
+    ('traffic', 'traffic_interval', 'sample_traffic'),
+    ('processes', 'process_interval', 'sample_processes'),
+    ('dns', 'dns_interval', 'probe_dns'),
+    ('diagnostics', 'diagnostics_interval', 'diagnose'),
+    ('speedtest', 'speedtest_interval', 'speed_test'),
+)
+
+# Задачи, которые могут занимать поток секундами (таймауты, тест скорости, запись на диск);
+# они выполняются в отдельном пуле и не задерживают частые замеры ping и трафика
+BLOCKING_JOBS = frozenset(('status', 'dns', 'diagnostics', 'speedtest', 'retention'))
+
+
+def ping_level(ping_time, thresholds=DEFAULT_THRESHOLDS):
+    """Оценивает задержку: success / warning / error"""
+    if ping_time < thresholds['ping_good_ms']:
+        return 'success'
+    elif ping_time < thresholds['ping_fair_ms']:
+        return 'warning'
+    return 'error'
+
+
+def latency_level(summary, thresholds=DEFAULT_THRESHOLDS):
+    """Оценивает качество связи по статистике окна: p95 задержки и потерям"""
+    if summary is None or (not summary['count'] and not summary['lost']):
+        return 'warning'
+    if summary['loss_pct'] > thresholds['loss_error_pct'] or summary['p95'] is None:
+        return 'error'
+    level = ping_level(summary['p95'], thresholds)
+    if level == 'success' and summary['loss_pct'] > thresholds['loss_warning_pct']:
+        return 'warning'
+    return level
+
+
+def download_level(speed, thresholds=DEFAULT_THRESHOLDS):
+    """Оценивает скорость скачивания в Мбит/с"""
+    if speed > thresholds['download_good_mbps']:
+        return 'success'
+    elif speed > thresholds['download_fair_mbps']:
+        return 'warning'
+    return 'error'
+
+
+def upload_level(speed, thresholds=DEFAULT_THRESHOLDS):
+    """Оценивает скорость отправки в Мбит/с"""
+    if speed > thresholds['upload_good_mbps']:
+        return 'success'
+    elif speed > thresholds['upload_fair_mbps']:
+        return 'warning'
+    return 'error'
+
+
+def overall_quality(download_speed, upload_speed, ping, thresholds=DEFAULT_THRESHOLDS):
+    """Общая оценка результата теста скорости"""
+    if (download_speed > thresholds['excellent_download_mbps'] and upload_speed > thresholds['excellent_upload_mbps']
+            and ping < thresholds['excellent_ping_ms']):
+        return "Отличное"
+    elif (download_speed > thresholds['download_good_mbps'] and upload_speed > thresholds['upload_good_mbps']
+          and ping < thresholds['ping_good_ms']):
+        return "Хорошее"
+    elif download_speed > thresholds['download_fair_mbps']:
+        return "Удовлетворительное"
+    return "Плохое"
+
+
+class MonitorEvent:
+    """Событие движка мониторинга для интерфейса или журнала демона"""
+    __slots__ = ('kind', 'data', 'ts')
+
+    def __init__(self, kind, data, ts=None):
+        self.kind = kind
+        self.data = data
+        self.ts = time.time() if ts is None else ts
+
+    def to_dict(self):
+        return dict(self.data, kind=self.kind, ts=self.ts)
+
+
+class EngineMetrics:
+    """Метрики движка для выдачи через /metrics"""
+
+    def __init__(self, registry):
+        self.connectivity_up = registry.gauge(
+            'netmon_connectivity_up', "1, если интернет доступен")
+        self.connectivity_checks = registry.counter(
+            'netmon_connectivity_checks', "Проверки соединения по результату", ('result',))
+        self.http_first_byte = registry.histogram(
+            'netmon_http_first_byte_seconds', "Время до первого байта HTTP-проверки", ('url',))
+        self.probe_rtt = registry.histogram(
+            'netmon_probe_rtt_seconds', "Задержка до цели", ('target',))
+        self.probes = registry.counter(
+            'netmon_probes', "Проверки задержки по результату", ('target', 'result'))
+        self.interface_counters = {
+            field: registry.counter(f'netmon_interface_{field}', f"Счетчик {field} интерфейса", ('interface',))
+            for field in COUNTER_FIELDS
+        }
+        self.interface_rx_rate = registry.gauge(
+            'netmon_interface_receive_bits_per_second', "Скорость приема", ('interface',))
+        self.interface_tx_rate = registry.gauge(
+            'netmon_interface_transmit_bits_per_second', "Скорость отправки", ('interface',))
+        self.speedtest_download = registry.gauge(
+            'netmon_speedtest_download_bits_per_second', "Скорость скачивания в последнем тесте")
+        self.speedtest_upload = registry.gauge(
+            'netmon_speedtest_upload_bits_per_second', "Скорость отправки в последнем тесте")
+        self.speedtest_ping = registry.gauge(
+            'netmon_speedtest_ping_seconds', "Задержка в последнем тесте скорости")
+        self.speedtest_runs = registry.counter(
+            'netmon_speedtest_runs', "Тесты скорости по результату", ('result',))
+        self.diagnostics_success = registry.gauge(
+            'netmon_diagnostics_success_ratio', "Доля доступных серверов в последней диагностике")
+        self.diagnostics_runs = registry.counter(
+            'netmon_diagnostics_runs', "Запуски диагностики")
+        self.dns_lookup = registry.histogram(
+            'netmon_dns_lookup_seconds', "Время DNS-запроса к резолверу без кэша и из кэша",
+            ('server', 'cache'))
+        self.dns_queries = registry.counter(
+            'netmon_dns_queries', "DNS-запросы по результату", ('server', 'result'))
+        self.dns_failure = registry.gauge(
+            'netmon_dns_failure_ratio', "Доля неудачных DNS-запросов за 5 минут", ('server',))
+        self.alerts = registry.counter(
+            'netmon_alerts', "Оповещения детектора по виду и результату рассылки", ('kind', 'result'))
+
+    def observe_probe(self, target, rtt_ms):
+        if rtt_ms is None:
+            self.probes.labels(target, 'lost').inc()
+        else:
+            self.probes.labels(target, 'ok').inc()
+            self.probe_rtt.labels(target).observe(rtt_ms / 1000)
+
+
+class NetworkMonitorEngine:
+    """Движок мониторинга сети без зависимости от графического интерфейса.
+
+    Выполняет проверку соединения, мониторинг задержки, диагностику, тест
+    скорости и подсчет трафика. Результаты публикуются как MonitorEvent всем
+    подписчикам (окну Tk или консольному демону) прямо из рабочих потоков.
+    """
+
+    def __init__(self, data_dir=None, ping_target='8.8.8.8', ping_interval=5, status_interval=10,
+                 traffic_interval=1, http_endpoints=DEFAULT_ENDPOINTS, throughput_backend=None,
+                 alert_sinks=(), ping_method='socket', dns_servers=DEFAULT_RESOLVERS, process_interval=5,
+                 top_processes=5, dns_interval=0, diagnostics_interval=0, speedtest_interval=0,
+                 config_path=None):
+        self.data_dir = data_dir or DEFAULT_DATA_DIR
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.ping_target = ping_target
+        self.ping_interval = ping_interval
+        self.status_interval = status_interval
+        self.traffic_interval = traffic_interval
+        self.process_interval = process_interval
+        self.dns_interval = dns_interval
+        self.diagnostics_interval = diagnostics_interval
+        self.speedtest_interval = speedtest_interval
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+        # Список серверов диагностики из настроек; None — файл diagnostics_targets.json
+        self.diagnostics_targets = None
+        self._diagnostic_keys = set()
+
+        self._listeners = []
+        self.store = ResultsStore(os.path.join(self.data_dir, 'store'), kind_segment_seconds=ROLLUP_SEGMENT_SECONDS)
+        self.history = History(self.store)
+        # Записи сохраняет отдельный поток: fsync не задерживает цикл asyncio и проверки
+        self._writes = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self.alerts = AlertDispatcher(alert_sinks, on_error=self._alert_failed)
+        self.detector = DetectionEngine(self.store, on_alert=self._handle_alert)
+        self.latency = LatencyEngine()
+        # Системный ping: запасная проверка соединения и режим ping_method='subprocess'
+        self.ping_method = ping_method
+        self.ping_fallback = PingBackend(interval=ping_interval)
+        self.http_probe = HttpProbe(http_endpoints)
+        self.dns = DnsProbe(dns_servers)
+        self.last_http = None
+        self.stats = LatencyStatsRegistry()
+        self.traffic = TrafficSampler()
+        self.processes = ProcessSampler(top=top_processes)
+        self.metrics = MetricsRegistry()
+        self.m = EngineMetrics(self.metrics)
+        self.metrics_server = None
+        # Профилирование по запросу: появление файла profiling.on включает захват
+        self.profiler = Profiler(output_dir=os.path.join(self.data_dir, 'profiles'), registry=self.metrics,
+                                 trigger_path=os.path.join(self.data_dir, 'profiling.on'))
+        self.speedtest_cache = (SpeedtestServerCache(os.path.join(self.data_dir, 'speedtest_cache.json'))
+                                if SPEEDTEST_AVAILABLE else None)
+        # Способ измерения скорости: по умолчанию speedtest-cli, если он установлен
+        if throughput_backend is None and self.speedtest_cache is not None:
+            throughput_backend = SpeedtestBackend(self.speedtest_cache)
+        self.throughput_backend = throughput_backend
+        self.probes = ProbeScheduler(on_result=self._handle_probe_result, profiler=self.profiler)
+        self._targets = None
+        self._targets_started = False
+        self.is_monitoring = False
+        self._started = False
+        self._speed_test_lock = threading.Lock()
+
+        # Параметры конструктора служат основой, файл настроек переопределяет их на ходу
+        base = default_config()
+        base['monitor'].update(ping_target=ping_target, ping_interval=ping_interval,
+                               status_interval=status_interval, traffic_interval=traffic_interval,
+                               process_interval=process_interval, dns_interval=dns_interval,
+                               diagnostics_interval=diagnostics_interval, speedtest_interval=speedtest_interval)
+        base['dns']['servers'] = list(dns_servers)
+        self.config_path = config_path or os.path.join(self.data_dir, 'config.toml')
+        self.config_watcher = ConfigWatcher(self.config_path, base, self.apply_config, self._config_error)
+
+    @property
+    def targets(self):
+        """Планировщик многоцелевого мониторинга; asyncio загружается при первом обращении"""
+        if self._targets is None:
+            from target_scheduler import TargetScheduler
+            self._targets = TargetScheduler(on_result=self._handle_target_result)
+        return self._targets
+
+    def subscribe(self, listener):
+        """Подписывает listener(event) на события. Вызывается из рабочих потоков"""
+        self._listeners.append(listener)
+
+    def emit(self, kind, **data):
+        """Публикует событие всем подписчикам"""
+        event = MonitorEvent(kind, data)
+        for listener in self._listeners:
+            listener(event)
+
+    def log(self, message, level="info", *args):
+        """Публикует сообщение журнала. При наличии args message — шаблон str.format"""
+        self.emit('log', message=message, level=level, args=args)
+
+    def start(self):
+        """Запускает периодические проверки"""
+        # Файл настроек читается до запуска, чтобы проверки сразу шли с его интервалами
+        self.config_watcher.poll()
+        self._started = True
+        for name, key, method in INTERVAL_JOBS:
+            if getattr(self, key) > 0:
+                self.probes.add_job(name, getattr(self, method), getattr(self, key),
+                                    blocking=name in BLOCKING_JOBS)
+        self.probes.add_job('retention', self.store.apply_retention, 3600, blocking=True)
+        self.probes.add_job('history', self.history.tick, 60, run_now=False)
+        self.probes.add_job('profiler', self.poll_profiler, 5)
+        self.probes.add_job('config', self.config_watcher.poll, 2, run_now=False)
+        self.probes.start()
+
+    def apply_config(self, previous, config):
+        """Применяет изменившиеся настройки к работающему движку.
+
+        Трогаются только изменившиеся части: задачи планировщика
+        перенастраиваются или удаляются по одной, цели многоцелевого
+        мониторинга сравниваются по имени, остальные проверки продолжают
+        работать по прежнему расписанию.
+        """
+        changes = []
+        for apply in (self._apply_monitor, self._apply_thresholds, self._apply_detection,
+                      self._apply_dns, self._apply_targets, self._apply_diagnostics):
+            changes.extend(apply(previous, config))
+        if changes:
+            self.log("Настройки применены: {}", "success", ", ".join(changes))
+        return changes
+
+    def _apply_monitor(self, previous, config):
+        """Интервалы проверок и цель ping"""
+        changes = []
+        monitor, old_monitor = config['monitor'], previous['monitor']
+        for name, key, method in INTERVAL_JOBS:
+            if monitor[key] != old_monitor[key]:
+                setattr(self, key, monitor[key])
+                changes.append(key)
+                if self._started:
+                    self._retime_job(name, getattr(self, method), monitor[key])
+        if 'status_interval' in changes and self.probes.has_job('targets'):
+            self.probes.set_interval('targets', self.status_interval)
+        if (monitor['ping_target'], monitor['ping_interval']) != (old_monitor['ping_target'],
+                                                                  old_monitor['ping_interval']):
+            self._reconfigure_ping(monitor['ping_target'], monitor['ping_interval'])
+            changes.append('ping')
+        return changes
+
+    def _apply_thresholds(self, previous, config):
+        if config['thresholds'] == previous['thresholds']:
+            return []
+        self.thresholds = dict(config['thresholds'])
+        return ['thresholds']
+
+    def _apply_detection(self, previous, config):
+        if config['detection'] == previous['detection']:
+            return []
+        self.detector.configure(**config['detection'])
+        return ['detection']
+
+    def _apply_dns(self, previous, config):
+        if config['dns'] == previous['dns']:
+            return []
+        self.dns.set_servers(config['dns']['servers'])
+        return ['dns']
+
+    def _apply_diagnostics(self, previous, config):
+        if config['diagnostics'] == previous['diagnostics']:
+            return []
+        self.diagnostics_targets = (None if config['diagnostics'] is None else
+                                    [(item['name'], item['address']) for item in config['diagnostics']])
+        return ['diagnostics']
+
+    def _config_error(self, error):
+        # Ошибочный файл не применяется, продолжают действовать прежние настройки
+        self.log("Ошибка в файле настроек {}: {}", "error", self.config_path, str(error))
+
+    def _retime_job(self, name, func, interval):
+        if interval <= 0:
+            self.probes.remove_job(name)
+        elif self.probes.has_job(name):
+            self.probes.set_interval(name, interval)
+        else:
+            self.probes.add_job(name, func, interval, run_now=False, blocking=name in BLOCKING_JOBS)
+
+    def _reconfigure_ping(self, target, interval):
+        old_target = self.ping_target
+        self.ping_target = target
+        self.ping_interval = interval
+        self.ping_fallback.interval = interval
+        if not self.is_monitoring:
+            return
+        if self.ping_method == 'subprocess':
+            # Цель и интервал заданы в командной строке ping, поэтому процесс перезапускается
+            self.ping_fallback.unwatch(old_target)
+            self.ping_fallback.watch(target, on_sample=self.publish_ping, on_exit=self._ping_exited)
+        else:
+            self.probes.set_interval('ping', interval)
+
+    def _apply_targets(self, previous, config):
+        """Добавляет, удаляет и перенастраивает только изменившиеся цели"""
+        old = {item['name']: item for item in previous['targets']}
+        new = {item['name']: item for item in config['targets']}
+        changes = []
+        for name in sorted(old.keys() - new.keys()):
+            self.unwatch_target(name)
+            changes.append(f"-{name}")
+        for name in sorted(new):
+            item, before = new[name], old.get(name)
+            if item == before:
+                continue
+            if before is not None and (item['host'], item['port']) == (before['host'], before['port']):
+                self.targets.retime_target(name, item['interval'], item['timeout'])
+                changes.append(f"~{name}")
+                continue
+            if before is not None:
+                # Новый адрес — новая цель: статистика старого адреса не переносится
+                self.unwatch_target(name)
+            self.watch_target(name, item['host'], item['port'], item['interval'], item['timeout'])
+            changes.append(f"+{name}")
+        return changes
+
+    def serve_metrics(self, port=9108, host='127.0.0.1'):
+        """Открывает адрес /metrics в формате OpenMetrics"""
+        if self.metrics_server is None:
+            self.metrics_server = MetricsServer(self.metrics, host, port).start()
+        return self.metrics_server
+
+    def stop(self):
+        self.is_monitoring = False
+        self.probes.stop()
+        if self.profiler.active:
+            self.profiler.stop()
+        self.ping_fallback.close()
+        if self._targets is not None:
+            self._targets.stop()
+        self.http_probe.close()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        self.alerts.close()
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._writes.put(None)
+            writer.join()
+        self.history.flush()
+        self.store.close()
+
+    def record(self, kind, record):
+        """Ставит запись в очередь на сохранение и учет в агрегатах истории"""
+        ts = time.time()
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_records, name='store-writer', daemon=True)
+                self._writer.start()
+        self._writes.put((kind, record, ts))
+
+    def flush_records(self):
+        """Ждет, пока все поставленные в очередь записи будут сохранены"""
+        self._writes.join()
+
+    def _write_records(self):
+        while True:
+            item = self._writes.get()
+            try:
+                if item is None:
+                    return
+                kind, record, ts = item
+                with self.profiler.stage('store'):
+                    self.store.append(kind, record, ts)
+                    self.history.record(kind, record, ts)
+            except Exception as e:
+                self.log("Ошибка сохранения результатов: {}", "error", str(e))
+            finally:
+                self._writes.task_done()
+
+    def poll_profiler(self):
+        """Включает или выключает профилирование по файлу-флагу"""
+        change = self.profiler.poll_trigger()
+        if change == 'started':
+            self.log("Профилирование включено", "warning")
+        elif change == 'stopped':
+            self.log(f"Профилирование выключено, отчет сохранен в {self.profiler.output_dir}", "info")
+        return change
+
+    def load_history(self, series, start, end=None, max_points=1000):
+        """Загружает историю ряда в фоновом потоке и публикует событие history"""
+        def load():
+            try:
+                columns = self.history.query(series, start, end, max_points)
+                self.emit('history', series=columns.pop('series'), resolution=columns.pop('resolution'),
+                          columns=columns)
+            except Exception as e:
+                self.log(f"Ошибка загрузки истории: {str(e)}", "error")
+
+        thread = threading.Thread(target=load, daemon=True)
+        thread.start()
+        return thread
+
+    def _handle_alert(self, alert):
+        accepted = self.alerts.dispatch(alert)
+        self.m.alerts.labels(alert.kind, 'sent' if accepted else 'suppressed').inc()
+        if accepted:
+            self.log(alert.message, alert.level)
+            self.emit('alert', alert=alert.to_dict())
+
+    def _alert_failed(self, sink, alert, error):
+        self.log("Не удалось отправить оповещение ({}): {}", "error", type(sink).__name__, str(error))
+
+    def _handle_probe_result(self, result):
+        if not result.ok:
+            self.log(f"Ошибка обновления: {str(result.error)}", "error")
+
+    def check_status(self):
+        """Проверяет соединение и публикует статус"""
+        started = time.perf_counter()
+        online = self.check_internet_connection()
+        elapsed_ms = (time.perf_counter() - started) * 1000 if online else None
+        self.stats.add('connectivity', elapsed_ms)
+        # Длительность проверки — это HTTP-запрос, а не задержка: учитываем только доступность
+        self.detector.observe('internet', elapsed_ms, latency=False)
+        self.m.connectivity_up.set(1 if online else 0)
+        self.m.connectivity_checks.labels('online' if online else 'offline').inc()
+        http = self.last_http
+        if http is not None:
+            self.stats.add('http', http.first_byte_ms if http.ok else None)
+            if http.ok:
+                self.m.http_first_byte.labels(http.url).observe(http.first_byte_ms / 1000)
+        self.emit('status', online=online, http=http.to_dict() if http is not None else None,
+                  outage_since=self.detector.outage_start('internet'),
+                  **self._stats_fields('connectivity'))
+        return online
+
+    def _stats_fields(self, target, window='1m'):
+        """Поля статистики цели для публикации в событии"""
+        summary = self.stats.summary(target, window)
+        fields = {key: summary[key] for key in ('p50', 'p95', 'p99', 'jitter', 'loss_pct')}
+        fields['level'] = latency_level(summary, self.thresholds)
+        return fields
+
+    def sample_traffic(self):
+        """Снимает скорости по интерфейсам и публикует их вместе с суммой"""
+        rates = self.traffic.sample()
+        if not rates:
+            return None
+        total = TrafficSampler.totals(rates)
+        for name, r in rates.items():
+            interface = self.traffic.interfaces[name]
+            for field, delta in zip(COUNTER_FIELDS, interface.deltas):
+                counter = self.m.interface_counters[field].labels(name)
+                if delta:
+                    counter.inc(delta)
+            self.m.interface_rx_rate.labels(name).set(r['rx_bps'])
+            self.m.interface_tx_rate.labels(name).set(r['tx_bps'])
+        self.record('traffic', dict(total, interfaces={
+            name: {'rx_bps': r['rx_bps'], 'tx_bps': r['tx_bps']} for name, r in rates.items()
+        }))
+        self.emit('traffic', interfaces=rates, **total)
+        return total
+
+    def sample_processes(self):
+        """Публикует процессы с наибольшей сетевой активностью"""
+        top = self.processes.sample()
+        self.emit('processes', top=[usage.to_dict() for usage in top],
+                  total_connections=self.processes.total_connections,
+                  sweep_ms=self.processes.sweep_seconds * 1000)
+        return top
+
+    def check_internet_connection(self):
+        """Проверяет интернет-соединение"""
+        try:
+            # Пробуем разные методы
+            methods = [
+                self.check_http,
+                lambda: self.ping_fallback.probe('8.8.8.8').ok,
+                lambda: self.ping_fallback.probe('1.1.1.1').ok,
+            ]
+
+            for method in methods:
+                try:
+                    if method():
+                        return True
+                except Exception:
+                    continue
+
+            return False
+        except Exception:
+            return False
+
+    def check_http(self):
+        """Легкая HTTP-проверка через постоянное соединение"""
+        self.last_http = self.http_probe.check_any()
+        return self.last_http.ok
+
+    def start_ping_monitoring(self):
+        """Включает периодический замер задержки"""
+        self.is_monitoring = True
+        if self.ping_method == 'subprocess':
+            # Один процесс ping на все время мониторинга, замеры приходят по мере вывода
+            self.ping_fallback.watch(self.ping_target, on_sample=self.publish_ping, on_exit=self._ping_exited)
+        else:
+            self.probes.add_job('ping', self.measure_ping, self.ping_interval)
+        self.log("Мониторинг ping запущен", "success")
+
+    def stop_ping_monitoring(self):
+        self.is_monitoring = False
+        self.probes.remove_job('ping')
+        self.ping_fallback.unwatch(self.ping_target)
+        self.log("Мониторинг ping остановлен", "warning")
+
+    def _ping_exited(self, host, returncode, reason, delay):
+        self.log("Процесс ping для {} завершился (код {}): {}; перезапуск через {:g} с", "error",
+                 host, returncode, reason or "без сообщения", delay)
+
+    def measure_ping(self):
+        """Замеряет задержку до основной цели и публикует результат"""
+        try:
+            sample = self.latency.probe(self.ping_target)
+        except Exception as e:
+            self.emit('ping', target=self.ping_target, rtt_ms=None, status='error', error=str(e))
+            return None
+        return self.publish_ping(sample)
+
+    def publish_ping(self, sample):
+        """Учитывает замер задержки до основной цели и публикует его"""
+        self.record('ping', {'target': sample.host, 'method': sample.method, 'rtt_ms': sample.rtt_ms})
+        self.stats.add(self.ping_target, sample.rtt_ms)
+        self.m.observe_probe(self.ping_target, sample.rtt_ms)
+        self.detector.observe(self.ping_target, sample.rtt_ms)
+        # Цвет определяется статистикой окна, а не единичным замером
+        stats = self._stats_fields(self.ping_target)
+        if sample.ok:
+            self.emit('ping', target=sample.host, method=sample.method, rtt_ms=sample.rtt_ms,
+                      status='ok', **stats)
+        else:
+            self.emit('ping', target=sample.host, method=sample.method, rtt_ms=None,
+                      status='timeout', error=str(sample.error), **stats)
+        return sample.rtt_ms
+
+    def watch_target(self, key, host, port=443, interval=5.0, timeout=2.0):
+        """Добавляет цель в многоцелевой мониторинг (асинхронный планировщик)"""
+        self.targets.add_target(key, host, port, interval, timeout)
+        if not self._targets_started:
+            self._targets_started = True
+            self.targets.start()
+            self.probes.add_job('targets', self.publish_targets_summary, self.status_interval)
+
+    def unwatch_target(self, key):
+        self.targets.remove_target(key)
+        self.stats.remove(key)
+        self.detector.remove(key)
+        self.m.probe_rtt.remove(key)
+        self.m.probes.remove(key, 'ok')
+        self.m.probes.remove(key, 'lost')
+
+    def _handle_target_result(self, target, rtt_ms, error):
+        self.stats.add(target.key, rtt_ms)
+        self.m.observe_probe(target.key, rtt_ms)
+        self.detector.observe(target.key, rtt_ms)
+        self.record('ping', {'target': target.key, 'method': 'tcp', 'rtt_ms': rtt_ms})
+
+    def publish_targets_summary(self):
+        """Публикует сводку по всем целям многоцелевого мониторинга"""
+        summary = self.targets.summary()
+        self.emit('targets', **summary)
+        return summary
+
+    def run_diagnostics(self):
+        """Запускает диагностику в фоновом потоке"""
+        thread = threading.Thread(target=self.diagnose, daemon=True)
+        thread.start()
+        return thread
+
+    def diagnose(self):
+        """Полная диагностика сети по списку серверов"""
+        self.emit('diagnostics_started')
+        self.log("Запуск полной диагностики сети...", "info")
+        try:
+            targets = self.diagnostics_targets
+            if targets is None:
+                targets = diagnostics.load_targets(os.path.join(self.data_dir, 'diagnostics_targets.json'),
+                                                   on_error=lambda message: self.log(message, "error"))
+            # Имена разрешаются заранее через кэш, время DNS замеряется отдельно
+            probe_many = diagnostics.latency_batch_probe(self.latency, resolve=self.dns.resolve)
+            with self.profiler.stage('diagnostics.probes'):
+                # Пакеты по 200 серверов проверяются одновременно: время диагностики
+                # не больше самой долгой проверки, и на сервер не нужен свой поток
+                report = diagnostics.run_diagnostics(targets, probe_many=probe_many,
+                                                     on_result=self._publish_diagnostic_result)
+            with self.profiler.stage('diagnostics.dns'):
+                self.probe_dns()
+
+            # Заключение строится по доступности серверов за последние 5 минут. Ключи
+            # diag: отделены от целей ping, чтобы не смешивать замеры в их статистике
+            keys = {f'diag:{address}' for _, address in targets}
+            for key in self._diagnostic_keys - keys:
+                self.stats.remove(key)
+            self._diagnostic_keys = keys
+            for result in report.results:
+                self.stats.add(f'diag:{result.address}', result.rtt_ms)
+                self.record('diagnostic', {'target': result.address, 'name': result.name,
+                                           'rtt_ms': result.rtt_ms})
+            available = sum(1 for _, address in targets
+                            if self.stats.summary(f'diag:{address}', '5m')['loss_pct'] < 50)
+            conclusion, level = diagnostics.conclude(available / len(targets) * 100 if targets else 0)
+            self.m.diagnostics_runs.inc()
+            self.m.diagnostics_success.set(report.success_rate / 100)
+
+            self.log(f"Диагностика завершена: {report.working}/{report.total} серверов доступно",
+                     report.level)
+            self.log(f"Заключение: {conclusion}", level)
+            self.record('diagnostics', {
+                'working': report.working,
+                'total': report.total,
+                'success_rate': report.success_rate,
+                'results': {r.name: r.rtt_ms for r in report.results}
+            })
+            self.emit('diagnostics', working=report.working, total=report.total,
+                      success_rate=report.success_rate, conclusion=conclusion, level=level)
+            return report
+        except Exception as e:
+            self.log(f"Ошибка диагностики: {str(e)}", "error")
+        finally:
+            self.emit('diagnostics_finished')
+
+    def _publish_diagnostic_result(self, result):
+        if result.ok:
+            self.log("{}: {:.0f} мс ✓", "success", result.name, result.rtt_ms)
+        elif isinstance(result.error, TimeoutError):
+            self.log("{}: Таймаут ✗", "error", result.name)
+        else:
+            self.log("{}: Ошибка ✗", "error", result.name)
+        self.emit('diagnostic', name=result.name, address=result.address, rtt_ms=result.rtt_ms,
+                  error=None if result.ok else str(result.error))
+
+    def probe_dns(self, name=DEFAULT_PROBE_NAME):
+        """Замеряет время разрешения имени каждым резолвером и публикует событие dns"""
+        results = self.dns.probe(name)
+        published = []
+        for result in results:
+            key = f'dns:{result.server}'
+            self.stats.add(key, result.warm.rtt_ms)
+            for cache, timing in (('cold', result.cold), ('warm', result.warm)):
+                self.m.dns_queries.labels(result.server, 'ok' if timing.ok else 'error').inc()
+                if timing.ok:
+                    self.m.dns_lookup.labels(result.server, cache).observe(timing.rtt_ms / 1000)
+            failure_ratio = self.stats.summary(key, '5m')['loss_pct'] / 100
+            self.m.dns_failure.labels(result.server).set(failure_ratio)
+            record = result.to_dict()
+            self.record('dns', dict(record, target=result.server, name=name))
+            published.append(dict(record, failure_ratio=failure_ratio))
+            if result.ok:
+                self.log("DNS {}: {:.0f} мс, без кэша {} ✓", "success", result.server, result.warm.rtt_ms,
+                         f"{result.cold.rtt_ms:.0f} мс" if result.cold.ok else "нет ответа")
+            else:
+                self.log("DNS {}: {} ✗", "error", result.server, str(result.warm.error))
+        self.emit('dns', name=name, results=published)
+        return results
+
+    def run_speed_test(self):
+        """Запускает тест скорости в фоновом потоке"""
+        thread = threading.Thread(target=self.speed_test, daemon=True)
+        thread.start()
+        return thread
+
+    def speed_test(self):
+        """Тест скорости через выбранный способ измерения (speedtest-cli или HTTP)"""
+        backend = self.throughput_backend
+        if backend is None:
+            self.emit('speedtest_failed', error="speedtest-cli не установлен")
+            return None
+        if not self._speed_test_lock.acquire(blocking=False):
+            return None
+
+        self.emit('speedtest_started')
+        try:
+            self.log("Запуск теста скорости...", "info")
+            self.log("Выбор лучшего сервера...", "info")
+            with self.profiler.stage('speedtest.prepare'):
+                server = backend.prepare()
+            self.log(f"Сервер: {server}", "success")
+
+            self.log("Измерение скорости скачивания...", "info")
+            with self.profiler.stage('speedtest.download'):
+                download = backend.download()
+            download_speed = download.mbps
+            self.emit('speedtest_download', mbps=download_speed, level=download_level(download_speed, self.thresholds))
+
+            self.log("Измерение скорости отправки...", "info")
+            with self.profiler.stage('speedtest.upload'):
+                upload = backend.upload()
+            upload_speed = upload.mbps
+            self.emit('speedtest_upload', mbps=upload_speed, level=upload_level(upload_speed, self.thresholds))
+
+            ping = backend.ping()
+            # Если задержка уже отслеживается, оцениваем по медиане окна, а не по одному замеру
+            summary = self.stats.summary(self.ping_target, '5m')
+            typical_ping = summary['p50'] if summary and summary['p50'] is not None else ping
+            overall = overall_quality(download_speed, upload_speed, typical_ping, self.thresholds)
+
+            self.log(f"Тест завершен! Общая оценка: {overall}", "success")
+            self.log(f"Результаты: ↓{download_speed:.1f} Мбит/с ↑{upload_speed:.1f} Мбит/с Ping:{ping:.0f}мс",
+                     "success")
+            self.m.speedtest_download.set(download_speed * 1_000_000)
+            self.m.speedtest_upload.set(upload_speed * 1_000_000)
+            self.m.speedtest_ping.set(ping / 1000)
+            self.m.speedtest_runs.labels('ok').inc()
+            self.detector.observe_throughput('download', download_speed)
+            self.detector.observe_throughput('upload', upload_speed)
+            self.emit('speedtest', download=download_speed, upload=upload_speed, ping=ping,
+                      quality=overall, ping_level='success' if ping < self.thresholds['ping_good_ms'] else 'warning')
+
+            # Сохраняем результаты
+            self.save_test_result(download_speed, upload_speed, ping, overall, details={
+                'backend': backend.name,
+                'download_detail': download.to_dict(),
+                'upload_detail': upload.to_dict(),
+            })
+            return download_speed, upload_speed, ping
+
+        except Exception as e:
+            error_msg = str(e)
+            backend.invalidate()
+            self.m.speedtest_runs.labels('error').inc()
+            self.log(f"Ошибка теста скорости: {error_msg}", "error")
+            self.emit('speedtest_failed', error=error_msg)
+        finally:
+            self.emit('speedtest_finished')
+            self._speed_test_lock.release()
+
+    def save_test_result(self, download, upload, ping, quality, details=None):
+        """Сохраняет результаты теста"""
+        try:
+            record = {
+                'timestamp': datetime.now().isoformat(),
+                'download': download,
+                'upload': upload,
+                'ping': ping,
+                'quality': quality
+            }
+            record.update(details or {})
+            self.record('speedtest', record)
+            self.flush_records()
+            self.store.flush()
+
+            self.log(f"Результаты сохранены", "success")
+
+        except Exception as e:
+            self.log(f"Ошибка сохранения: {str(e)}", "error")
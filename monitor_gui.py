@@ -0,0 +1,416 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+import os
+from collections import deque
+from datetime import datetime
+
+from alert_sinks import DesktopSink
+from event_log import EventLog
+from monitor_engine import NetworkMonitorEngine
+from ui_bus import UIUpdateBus
+
+# Частота применения накопленных обновлений к виджетам
+FRAME_RATE = 15
+# Сколько последних строк журнала показывать в окне
+LOG_DISPLAY_LINES = 500
+
+
+class ModernNetworkMonitor:
+    def __init__(self, root, engine=None):
+        self.root = root
+        self.root.title("🌐 Network Pulse Pro")
+        self.root.geometry("1000x700")
+        self.root.configure(bg='#1e1e1e')
+
+        # Центрируем окно
+        self.center_window()
+
+        # Иконку ищем после первой отрисовки окна
+        self.root.after_idle(self.set_window_icon)
+
+        # Цветовая схема
+        self.colors = {
+            'bg': '#1e1e1e',
+            'card_bg': '#2d2d2d',
+            'accent': '#00ff88',
+            'accent_hover': '#00cc6a',
+            'text_primary': '#ffffff',
+            'text_secondary': '#b0b0b0',
+            'success': '#00ff88',
+            'warning': '#ffaa00',
+            'error': '#ff4444',
+            'online': '#00ff88',
+            'offline': '#ff4444'
+        }
+
+        # Вся работа с сетью выполняется движком вне главного потока,
+        # а виджеты обновляются только из главного цикла через шину
+        self.engine = engine or NetworkMonitorEngine(alert_sinks=[DesktopSink()])
+        self.bus = UIUpdateBus()
+        self.engine.subscribe(self.bus.publish)
+
+        # Журнал хранит ограниченную историю, полная уходит в файл
+        self.event_log = EventLog(spill_path=os.path.join(self.engine.data_dir, 'logs', 'events.log'))
+        self._pending_log = deque(maxlen=LOG_DISPLAY_LINES)
+        self._log_lines = 0
+        self.history_view = None
+
+        self.setup_styles()
+        self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def center_window(self):
+        """Центрирует окно на экране"""
+        # Размер окна задан заранее, поэтому ждать отрисовки не нужно
+        width = 1000
+        height = 700
+        x = (self.root.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.root.winfo_screenheight() // 2) - (height // 2)
+        self.root.geometry(f'{width}x{height}+{x}+{y}')
+
+    def set_window_icon(self):
+        """Устанавливает иконку окна"""
+        icon_paths = [
+            'network_icon.ico',
+            os.path.join(os.path.dirname(__file__), 'network_icon.ico'),
+            'icon.ico'
+        ]
+
+        for icon_path in icon_paths:
+            try:
+                if os.path.exists(icon_path):
+                    self.root.iconbitmap(icon_path)
+                    return
+            except:
+                continue
+
+    def setup_styles(self):
+        """Настраиваем стили для темной темы"""
+        style = ttk.Style()
+        style.theme_use('clam')
+
+        # Настраиваем цвета для виджетов
+        style.configure('TFrame', background=self.colors['bg'])
+        style.configure('TLabel', background=self.colors['bg'], foreground=self.colors['text_primary'])
+        style.configure('TButton', background=self.colors['accent'], foreground='black')
+        style.map('TButton', background=[('active', self.colors['accent_hover'])])
+
+    def setup_ui(self):
+        # Главный контейнер
+        main_frame = ttk.Frame(self.root)
+        main_frame.pack(fill='both', expand=True, padx=20, pady=20)
+
+        # Заголовок
+        header_frame = ttk.Frame(main_frame)
+        header_frame.pack(fill='x', pady=(0, 20))
+
+        title_label = tk.Label(header_frame, text="🌐 NETWORK PULSE PRO",
+                               font=('Arial', 24, 'bold'),
+                               bg=self.colors['bg'],
+                               fg=self.colors['accent'])
+        title_label.pack(side='left')
+
+        subtitle_label = tk.Label(header_frame, text="Монитор интернет-соединения",
+                                  font=('Arial', 12),
+                                  bg=self.colors['bg'],
+                                  fg=self.colors['text_secondary'])
+        subtitle_label.pack(side='left', padx=(10, 0))
+
+        # Карточка статуса
+        self.status_card = self.create_card(main_frame, "📊 ТЕКУЩИЙ СТАТУС")
+
+        # Статус соединения
+        status_frame = tk.Frame(self.status_card, bg=self.colors['card_bg'])
+        status_frame.pack(fill='x', pady=10)
+
+        self.status_indicator = tk.Label(status_frame, text="●", font=('Arial', 24),
+                                         bg=self.colors['card_bg'], fg=self.colors['warning'])
+        self.status_indicator.pack(side='left', padx=(0, 10))
+
+        self.status_label = tk.Label(status_frame, text="Проверка соединения...",
+                                     font=('Arial', 14, 'bold'),
+                                     bg=self.colors['card_bg'],
+                                     fg=self.colors['text_primary'])
+        self.status_label.pack(side='left')
+
+        # Метрики в сетке
+        metrics_frame = tk.Frame(self.status_card, bg=self.colors['card_bg'])
+        metrics_frame.pack(fill='x', pady=20)
+
+        # Задержка
+        self.ping_widget = self.create_metric(metrics_frame, "⏱️ ЗАДЕРЖКА", "-- мс", 0)
+
+        # Скорость загрузки
+        self.download_widget = self.create_metric(metrics_frame, "⬇️ СКАЧИВАНИЕ", "-- Мбит/с", 1)
+
+        # Скорость отдачи
+        self.upload_widget = self.create_metric(metrics_frame, "⬆️ ОТПРАВКА", "-- Мбит/с", 2)
+
+        # Использование трафика
+        self.usage_widget = self.create_metric(metrics_frame, "📊 ТРАФИК", "-- Мбит/с", 3)
+
+        # Процессы с наибольшей сетевой активностью
+        self.processes_label = tk.Label(self.status_card, text="🔝 Процессы: сбор данных...",
+                                        font=('Consolas', 9), justify='left', anchor='w',
+                                        bg=self.colors['card_bg'], fg=self.colors['text_secondary'])
+        self.processes_label.pack(fill='x', padx=15, pady=(0, 10))
+
+        # Кнопки действий
+        buttons_frame = tk.Frame(main_frame, bg=self.colors['bg'])
+        buttons_frame.pack(fill='x', pady=20)
+
+        self.monitor_btn = self.create_modern_button(buttons_frame, "🎯 НАЧАТЬ МОНИТОРИНГ",
+                                                     self.toggle_monitoring, 0)
+
+        self.speed_btn = self.create_modern_button(buttons_frame, "🚀 ТЕСТ СКОРОСТИ",
+                                                   self.run_speed_test, 1)
+
+        self.diagnose_btn = self.create_modern_button(buttons_frame, "🔧 ДИАГНОСТИКА",
+                                                      self.run_diagnostics, 2)
+
+        self.history_btn = self.create_modern_button(buttons_frame, "📈 ИСТОРИЯ",
+                                                     self.open_history, 3)
+
+        # Предупреждение если тест скорости недоступен
+        if self.engine.throughput_backend is None:
+            warning_frame = tk.Frame(main_frame, bg=self.colors['bg'])
+            warning_frame.pack(fill='x', pady=5)
+            warning_label = tk.Label(warning_frame,
+                                     text="⚠️ Тест скорости недоступен. Установите: pip install speedtest-cli",
+                                     font=('Arial', 10), bg=self.colors['bg'], fg=self.colors['warning'])
+            warning_label.pack()
+
+        # Журнал событий
+        log_card = self.create_card(main_frame, "📝 ЖУРНАЛ СОБЫТИЙ")
+
+        # Создаем текстовое поле с прокруткой
+        log_frame = tk.Frame(log_card, bg=self.colors['card_bg'])
+        log_frame.pack(fill='both', expand=True)
+
+        self.log_text = tk.Text(log_frame, height=10, bg='#1a1a1a', fg=self.colors['text_primary'],
+                                font=('Consolas', 10), insertbackground=self.colors['text_primary'],
+                                relief='flat', borderwidth=0)
+
+        scrollbar = ttk.Scrollbar(log_frame, command=self.log_text.yview)
+        self.log_text.configure(yscrollcommand=scrollbar.set)
+
+        self.log_text.pack(side='left', fill='both', expand=True, padx=(0, 5))
+        scrollbar.pack(side='right', fill='y')
+
+        # Цвета уровней настраиваются один раз
+        self.log_text.tag_config('timestamp', foreground=self.colors['text_secondary'])
+        self.log_text.tag_config('success', foreground=self.colors['success'])
+        self.log_text.tag_config('error', foreground=self.colors['error'])
+        self.log_text.tag_config('warning', foreground=self.colors['warning'])
+        self.log_text.tag_config('info', foreground=self.colors['text_secondary'])
+
+        # Запускаем фоновую проверку статуса
+        # Окно показывается сразу, проверки запускаются после первого кадра
+        self.render_frame()
+        self.root.after_idle(self.engine.start)
+        self.log_message("✅ Программа запущена", "success")
+
+    def create_card(self, parent, title):
+        """Создает карточку с заголовком"""
+        card = tk.Frame(parent, bg=self.colors['card_bg'], relief='raised', bd=1)
+        card.pack(fill='x', pady=10)
+
+        # Заголовок карточки
+        title_label = tk.Label(card, text=title, font=('Arial', 12, 'bold'),
+                               bg=self.colors['card_bg'], fg=self.colors['accent'])
+        title_label.pack(anchor='w', padx=15, pady=10)
+
+        return card
+
+    def create_metric(self, parent, title, value, column):
+        """Создает виджет метрики"""
+        frame = tk.Frame(parent, bg=self.colors['card_bg'])
+        frame.grid(row=0, column=column, padx=20, sticky='w')
+
+        title_label = tk.Label(frame, text=title, font=('Arial', 10),
+                               bg=self.colors['card_bg'], fg=self.colors['text_secondary'])
+        title_label.pack(anchor='w')
+
+        value_label = tk.Label(frame, text=value, font=('Arial', 16, 'bold'),
+                               bg=self.colors['card_bg'], fg=self.colors['text_primary'])
+        value_label.pack(anchor='w')
+
+        return value_label
+
+    def create_modern_button(self, parent, text, command, column):
+        """Создает современную кнопку"""
+        btn = tk.Button(parent, text=text, command=command,
+                        bg=self.colors['accent'], fg='black',
+                        font=('Arial', 11, 'bold'),
+                        relief='flat', bd=0,
+                        padx=20, pady=12,
+                        cursor='hand2')
+        btn.grid(row=0, column=column, padx=10)
+
+        # Эффект при наведении
+        def on_enter(e):
+            btn['bg'] = self.colors['accent_hover']
+
+        def on_leave(e):
+            btn['bg'] = self.colors['accent']
+
+        btn.bind("<Enter>", on_enter)
+        btn.bind("<Leave>", on_leave)
+
+        return btn
+
+    def log_message(self, message, type="info", args=()):
+        """Добавляет сообщение в журнал. На экран оно попадет в ближайшем кадре"""
+        slot = self.event_log.append(message, type, args)
+        self._pending_log.append(self.event_log.format(slot))
+
+    def flush_log(self):
+        """Выводит накопленные сообщения и оставляет на экране только последние строки"""
+        if not self._pending_log:
+            return
+
+        # Сохраняем текущее состояние
+        self.log_text.config(state='normal')
+
+        while self._pending_log:
+            ts, level, text = self._pending_log.popleft()
+            timestamp = datetime.fromtimestamp(ts).strftime("%H:%M:%S")
+            self.log_text.insert('end', f"[{timestamp}] ", 'timestamp', f"{text}\n", level)
+            self._log_lines += 1
+
+        # Удаляем строки, вышедшие за пределы окна
+        excess = self._log_lines - LOG_DISPLAY_LINES
+        if excess > 0:
+            self.log_text.delete('1.0', f'{excess + 1}.0')
+            self._log_lines -= excess
+
+        # Прокручиваем вниз
+        self.log_text.see('end')
+        self.log_text.config(state='disabled')
+
+    def render_frame(self):
+        """Применяет накопленные события к виджетам с фиксированной частотой кадров"""
+        with self.engine.profiler.stage('ui.frame'):
+            ordered, latest = self.bus.drain(max_ordered=500)
+            for event in ordered:
+                self.apply_event(event)
+            for event in latest:
+                self.apply_event(event)
+            self.flush_log()
+        self.root.after(1000 // FRAME_RATE, self.render_frame)
+
+    def apply_event(self, event):
+        handler = getattr(self, f"on_{event.kind}", None)
+        if handler is not None:
+            handler(**event.data)
+
+    def on_log(self, message, level, args=()):
+        self.log_message(message, level, args)
+
+    def on_status(self, online, outage_since=None, **_):
+        """Обновляет информацию о сети"""
+        if online:
+            self.status_indicator.config(fg=self.colors['online'])
+            self.status_label.config(text="СОЕДИНЕНИЕ АКТИВНО ✓", fg=self.colors['online'])
+        else:
+            text = "НЕТ СОЕДИНЕНИЯ ✗"
+            if outage_since is not None:
+                text += f" с {datetime.fromtimestamp(outage_since).strftime('%H:%M:%S')}"
+            self.status_indicator.config(fg=self.colors['offline'])
+            self.status_label.config(text=text, fg=self.colors['offline'])
+
+    def on_traffic(self, rx_bps, tx_bps, **_):
+        """Обновляет текущую скорость трафика по всем интерфейсам"""
+        self.usage_widget.config(text=f"↓{rx_bps / 1_000_000:.1f} ↑{tx_bps / 1_000_000:.1f} Мбит/с")
+
+    def on_processes(self, top, total_connections, **_):
+        """Обновляет список самых активных процессов"""
+        lines = [f"🔝 Процессы (соединений всего: {total_connections})"]
+        for usage in top:
+            line = f"{usage['name'][:24]:<24} {usage['connections']:>4} соед."
+            if usage['read_bps'] is not None:
+                line += f"  ↓{usage['read_bps'] / 1_000_000:.1f} ↑{usage['write_bps'] / 1_000_000:.1f} Мбит/с"
+            if usage['remotes']:
+                line += f"  → {', '.join(usage['remotes'])}"
+            lines.append(line)
+        self.processes_label.config(text="\n".join(lines))
+
+    def on_ping(self, status, rtt_ms, level=None, **_):
+        if status == 'ok':
+            self.ping_widget.config(text=f"{rtt_ms:.0f} мс", fg=self.colors[level])
+        elif status == 'timeout':
+            self.ping_widget.config(text="ТАЙМАУТ", fg=self.colors['error'])
+        else:
+            self.ping_widget.config(text="ОШИБКА", fg=self.colors['error'])
+
+    def on_speedtest_started(self):
+        self.speed_btn.config(state='disabled', text="📊 ТЕСТИРУЕМ...")
+        # Сбрасываем показатели
+        self.download_widget.config(text="...", fg=self.colors['warning'])
+        self.upload_widget.config(text="...", fg=self.colors['warning'])
+
+    def on_speedtest_download(self, mbps, level):
+        self.download_widget.config(text=f"{mbps:.1f} Мбит/с", fg=self.colors[level])
+
+    def on_speedtest_upload(self, mbps, level):
+        self.upload_widget.config(text=f"{mbps:.1f} Мбит/с", fg=self.colors[level])
+
+    def on_speedtest(self, ping, ping_level, **_):
+        self.ping_widget.config(text=f"{ping:.0f} мс", fg=self.colors[ping_level])
+
+    def on_speedtest_failed(self, error):
+        self.download_widget.config(text="ОШИБКА", fg=self.colors['error'])
+        self.upload_widget.config(text="ОШИБКА", fg=self.colors['error'])
+        messagebox.showerror("Ошибка", f"Не удалось выполнить тест скорости:\n{error}")
+
+    def on_speedtest_finished(self):
+        self.speed_btn.config(state='normal', text="🚀 ТЕСТ СКОРОСТИ")
+
+    def on_diagnostics_started(self):
+        self.diagnose_btn.config(state='disabled', text="🔍 ПРОВЕРЯЕМ...")
+
+    def on_diagnostics_finished(self):
+        self.diagnose_btn.config(state='normal', text="🔧 ДИАГНОСТИКА")
+
+    def on_history(self, series, resolution, columns):
+        if self.history_view is not None and self.history_view.window is not None:
+            self.history_view.show(dict(columns, series=series, resolution=resolution))
+
+    def open_history(self):
+        """Открывает окно истории измерений"""
+        if self.history_view is not None and self.history_view.window is not None:
+            self.history_view.window.lift()
+            return
+        from history_view import HistoryView
+        self.history_view = HistoryView(self.root, self.engine, self.colors)
+
+    def on_close(self):
+        """Останавливает фоновые проверки и закрывает окно"""
+        self.engine.stop()
+        self.event_log.close()
+        self.root.destroy()
+
+    def toggle_monitoring(self):
+        """Включает/выключает мониторинг ping"""
+        if not self.engine.is_monitoring:
+            self.monitor_btn.config(text="⏸️ ОСТАНОВИТЬ", bg=self.colors['error'])
+            self.engine.start_ping_monitoring()
+        else:
+            self.monitor_btn.config(text="🎯 НАЧАТЬ МОНИТОРИНГ", bg=self.colors['accent'])
+            self.engine.stop_ping_monitoring()
+
+    def run_speed_test(self):
+        """Запускает тест скорости интернета"""
+        if self.engine.throughput_backend is None:
+            messagebox.showerror("Ошибка",
+                                 "speedtest-cli не установлен!\n\n"
+                                 "Установите командой:\n"
+                                 "pip install speedtest-cli\n\n"
+                                 "Или запустите install.bat для автоматической установки")
+            return
+
+        self.engine.run_speed_test()
+
+    def run_diagnostics(self):
+        """Запускает полную диагностику сети"""
+        self.engine.run_diagnostics()
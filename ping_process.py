@@ -0,0 +1,295 @@
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from latency import LatencySample
+
+# Ответ: "icmp_seq=1 ttl=117 time=14.2 ms" (Linux, macOS) или "seq=0 ttl=58 time=9.6 ms" (BusyBox)
+_UNIX_REPLY = re.compile(r'(?:icmp_)?seq=(\d+)\s+ttl=(\d+)\s+time[=<]\s*([\d.]+)')
+# Потеря: "no answer yet for icmp_seq=3" (iputils -O) или "Request timeout for icmp_seq 1" (macOS)
+_UNIX_LOSS = re.compile(r'(?:no answer yet for icmp_seq=|Request timeout for icmp_seq )(\d+)')
+# Итог: "6 packets transmitted, 4 received, 33.3% packet loss"
+_UNIX_SUMMARY = re.compile(r'(\d+) packets transmitted, (\d+) (?:packets )?received.*?([\d.]+)% packet loss')
+
+# Windows: "time=15ms TTL=117", "time<1ms", в русской локали "время=14мс"
+_WINDOWS_TIME = re.compile(r'(?:time|время)\s*([=<])\s*([\d.,]+)', re.IGNORECASE)
+_WINDOWS_TTL = re.compile(r'TTL=(\d+)', re.IGNORECASE)
+_WINDOWS_LOSS = ('request timed out', 'превышен интервал ожидания', 'unreachable', 'недоступ',
+                 'general failure', 'transmit failed', 'сбой')
+# Ошибка разбора аргументов: так BusyBox ping отвечает на неизвестный ему ключ -O
+_USAGE_ERROR = re.compile(r'unrecognized option|invalid option|illegal option|usage:', re.IGNORECASE)
+
+_WINDOWS_SUMMARY = re.compile(r'(?:Sent|отправлено)\s*=\s*(\d+),\s*(?:Received|получено)\s*=\s*(\d+)',
+                              re.IGNORECASE)
+
+
+def ping_command(host, count=None, interval=1.0, timeout=2.0, platform=None, report_lost=True):
+    """Аргументы ping для платформы. count=None — непрерывный режим.
+
+    report_lost=False убирает ключ -O, которого нет у BusyBox ping; потери
+    тогда определяются по пропускам в номерах пакетов.
+    """
+    platform = platform or sys.platform
+    if platform == 'win32':
+        # У Windows ping интервал всегда 1 с, -n — число пакетов, -t — без ограничения
+        args = ['ping', '-w', str(int(timeout * 1000))]
+        args += ['-t'] if count is None else ['-n', str(count)]
+        return args + [host]
+    if platform == 'darwin' or 'bsd' in platform:
+        # -W в миллисекундах на macOS; потери печатаются как "Request timeout"
+        args = ['ping', '-n', '-i', f'{interval:g}', '-W', str(int(timeout * 1000))]
+    else:
+        # iputils: -O печатает неответившие пакеты, -W — таймаут в секундах
+        args = ['ping', '-n'] + (['-O'] if report_lost else [])
+        args += ['-i', f'{interval:g}', '-W', str(max(1, round(timeout)))]
+    if count is not None:
+        args += ['-c', str(count)]
+    return args + [host]
+
+
+def output_encoding(platform=None):
+    """Кодировка вывода ping: на Windows — OEM-кодировка консоли"""
+    return 'oem' if (platform or sys.platform) == 'win32' else 'utf-8'
+
+
+class PingSummary:
+    __slots__ = ('sent', 'received', 'loss_pct')
+
+    def __init__(self, sent, received, loss_pct=None):
+        self.sent = sent
+        self.received = received
+        self.loss_pct = loss_pct if loss_pct is not None else (
+            (sent - received) * 100 / sent if sent else 0.0)
+
+
+class PingOutputParser:
+    """Разбирает вывод ping построчно в замеры с RTT, TTL и потерями.
+
+    Пропуски в номерах пакетов (если ping не сообщает о потерях сам)
+    засчитываются как потери. У Windows номеров нет, пакеты нумеруются по
+    порядку строк.
+    """
+
+    def __init__(self, host, platform=None):
+        self.host = host
+        self.windows = (platform or sys.platform) == 'win32'
+        self.next_seq = None
+        self.summary = None
+
+    def feed(self, line):
+        """Возвращает список замеров (LatencySample) для строки вывода"""
+        if self.windows:
+            return self._feed_windows(line)
+
+        match = _UNIX_REPLY.search(line)
+        if match:
+            seq = int(match.group(1))
+            return self._at(seq, ok=True, ttl=int(match.group(2)), rtt_ms=float(match.group(3)))
+        match = _UNIX_LOSS.search(line)
+        if match:
+            return self._at(int(match.group(1)), ok=False)
+        match = _UNIX_SUMMARY.search(line)
+        if match:
+            self.summary = PingSummary(int(match.group(1)), int(match.group(2)), float(match.group(3)))
+        return []
+
+    def _feed_windows(self, line):
+        lowered = line.strip().lower()
+        if not lowered:
+            return []
+        time_match = _WINDOWS_TIME.search(line)
+        ttl_match = _WINDOWS_TTL.search(line)
+        if time_match and ttl_match:
+            rtt_ms = float(time_match.group(2).replace(',', '.'))
+            if time_match.group(1) == '<':
+                # "time<1ms": точнее Windows не сообщает
+                rtt_ms /= 2
+            return self._at(self._next(), ok=True, ttl=int(ttl_match.group(1)), rtt_ms=rtt_ms)
+        if any(marker in lowered for marker in _WINDOWS_LOSS):
+            return self._at(self._next(), ok=False)
+        match = _WINDOWS_SUMMARY.search(line)
+        if match:
+            self.summary = PingSummary(int(match.group(1)), int(match.group(2)))
+        return []
+
+    def _next(self):
+        return 0 if self.next_seq is None else self.next_seq
+
+    def _at(self, seq, ok, ttl=None, rtt_ms=None):
+        if self.next_seq is not None and seq < self.next_seq:
+            # Опоздавший ответ на пакет, уже засчитанный потерянным
+            return []
+        samples = []
+        if self.next_seq is not None:
+            for missing in range(self.next_seq, seq):
+                samples.append(self._sample(missing, None, None))
+        samples.append(self._sample(seq, ttl, rtt_ms if ok else None))
+        self.next_seq = seq + 1
+        return samples
+
+    def _sample(self, seq, ttl, rtt_ms):
+        error = None if rtt_ms is not None else TimeoutError(f"icmp_seq {seq} lost")
+        return LatencySample(self.host, None, 'ping', rtt_ms=rtt_ms, error=error, ttl=ttl)
+
+
+class PingProcess:
+    """Долгоживущий процесс ping для одной цели с разбором вывода на лету.
+
+    Если ping завершился сам (цель не разрешилась, пропала сеть), из потока
+    чтения вызывается on_exit(процесс, код возврата).
+    """
+
+    def __init__(self, host, interval=1.0, timeout=2.0, on_sample=None, history=64,
+                 popen=subprocess.Popen, platform=None, report_lost=True, on_exit=None):
+        self.host = host
+        self.on_sample = on_sample
+        self.on_exit = on_exit
+        self.samples = deque(maxlen=history)
+        self.last_sample_at = None
+        # Последние строки вывода, не похожие на ответы: из них берется причина завершения
+        self.output_tail = deque(maxlen=5)
+        self.stopped = threading.Event()
+        self._platform = platform or sys.platform
+        self._parser = PingOutputParser(host, self._platform)
+        # stderr объединен с stdout: отдельный канал мог бы переполниться и остановить ping
+        self._process = popen(ping_command(host, None, interval, timeout, self._platform, report_lost),
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                              text=True, encoding=output_encoding(self._platform), errors='replace', bufsize=1)
+        self._thread = threading.Thread(target=self._read, name=f'ping-{host}', daemon=True)
+        self._thread.start()
+
+    @property
+    def alive(self):
+        return self._process.poll() is None
+
+    @property
+    def usage_error(self):
+        """ping отверг аргументы, не отправив ни одного пакета"""
+        return not self.samples and any(_USAGE_ERROR.search(line) for line in self.output_tail)
+
+    def _read(self):
+        for line in self._process.stdout:
+            samples = self._parser.feed(line)
+            if not samples and line.strip():
+                self.output_tail.append(line.strip())
+            for sample in samples:
+                self.samples.append(sample)
+                self.last_sample_at = time.monotonic()
+                if self.on_sample is not None:
+                    self.on_sample(sample)
+        returncode = self._process.wait()
+        if not self.stopped.is_set() and self.on_exit is not None:
+            self.on_exit(self, returncode)
+
+    def stop(self):
+        self.stopped.set()
+        if self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        self._thread.join(timeout=2)
+
+
+class PingBackend:
+    """Замер задержки системной утилитой ping, когда сокеты недоступны.
+
+    Для отслеживаемых целей держится по одному процессу ping в непрерывном
+    режиме, так что на каждый замер не запускается новый процесс, а RTT
+    берется из вывода ping, а не из времени работы процесса. Разовая
+    проверка отправляет count пакетов одним запуском.
+
+    Завершившийся процесс перезапускается с растущей паузой (1, 2, 4 ...
+    до max_backoff секунд; после процесса, успевшего получить ответы, снова
+    с 1 с). Если ping не принял ключ -O (BusyBox), он сразу запускается без
+    него, и это запоминается для следующих запусков.
+    """
+
+    def __init__(self, interval=1.0, timeout=2.0, popen=subprocess.Popen, run=subprocess.run, platform=None,
+                 max_backoff=60.0):
+        self.interval = interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self._popen = popen
+        self._run = run
+        self._platform = platform or sys.platform
+        self._report_lost = True
+        self._processes = {}
+        self._lock = threading.Lock()
+
+    def watch(self, host, on_sample=None, on_exit=None):
+        """Запускает непрерывный ping цели; замеры передаются в on_sample.
+
+        on_exit(host, код возврата, причина, пауза до перезапуска) сообщает
+        о самопроизвольном завершении ping.
+        """
+        with self._lock:
+            process = self._processes.get(host)
+            if process is None or not process.alive:
+                process = self._processes[host] = self._spawn(host, on_sample, on_exit, 0)
+            return process
+
+    def _spawn(self, host, on_sample, on_exit, failures):
+        def exited(process, returncode):
+            self._restart(process, returncode, on_sample, on_exit, failures)
+
+        return PingProcess(host, self.interval, self.timeout, on_sample, popen=self._popen,
+                           platform=self._platform, report_lost=self._report_lost, on_exit=exited)
+
+    def _restart(self, process, returncode, on_sample, on_exit, failures):
+        host = process.host
+        if process.usage_error and self._report_lost:
+            self._report_lost = False
+            delay = 0
+        else:
+            failures = 0 if process.samples else failures + 1
+            delay = min(self.max_backoff, 2 ** failures)
+        if on_exit is not None:
+            reason = process.output_tail[-1] if process.output_tail else None
+            on_exit(host, returncode, reason, delay)
+        # Ожидание прерывается остановкой процесса (unwatch, close)
+        if process.stopped.wait(delay):
+            return
+        with self._lock:
+            if self._processes.get(host) is process:
+                self._processes[host] = self._spawn(host, on_sample, on_exit, failures)
+
+    def unwatch(self, host):
+        with self._lock:
+            process = self._processes.pop(host, None)
+        if process is not None:
+            process.stop()
+
+    def probe(self, host, count=1):
+        """Последний свежий замер отслеживаемой цели или разовый запуск ping"""
+        process = self._processes.get(host)
+        if process is not None and process.samples and process.last_sample_at is not None \
+                and time.monotonic() - process.last_sample_at < 2 * self.interval + self.timeout:
+            return process.samples[-1]
+
+        completed = self._run_once(host, count)
+        if completed.returncode and self._report_lost and _USAGE_ERROR.search(completed.stdout + completed.stderr):
+            self._report_lost = False
+            completed = self._run_once(host, count)
+        parser = PingOutputParser(host, self._platform)
+        samples = [sample for line in completed.stdout.splitlines() for sample in parser.feed(line)]
+        replies = [sample for sample in samples if sample.ok]
+        if replies:
+            return min(replies, key=lambda sample: sample.rtt_ms)
+        return LatencySample(host, None, 'ping', error=TimeoutError(f"{host}: no reply"))
+
+    def _run_once(self, host, count):
+        return self._run(ping_command(host, count, self.interval, self.timeout, self._platform, self._report_lost),
+                         capture_output=True, text=True, encoding=output_encoding(self._platform),
+                         errors='replace', timeout=count * (self.interval + self.timeout) + 2)
+
+    def close(self):
+        with self._lock:
+            processes = list(self._processes.values())
+            self._processes.clear()
+        for process in processes:
+            process.stop()
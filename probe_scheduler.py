@@ -0,0 +1,179 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ProbeResult:
+    """Результат одной фоновой проверки"""
+    __slots__ = ('name', 'value', 'error', 'started', 'duration')
+
+    def __init__(self, name, value=None, error=None, started=0.0, duration=0.0):
+        self.name = name
+        self.value = value
+        self.error = error
+        self.started = started
+        self.duration = duration
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class _Job:
+    __slots__ = ('name', 'func', 'interval', 'next_run', 'blocking', 'in_flight')
+
+    def __init__(self, name, func, interval, next_run, blocking=False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.next_run = next_run
+        self.blocking = blocking
+        self.in_flight = False
+
+
+class ProbeScheduler:
+    """Планировщик сетевых проверок вне главного потока Tk.
+
+    Проверки выполняются в пуле рабочих потоков, а результаты складываются
+    в потокобезопасную очередь. Главный поток забирает их методом drain(),
+    который никогда не блокируется на сетевом вводе-выводе. Если задан
+    on_result, результаты передаются ему прямо из рабочего потока. Если
+    задан profiler, каждый запуск замеряется как этап с именем проверки.
+
+    Долгие проверки (blocking=True: тест скорости, диагностика, проверка
+    соединения с таймаутами) выполняются в отдельном пуле, поэтому даже
+    зависнув все разом, они не задерживают частые короткие замеры.
+    """
+
+    def __init__(self, max_workers=4, on_result=None, profiler=None, blocking_workers=4):
+        self.results = queue.Queue()
+        self.on_result = on_result
+        self.profiler = profiler
+        self._jobs = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._max_workers = max_workers
+        self._blocking_workers = blocking_workers
+        self._executor = None
+        self._blocking_executor = None
+        self._thread = None
+        self._running = False
+
+    def add_job(self, name, func, interval, run_now=True, blocking=False):
+        """Добавляет (или заменяет) периодическую проверку.
+
+        blocking=True — проверка может надолго занять поток и выполняется
+        в отдельном пуле.
+        """
+        next_run = time.monotonic() + (0 if run_now else interval)
+        with self._lock:
+            job = _Job(name, func, interval, next_run, blocking)
+            self._jobs[name] = job
+            heapq.heappush(self._heap, (next_run, next(self._seq), job))
+        self._wakeup.set()
+
+    def set_interval(self, name, interval):
+        """Меняет интервал проверки, не сбрасывая ее расписание"""
+        now = time.monotonic()
+        with self._lock:
+            job = self._jobs.get(name)
+            if job is None or job.interval == interval:
+                return
+            # Запись меняется на месте, чтобы идущий запуск не дал повторного;
+            # старая запись в куче станет недействительной по сроку
+            job.interval = interval
+            job.next_run = min(job.next_run, now + interval)
+            heapq.heappush(self._heap, (job.next_run, next(self._seq), job))
+        self._wakeup.set()
+
+    def has_job(self, name):
+        return name in self._jobs
+
+    def remove_job(self, name):
+        """Удаляет периодическую проверку"""
+        with self._lock:
+            self._jobs.pop(name, None)
+        self._wakeup.set()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                            thread_name_prefix='probe')
+        self._blocking_executor = ThreadPoolExecutor(max_workers=self._blocking_workers,
+                                                     thread_name_prefix='probe-blocking')
+        self._thread = threading.Thread(target=self._run, name='probe-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+        self._wakeup.set()
+        if self._executor is not None:
+            # Зависшие проверки не должны задерживать закрытие окна
+            self._executor.shutdown(wait=False)
+            self._blocking_executor.shutdown(wait=False)
+
+    def drain(self, handler, max_items=100):
+        """Передает накопленные результаты в handler, не блокируясь. Возвращает их число"""
+        handled = 0
+        while handled < max_items:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            handler(result)
+            handled += 1
+        return handled
+
+    def _run(self):
+        while self._running:
+            timeout = self._dispatch_due()
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def _dispatch_due(self):
+        """Запускает наступившие проверки и возвращает время до следующей"""
+        now = time.monotonic()
+        with self._lock:
+            while self._running and self._heap:
+                next_run, _, job = self._heap[0]
+                if self._jobs.get(job.name) is not job or next_run != job.next_run:
+                    heapq.heappop(self._heap)
+                    continue
+                if next_run > now:
+                    return next_run - now
+                heapq.heappop(self._heap)
+                job.next_run = now + job.interval
+                heapq.heappush(self._heap, (job.next_run, next(self._seq), job))
+                # Если предыдущий запуск еще не завершился, пропускаем тик
+                if not job.in_flight:
+                    job.in_flight = True
+                    executor = self._blocking_executor if job.blocking else self._executor
+                    executor.submit(self._execute, job)
+        return None
+
+    def _execute(self, job):
+        started = time.monotonic()
+        try:
+            if self.profiler is not None:
+                with self.profiler.stage(job.name):
+                    value = job.func()
+            else:
+                value = job.func()
+            result = ProbeResult(job.name, value=value, started=started)
+        except Exception as e:
+            result = ProbeResult(job.name, error=e, started=started)
+        finally:
+            job.in_flight = False
+        result.duration = time.monotonic() - started
+        if self.on_result is not None:
+            self.on_result(result)
+        else:
+            self.results.put(result)
@@ -0,0 +1,173 @@
+import heapq
+import time
+from collections import Counter, namedtuple
+
+_Connection = namedtuple('_Connection', ('pid', 'laddr', 'raddr', 'status'))
+
+
+def _psutil():
+    # psutil загружается при первом замере, а не при импорте
+    import psutil
+    return psutil
+
+
+def _psutil_connections():
+    psutil = _psutil()
+    try:
+        return psutil.net_connections(kind='inet')
+    except psutil.AccessDenied:
+        # macOS без прав администратора: собираем соединения по доступным процессам
+        connections = []
+        for process in psutil.process_iter():
+            try:
+                method = getattr(process, 'net_connections', None) or process.connections
+                connections.extend(_Connection(process.pid, c.laddr, c.raddr, c.status)
+                                   for c in method(kind='inet'))
+            except (psutil.AccessDenied, psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+        return connections
+
+
+def _psutil_process(pid):
+    return _psutil().Process(pid)
+
+
+class ProcessUsage:
+    """Сетевая активность одного процесса за последний замер"""
+    __slots__ = ('pid', 'name', 'connections', 'established', 'listening', 'remotes',
+                 'io_read', 'io_write', 'read_bps', 'write_bps', 'missed')
+
+    def __init__(self, pid, name):
+        self.pid = pid
+        self.name = name
+        self.connections = 0
+        self.established = 0
+        self.listening = 0
+        self.remotes = Counter()
+        self.io_read = None
+        self.io_write = None
+        self.read_bps = None
+        self.write_bps = None
+        # Число замеров подряд без соединений; по нему процесс забывается
+        self.missed = 0
+
+    @property
+    def rate(self):
+        return (self.read_bps or 0.0) + (self.write_bps or 0.0)
+
+    def to_dict(self, remotes=3):
+        return {'pid': self.pid, 'name': self.name, 'connections': self.connections,
+                'established': self.established, 'listening': self.listening,
+                'remotes': [address for address, _ in self.remotes.most_common(remotes)],
+                'read_bps': self.read_bps, 'write_bps': self.write_bps}
+
+
+class ProcessSampler:
+    """Распределение сетевых соединений и ввода-вывода по процессам.
+
+    Соединения берутся из psutil.net_connections и сравниваются с прошлым
+    замером как множества, так что счетчики процессов обновляются только
+    по открывшимся и закрывшимся соединениям. Имя процесса и объект
+    psutil.Process кэшируются по pid и запрашиваются один раз. Для
+    процессов с соединениями снимаются счетчики ввода-вывода (на Linux —
+    rchar/wchar из /proc/<pid>/io), скорость считается по их разности.
+    Эти счетчики учитывают весь ввод-вывод процесса, а не только сеть,
+    поэтому служат оценкой сверху. Соединения без pid (TIME_WAIT, чужие
+    процессы без прав) собираются под pid None.
+    """
+
+    def __init__(self, top=5, connections=None, process=None, clock=time.monotonic, forget_after=3):
+        self.top = top
+        self._read_connections = connections or _psutil_connections
+        self._open_process = process or _psutil_process
+        self._clock = clock
+        self.forget_after = forget_after
+        self._previous = frozenset()
+        self._processes = {}
+        self._handles = {}
+        self._last_time = None
+        self.total_connections = 0
+        self.sweep_seconds = 0.0
+
+    def sample(self):
+        """Снимает соединения и счетчики, возвращает top процессов по активности"""
+        started = time.perf_counter()
+        now = self._clock()
+        current = frozenset(
+            (c.pid, c.laddr, c.raddr, c.status) for c in self._read_connections())
+        for key in self._previous - current:
+            self._apply(key, -1)
+        for key in current - self._previous:
+            self._apply(key, 1)
+        self._previous = current
+        self.total_connections = len(current)
+
+        elapsed = now - self._last_time if self._last_time is not None else 0
+        self._last_time = now
+        for pid, usage in list(self._processes.items()):
+            if usage.connections == 0:
+                usage.missed += 1
+                if usage.missed >= self.forget_after:
+                    self._forget(pid)
+                continue
+            usage.missed = 0
+            if pid is not None:
+                self._update_io(pid, usage, elapsed)
+
+        result = heapq.nlargest(self.top, (u for u in self._processes.values() if u.connections),
+                                key=lambda u: (u.rate, u.established, u.connections))
+        self.sweep_seconds = time.perf_counter() - started
+        return result
+
+    def _apply(self, key, sign):
+        pid, _, raddr, status = key
+        usage = self._processes.get(pid)
+        if usage is None:
+            if sign < 0:
+                return
+            usage = self._processes[pid] = ProcessUsage(pid, self._name(pid))
+        usage.connections += sign
+        if status == 'ESTABLISHED':
+            usage.established += sign
+        elif status == 'LISTEN':
+            usage.listening += sign
+        if raddr:
+            address = raddr[0]
+            usage.remotes[address] += sign
+            if usage.remotes[address] <= 0:
+                del usage.remotes[address]
+
+    def _name(self, pid):
+        if pid is None:
+            return "—"
+        try:
+            handle = self._handles[pid] = self._open_process(pid)
+            return handle.name()
+        except Exception:
+            # Процесс завершился или недоступен: оставляем только номер
+            self._handles.pop(pid, None)
+            return f"pid {pid}"
+
+    def _update_io(self, pid, usage, elapsed):
+        handle = self._handles.get(pid)
+        if handle is None:
+            return
+        try:
+            counters = handle.io_counters()
+        except Exception:
+            # Нет прав, процесс завершился или платформа не дает счетчики
+            self._handles.pop(pid, None)
+            return
+        read = getattr(counters, 'read_chars', None)
+        write = getattr(counters, 'write_chars', None)
+        if read is None:
+            read, write = counters.read_bytes, counters.write_bytes
+        if usage.io_read is not None and elapsed > 0:
+            usage.read_bps = max(0, read - usage.io_read) * 8 / elapsed
+            usage.write_bps = max(0, write - usage.io_write) * 8 / elapsed
+        usage.io_read = read
+        usage.io_write = write
+
+    def _forget(self, pid):
+        del self._processes[pid]
+        self._handles.pop(pid, None)
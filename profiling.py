@@ -0,0 +1,217 @@
+import io
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+_DISABLED = nullcontext()
+
+
+class StageTimer:
+    """Накопленное время одного этапа"""
+    __slots__ = ('count', 'total', 'max', 'last')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def to_dict(self):
+        return {'count': self.count, 'total_s': self.total, 'max_s': self.max, 'last_s': self.last,
+                'avg_s': self.total / self.count if self.count else None}
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'started', 'profile')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.profile = None
+
+    def __enter__(self):
+        profiler = self.profiler
+        # cProfile в одном интерпретаторе может работать только в одном потоке
+        # одновременно, поэтому параллельные этапы в профиль не попадают
+        if profiler.cprofile_enabled and profiler._profile_lock.acquire(blocking=False):
+            import cProfile
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        if self.profile is not None:
+            self.profile.disable()
+            self.profiler._merge_profile(self.profile)
+            self.profiler._profile_lock.release()
+        self.profiler.observe(self.name, elapsed)
+        return False
+
+
+class Profiler:
+    """Профилирование работающего монитора по запросу.
+
+    Пока профилирование выключено, stage() возвращает пустой контекст и
+    почти ничего не стоит. Таймеры этапов накапливают число вызовов,
+    суммарное и максимальное время, а при заданном registry — еще и
+    гистограмму netmon_stage_seconds{stage}. cProfile профилирует сами
+    этапы (в том потоке, где они выполняются), tracemalloc сравнивает
+    распределение памяти с моментом включения.
+
+    Включается методом start() или файлом-флагом (см. poll_trigger):
+    появление файла включает захват, удаление — выключает и сохраняет
+    отчеты в output_dir.
+    """
+
+    def __init__(self, output_dir=None, registry=None, trigger_path=None, tracemalloc_frames=10):
+        self.output_dir = output_dir
+        self.trigger_path = trigger_path
+        self.tracemalloc_frames = tracemalloc_frames
+        self.timers_enabled = False
+        self.cprofile_enabled = False
+        self.stages = {}
+        self._stage_histogram = None
+        if registry is not None:
+            self._stage_histogram = registry.histogram(
+                'netmon_stage_seconds', "Время этапов работы монитора при включенном профилировании",
+                ('stage',))
+        self._lock = threading.Lock()
+        self._profile_lock = threading.Lock()
+        self._stats = None
+        self._snapshot = None
+        self._owns_tracemalloc = False
+        self._started_at = None
+        self._triggered = False
+
+    @property
+    def active(self):
+        return self.timers_enabled or self.cprofile_enabled
+
+    def stage(self, name):
+        """Контекст замера этапа: with profiler.stage('status'): ..."""
+        if not (self.timers_enabled or self.cprofile_enabled):
+            return _DISABLED
+        return _Stage(self, name)
+
+    def observe(self, name, seconds):
+        """Учитывает время этапа, замеренное снаружи"""
+        if not self.timers_enabled:
+            return
+        with self._lock:
+            timer = self.stages.get(name)
+            if timer is None:
+                timer = self.stages[name] = StageTimer()
+            timer.add(seconds)
+        if self._stage_histogram is not None:
+            self._stage_histogram.labels(name).observe(seconds)
+
+    def enable_timers(self):
+        self.timers_enabled = True
+
+    def disable_timers(self):
+        self.timers_enabled = False
+
+    def start(self, cprofile=True, memory=True):
+        """Включает таймеры этапов и, по выбору, cProfile и tracemalloc"""
+        # Модули профилирования загружаются только при включении
+        import tracemalloc
+        with self._lock:
+            self.stages = {}
+            self._stats = None
+            self._started_at = time.time()
+        if memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.tracemalloc_frames)
+                self._owns_tracemalloc = True
+            self._snapshot = tracemalloc.take_snapshot()
+        self.cprofile_enabled = cprofile
+        self.timers_enabled = True
+
+    def stop(self):
+        """Выключает захват и возвращает отчет; при заданном output_dir сохраняет его в файлы"""
+        self.timers_enabled = False
+        self.cprofile_enabled = False
+        # Дожидаемся этапа, который профилируется в этот момент
+        with self._profile_lock:
+            pass
+        report = self.report()
+        if self._snapshot is not None:
+            report['memory'] = self._memory_top()
+            self._snapshot = None
+            if self._owns_tracemalloc:
+                import tracemalloc
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+        if self.output_dir:
+            report['files'] = self._save(report)
+        return report
+
+    def report(self, limit=30):
+        """Таймеры этапов и самые затратные функции cProfile"""
+        with self._lock:
+            stages = {name: timer.to_dict() for name, timer in self.stages.items()}
+        report = {'started_at': self._started_at, 'stages': stages}
+        if self._stats is not None:
+            import pstats
+            output = io.StringIO()
+            stats = pstats.Stats(stream=output)
+            stats.add(self._stats)
+            stats.sort_stats('cumulative').print_stats(limit)
+            report['cprofile'] = output.getvalue()
+        return report
+
+    def poll_trigger(self):
+        """Включает или выключает захват по наличию файла trigger_path"""
+        if not self.trigger_path:
+            return None
+        requested = os.path.exists(self.trigger_path)
+        if requested and not self.active:
+            self.start()
+            self._triggered = True
+            return 'started'
+        if not requested and self._triggered:
+            # Выключаем только захват, включенный файлом-флагом
+            self._triggered = False
+            self.stop()
+            return 'stopped'
+        return None
+
+    def _merge_profile(self, profile):
+        import pstats
+        if self._stats is None:
+            self._stats = pstats.Stats(profile)
+        else:
+            self._stats.add(profile)
+
+    def _memory_top(self, limit=30):
+        import tracemalloc
+        current = tracemalloc.take_snapshot()
+        ignored = (tracemalloc.Filter(False, tracemalloc.__file__),)
+        diff = current.filter_traces(ignored).compare_to(self._snapshot.filter_traces(ignored), 'lineno')
+        return [str(stat) for stat in diff[:limit]]
+
+    def _save(self, report):
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        files = []
+        path = os.path.join(self.output_dir, f'{stamp}-report.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        files.append(path)
+        if self._stats is not None:
+            path = os.path.join(self.output_dir, f'{stamp}-cprofile.prof')
+            self._stats.dump_stats(path)
+            files.append(path)
+        return files
@@ -0,0 +1,438 @@
+import bisect
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime, timezone
+
+# Запись разреженного индекса: время (double) и смещение в сегменте (uint64)
+_INDEX_RECORD = struct.Struct('<dQ')
+# Запись каталога ключей упакованного сегмента: хэш ключа, смещение и длина его записей
+_KEY_RECORD = struct.Struct('<IQQ')
+
+
+def _key_hash(key):
+    return zlib.crc32(key.encode('utf-8')) if key is not None else 0
+
+
+class _Segment:
+    """Открытый на запись сегмент одного вида данных"""
+
+    def __init__(self, path, start, key_of):
+        self.path = path
+        self.start = start
+        self.file = open(path, 'ab')
+        # Упакованный или оборванный при упаковке сегмент уже не упорядочен по времени
+        self.indexed = not self.file.tell() or os.path.exists(_index_path(path))
+        self.index_file = open(_index_path(path), 'ab') if self.indexed else None
+        self.records = 0
+        self.dirty = False
+        # ключ -> смещения его записей, чтобы выборка по ключу не читала чужие записи
+        self.offsets = {}
+        self._terminate_partial_line()
+        if self.file.tell():
+            self.records = _scan_offsets(path, key_of, self.offsets)
+
+    def _terminate_partial_line(self):
+        """Закрывает строку, оборванную сбоем, чтобы не испортить следующую запись"""
+        size = self.file.tell()
+        if not size:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(size - 1)
+            if f.read(1) != b'\n':
+                self.file.write(b'\n')
+
+    def flush(self):
+        self.file.flush()
+        if self.index_file is not None:
+            self.index_file.flush()
+
+    def close(self):
+        self.file.close()
+        if self.index_file is not None:
+            self.index_file.close()
+
+
+class ResultsStore:
+    """Хранилище результатов измерений в виде append-only сегментов JSON Lines.
+
+    Каждый вид данных (speedtest, ping, diagnostics...) пишется в свою папку,
+    сегменты ротируются по времени и удаляются по сроку хранения. Для каждого
+    сегмента ведется разреженный индекс (время, смещение), поэтому выборка по
+    диапазону времени читает только нужную часть данных. fsync выполняется
+    пачками и только для сегментов с новыми записями, а недописанная при
+    сбое строка просто пропускается при чтении.
+
+    Ключ записи — первое из полей key_fields (цель проверки или ряд истории).
+    Для открытого сегмента смещения записей каждого ключа хранятся в памяти,
+    а закрытый сегмент в фоне упаковывается: записи одного ключа лежат
+    подряд, их место указано в файле .keys. Поэтому выборка по ключу читает
+    только его записи, сколько бы ключей ни было.
+    """
+
+    def __init__(self, root, segment_seconds=3600, retention_days=30,
+                 fsync_batch=256, fsync_interval=1.0, index_every=64,
+                 key_fields=('target', 'series'), kind_segment_seconds=None):
+        self.root = root
+        self.segment_seconds = segment_seconds
+        # Длина сегмента для отдельных видов, например редких агрегатов истории
+        self.kind_segment_seconds = dict(kind_segment_seconds or {})
+        self.retention_seconds = retention_days * 86400
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.index_every = index_every
+        self.key_fields = key_fields
+        self._segments = {}
+        self._compactions = []
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def append(self, kind, record, ts=None):
+        """Добавляет запись. Время ts (epoch, сек) по умолчанию — текущее"""
+        ts = time.time() if ts is None else ts
+        line = json.dumps(dict(record, ts=ts), ensure_ascii=False, separators=(',', ':'))
+        data = line.encode('utf-8') + b'\n'
+        key = self.key_of(record)
+
+        with self._lock:
+            segment = self._segment_for(kind, ts)
+            offset = segment.file.tell()
+            if segment.indexed and segment.records % self.index_every == 0:
+                segment.index_file.write(_INDEX_RECORD.pack(ts, offset))
+            segment.file.write(data)
+            segment.offsets.setdefault(key, array('Q')).append(offset)
+            segment.records += 1
+            segment.dirty = True
+            self._unsynced += 1
+            if (self._unsynced >= self.fsync_batch
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+
+    def key_of(self, record):
+        for field in self.key_fields:
+            value = record.get(field)
+            if value is not None:
+                return str(value)
+        return None
+
+    def flush(self):
+        """Принудительно сбрасывает данные на диск"""
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        with self._lock:
+            self._sync()
+            for segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
+            compactions, self._compactions = self._compactions, []
+        for thread in compactions:
+            thread.join()
+
+    def query(self, kind, start=None, end=None, key=None):
+        """Возвращает записи вида kind с start <= ts < end в порядке времени.
+
+        С key возвращаются только записи этого ключа (цели или ряда).
+        """
+        seconds = self._seconds(kind)
+        for segment_start, path in self._segment_paths(kind):
+            if end is not None and segment_start >= end:
+                break
+            if start is not None and segment_start + seconds <= start:
+                continue
+            yield from self._read(kind, path, start, end, key)
+
+    def latest(self, kind, count=1):
+        """Возвращает последние count записей"""
+        records = []
+        for _, path in reversed(self._segment_paths(kind)):
+            records[:0] = list(self._read(kind, path, None, None, None))
+            if len(records) >= count:
+                break
+        return records[-count:]
+
+    def apply_retention(self, now=None):
+        """Удаляет сегменты старше срока хранения. Возвращает число удаленных.
+
+        Заодно упаковывает закрытые сегменты, не упакованные при ротации
+        (например, из-за перезапуска).
+        """
+        now = time.time() if now is None else now
+        cutoff = now - self.retention_seconds
+        removed = 0
+        for kind in self.kinds():
+            seconds = self._seconds(kind)
+            for segment_start, path in self._segment_paths(kind):
+                if segment_start + seconds > cutoff:
+                    break
+                with self._lock:
+                    segment = self._segments.get(kind)
+                    if segment is not None and segment.path == path:
+                        continue
+                for victim in (path, _index_path(path), _keys_path(path)):
+                    try:
+                        os.remove(victim)
+                    except FileNotFoundError:
+                        pass
+                removed += 1
+        self.compact(now)
+        return removed
+
+    def compact(self, now=None):
+        """Упаковывает закрытые сегменты, которые еще не упакованы. Возвращает их число"""
+        now = time.time() if now is None else now
+        packed = 0
+        for kind in self.kinds():
+            seconds = self._seconds(kind)
+            for segment_start, path in self._segment_paths(kind):
+                if segment_start + seconds > now:
+                    break
+                if not os.path.exists(_keys_path(path)) and self._compact(kind, path):
+                    packed += 1
+        return packed
+
+    def kinds(self):
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isdir(os.path.join(self.root, name)))
+
+    def _seconds(self, kind):
+        return self.kind_segment_seconds.get(kind, self.segment_seconds)
+
+    def _segment_for(self, kind, ts):
+        seconds = self._seconds(kind)
+        segment_start = int(ts // seconds) * seconds
+        segment = self._segments.get(kind)
+        if segment is not None and segment.start == segment_start:
+            return segment
+
+        if segment is not None:
+            self._rotate(kind, segment)
+        folder = os.path.join(self.root, kind)
+        os.makedirs(folder, exist_ok=True)
+        name = datetime.fromtimestamp(segment_start, timezone.utc).strftime('%Y%m%dT%H%M%S')
+        path = os.path.join(folder, f"{name}.jsonl")
+        if os.path.exists(_keys_path(path)):
+            # Дозапись в упакованный сегмент: он снова станет обычным до следующей упаковки
+            os.remove(_keys_path(path))
+        segment = _Segment(path, segment_start, self.key_of)
+        self._segments[kind] = segment
+        return segment
+
+    def _rotate(self, kind, segment):
+        if segment.dirty:
+            segment.flush()
+            os.fsync(segment.file.fileno())
+        segment.close()
+        del self._segments[kind]
+        # Упаковка читает весь сегмент, поэтому идет в фоне, не задерживая запись
+        self._compactions = [t for t in self._compactions if t.is_alive()]
+        thread = threading.Thread(target=self._compact, args=(kind, segment.path, segment.offsets),
+                                  name='store-compact', daemon=True)
+        self._compactions.append(thread)
+        thread.start()
+
+    def _sync(self):
+        for segment in self._segments.values():
+            if not segment.dirty:
+                continue
+            segment.flush()
+            os.fsync(segment.file.fileno())
+            segment.dirty = False
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _compact(self, kind, path, offsets=None):
+        """Переписывает сегмент так, что записи каждого ключа лежат подряд"""
+        temporary = path + '.tmp'
+        try:
+            size = os.path.getsize(path)
+            if offsets is None:
+                offsets = {}
+                _scan_offsets(path, self.key_of, offsets)
+            _write_packed(path, temporary, offsets)
+            with self._lock:
+                segment = self._segments.get(kind)
+                if (segment is not None and segment.path == path) or os.path.getsize(path) != size:
+                    # Сегмент снова открыт на запись: упакуем его при следующей ротации
+                    raise OSError("сегмент изменился во время упаковки")
+                # Индекс времени к упакованному сегменту не подходит; без .keys
+                # сегмент читается целиком, так что сбой между шагами безопасен
+                if os.path.exists(_index_path(path)):
+                    os.remove(_index_path(path))
+                os.replace(temporary, path)
+                os.replace(temporary + '.keys', _keys_path(path))
+            return True
+        except OSError:
+            # Например, файл открыт читателем в Windows; повторим при очистке по сроку
+            for leftover in (temporary, temporary + '.keys'):
+                try:
+                    os.remove(leftover)
+                except OSError:
+                    pass
+            return False
+
+    def _read(self, kind, path, start, end, key):
+        """Записи сегмента. Файлы открываются под блокировкой (упаковка не
+        подменит их на полпути), а читаются уже без нее"""
+        with self._lock:
+            f = open(path, 'rb')
+            segment = self._segments.get(kind)
+            if segment is not None and segment.path == path:
+                segment.flush()
+                if key is not None:
+                    # Одна строка на смещение: записи ключа в открытом сегменте
+                    return self._read_spans(f, [(offset, None) for offset in segment.offsets.get(key, ())],
+                                            start, end, key)
+                indexed = segment.indexed
+            elif os.path.exists(_keys_path(path)):
+                if key is None:
+                    return self._read_sorted(f, start, end, None)
+                return self._read_spans(f, _key_runs(_keys_path(path), _key_hash(key)), start, end, key)
+            else:
+                indexed = os.path.exists(_index_path(path))
+            if not indexed:
+                # Сегмент без индекса времени (дописанный после упаковки) не упорядочен
+                return self._read_sorted(f, start, end, key)
+            f.seek(self._seek_offset(path, start) if start is not None else 0)
+        return self._read_ordered(f, start, end, key)
+
+    def _read_spans(self, f, spans, start, end, key):
+        """Записи по участкам (смещение, длина); длина None — одна строка"""
+        with f:
+            records = []
+            for offset, length in spans:
+                f.seek(offset)
+                chunk = f.readline() if length is None else f.read(length)
+                records.extend(self._matching(chunk.splitlines(), start, end, key))
+        records.sort(key=_timestamp)
+        yield from records
+
+    def _read_sorted(self, f, start, end, key):
+        with f:
+            records = list(self._matching(f, start, end, key))
+        records.sort(key=_timestamp)
+        yield from records
+
+    def _read_ordered(self, f, start, end, key):
+        with f:
+            for record in self._matching(f, start, None, key):
+                if end is not None and record['ts'] >= end:
+                    return
+                yield record
+
+    def _matching(self, lines, start, end, key):
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Недописанная строка после сбоя
+                continue
+            ts = record.setdefault('ts', 0)
+            if start is not None and ts < start:
+                continue
+            if end is not None and ts >= end:
+                continue
+            if key is not None and self.key_of(record) != key:
+                continue
+            yield record
+
+    def _segment_paths(self, kind):
+        folder = os.path.join(self.root, kind)
+        try:
+            names = sorted(n for n in os.listdir(folder) if n.endswith('.jsonl'))
+        except FileNotFoundError:
+            return []
+        paths = []
+        for name in names:
+            stamp = datetime.strptime(name[:-len('.jsonl')], '%Y%m%dT%H%M%S')
+            paths.append((stamp.replace(tzinfo=timezone.utc).timestamp(), os.path.join(folder, name)))
+        return paths
+
+    @staticmethod
+    def _seek_offset(path, start):
+        """Находит по индексу смещение, с которого стоит читать сегмент"""
+        try:
+            with open(_index_path(path), 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return 0
+        entries = [_INDEX_RECORD.unpack_from(raw, pos)
+                   for pos in range(0, len(raw) - len(raw) % _INDEX_RECORD.size, _INDEX_RECORD.size)]
+        position = bisect.bisect_left([ts for ts, _ in entries], start) - 1
+        return entries[position][1] if position >= 0 else 0
+
+
+def _index_path(path):
+    return path[:-len('.jsonl')] + '.idx'
+
+
+def _keys_path(path):
+    return path[:-len('.jsonl')] + '.keys'
+
+
+def _scan_offsets(path, key_of, offsets):
+    """Собирает смещения записей сегмента по ключам. Возвращает число записей"""
+    count = 0
+    with open(path, 'rb') as f:
+        offset = 0
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if record is not None:
+                offsets.setdefault(key_of(record), array('Q')).append(offset)
+                count += 1
+            offset += len(line)
+    return count
+
+
+def _write_packed(path, temporary, offsets):
+    """Пишет во временные файлы записи сегмента, сгруппированные по ключам, и каталог .keys"""
+    keys = []
+    with open(path, 'rb') as source, open(temporary, 'wb') as target:
+        for key in sorted(offsets, key=lambda k: (_key_hash(k), k or '')):
+            begin = target.tell()
+            for offset in offsets[key]:
+                source.seek(offset)
+                target.write(source.readline())
+            keys.append(_KEY_RECORD.pack(_key_hash(key), begin, target.tell() - begin))
+        target.flush()
+        os.fsync(target.fileno())
+    with open(temporary + '.keys', 'wb') as f:
+        f.write(b''.join(keys))
+
+
+def _key_runs(path, key_hash):
+    """Участки записей ключа по каталогу .keys: двоичный поиск по хэшу"""
+    size = _KEY_RECORD.size
+    runs = []
+    with open(path, 'rb') as f:
+        low, high = 0, os.fstat(f.fileno()).st_size // size
+        while low < high:
+            middle = (low + high) // 2
+            f.seek(middle * size)
+            if _KEY_RECORD.unpack(f.read(size))[0] < key_hash:
+                low = middle + 1
+            else:
+                high = middle
+        f.seek(low * size)
+        for raw in iter(lambda: f.read(size), b''):
+            if len(raw) < size:
+                break
+            found, offset, length = _KEY_RECORD.unpack(raw)
+            if found != key_hash:
+                break
+            runs.append((offset, length))
+    return runs
+
+
+def _timestamp(record):
+    return record.get('ts', 0)
@@ -0,0 +1,142 @@
+import importlib
+import json
+import os
+import threading
+import time
+
+
+class SpeedtestServerCache:
+    """Кэш конфигурации, списка серверов и лучшего сервера speedtest между запусками.
+
+    Обычно тест начинается с быстрой проверки задержки до ранее выбранного
+    сервера, без загрузки конфигурации и списка серверов. Если он не
+    отвечает, выбирается лучший из сохраненных ближайших серверов, и только
+    если не отвечают и они, выполняется полный поиск. Устаревший кэш
+    обновляется в фоне, не задерживая текущий тест.
+    """
+
+    def __init__(self, path, module=None, ttl=86400, revalidate_after=6 * 3600, max_servers=20,
+                 clock=time.time):
+        self.path = path
+        self._module = module
+        self.ttl = ttl
+        self.revalidate_after = revalidate_after
+        self.max_servers = max_servers
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._revalidating = None
+
+    @property
+    def module(self):
+        # Модуль speedtest загружается при первом тесте, а не при запуске программы
+        if self._module is None:
+            self._module = importlib.import_module('speedtest')
+        return self._module
+
+    def prepare(self):
+        """Возвращает (Speedtest с выбранным сервером, сервер, источник выбора)"""
+        data = self._load()
+        fresh = data is not None and self._clock() - data.get('saved_at', 0) < self.ttl
+        if fresh:
+            st = self._create(data.get('config'))
+            for source, candidates in (('cached_best', [data['best']] if data.get('best') else []),
+                                       ('cached_servers', data.get('servers', []))):
+                if not candidates:
+                    continue
+                try:
+                    best = st.get_best_server(candidates)
+                except Exception:
+                    # Сервер не ответил: исключаем его из кэша и пробуем дальше
+                    self._evict(data, candidates if source == 'cached_best' else [])
+                    continue
+                self._remember_best(data, best)
+                if self._clock() - data.get('saved_at', 0) >= self.revalidate_after:
+                    self.revalidate_async()
+                return st, best, source
+
+        st = self._create(None)
+        st.get_servers()
+        best = st.get_best_server()
+        self._save_discovery(st, best)
+        return st, best, 'discovery'
+
+    def invalidate_best(self):
+        """Забывает лучший сервер, например если тест через него не удался"""
+        with self._lock:
+            data = self._read()
+            if data and data.pop('best', None) is not None:
+                self._write(data)
+
+    def revalidate_async(self):
+        """Обновляет конфигурацию и список серверов в фоновом потоке"""
+        if self._revalidating is not None and self._revalidating.is_alive():
+            return self._revalidating
+
+        def revalidate():
+            try:
+                st = self._create(None)
+                st.get_servers()
+                self._save_discovery(st, None)
+            except Exception:
+                pass
+
+        self._revalidating = threading.Thread(target=revalidate, name='speedtest-revalidate', daemon=True)
+        self._revalidating.start()
+        return self._revalidating
+
+    def _create(self, config):
+        """Создает Speedtest; при наличии кэша конфигурация не загружается заново"""
+        if config is None:
+            return self.module.Speedtest()
+
+        class CachedSpeedtest(self.module.Speedtest):
+            def get_config(self):
+                self.config = json.loads(json.dumps(config))
+                client = self.config['client']
+                self.lat_lon = (float(client['lat']), float(client['lon']))
+                return self.config
+
+        return CachedSpeedtest()
+
+    def _save_discovery(self, st, best):
+        servers = [server for distance in sorted(st.servers) for server in st.servers[distance]]
+        servers = servers or list(st.closest)
+        with self._lock:
+            previous = self._read() or {}
+            data = {
+                'saved_at': self._clock(),
+                'config': st.config,
+                'servers': servers[:self.max_servers],
+                'best': best if best is not None else previous.get('best'),
+            }
+            self._write(data)
+
+    def _remember_best(self, data, best):
+        with self._lock:
+            data['best'] = best
+            self._write(data)
+
+    def _evict(self, data, servers):
+        ids = {server.get('id') for server in servers}
+        with self._lock:
+            data['servers'] = [s for s in data.get('servers', []) if s.get('id') not in ids]
+            if data.get('best') and data['best'].get('id') in ids:
+                data['best'] = None
+            self._write(data)
+
+    def _load(self):
+        with self._lock:
+            return self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self, data):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,250 @@
+import asyncio
+import heapq
+import itertools
+import socket
+import struct
+import threading
+import time
+import zlib
+
+# Закрытие через RST: при тысячах проверок в секунду TIME_WAIT исчерпал бы порты
+_LINGER_RESET = struct.pack('ii', 1, 0)
+
+
+class Target:
+    """Цель мониторинга и ее состояние"""
+    __slots__ = ('key', 'host', 'port', 'interval', 'timeout', 'address', 'resolved_at', 'next_due',
+                 'in_flight', 'active', 'sent', 'received', 'last_rtt_ms', 'last_error')
+
+    def __init__(self, key, host, port, interval, timeout):
+        self.key = key
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.timeout = timeout
+        self.address = None
+        self.resolved_at = 0.0
+        self.next_due = 0.0
+        self.in_flight = False
+        self.active = True
+        self.sent = 0
+        self.received = 0
+        self.last_rtt_ms = None
+        self.last_error = None
+
+
+async def tcp_connect_probe(target):
+    """Время установки TCP-соединения до цели, мс"""
+    loop = asyncio.get_running_loop()
+    if target.address is None:
+        # Адрес кэшируется планировщиком на address_ttl, DNS не входит в замер
+        info = await loop.getaddrinfo(target.host, target.port, type=socket.SOCK_STREAM)
+        target.address = info[0][0], info[0][4]
+        target.resolved_at = time.monotonic()
+    family, address = target.address
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    try:
+        started = time.perf_counter_ns()
+        await loop.sock_connect(sock, address)
+        return (time.perf_counter_ns() - started) / 1e6
+    finally:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RESET)
+        except OSError:
+            pass
+        sock.close()
+
+
+class TargetScheduler:
+    """Планировщик проверок тысяч целей в одном цикле asyncio.
+
+    Сроки проверок хранятся в куче. Первая проверка каждой цели сдвигается
+    на детерминированную долю интервала, поэтому проверки распределены по
+    интервалу равномерно, без всплесков. Число одновременных проверок
+    ограничено семафором, у каждой цели свои интервал и таймаут. Запаздывание
+    старта проверки относительно срока копится в lag-метриках. Разрешенный
+    адрес цели забывается через address_ttl секунд.
+    """
+
+    def __init__(self, probe=tcp_connect_probe, on_result=None, max_concurrency=512, address_ttl=300):
+        self.probe = probe
+        self.on_result = on_result
+        self.max_concurrency = max_concurrency
+        self.address_ttl = address_ttl
+        self.targets = {}
+        self.dispatched = 0
+        self.completed = 0
+        self.skipped = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self._heap = []
+        self._seq = itertools.count()
+        self._loop = None
+        self._thread = None
+        self._wakeup = None
+        self._stopping = False
+        # targets меняется в потоке цикла, а summary() читается из других потоков
+        self._lock = threading.Lock()
+
+    # --- управление целями (можно вызывать из любого потока) ---
+
+    def add_target(self, key, host, port=443, interval=5.0, timeout=2.0):
+        self._call(self._add, key, host, port, interval, timeout)
+
+    def remove_target(self, key):
+        self._call(self._remove, key)
+
+    def retime_target(self, key, interval=None, timeout=None):
+        self._call(self._retime, key, interval, timeout)
+
+    def _call(self, func, *args):
+        loop = self._loop
+        if loop is not None and loop.is_running() and threading.current_thread() is not self._thread:
+            loop.call_soon_threadsafe(func, *args)
+        else:
+            func(*args)
+
+    def _add(self, key, host, port, interval, timeout):
+        old = self.targets.get(key)
+        if old is not None:
+            old.active = False
+        target = Target(key, host, port, interval, timeout)
+        phase = (zlib.crc32(str(key).encode('utf-8')) % 10000) / 10000
+        target.next_due = time.monotonic() + phase * interval
+        with self._lock:
+            self.targets[key] = target
+        self._push(target)
+
+    def _remove(self, key):
+        with self._lock:
+            target = self.targets.pop(key, None)
+        if target is not None:
+            target.active = False
+
+    def _retime(self, key, interval, timeout):
+        target = self.targets.get(key)
+        if target is None:
+            return
+        if timeout is not None:
+            target.timeout = timeout
+        if interval is not None and interval != target.interval:
+            # Перепланируем только эту цель, сохраняя ее место в интервале. Цель
+            # меняется на месте: идущая проверка остается единственной, а старая
+            # запись в куче станет недействительной по сроку
+            target.interval = interval
+            target.next_due = min(target.next_due, time.monotonic() + interval)
+            self._push(target)
+
+    def _push(self, target):
+        heapq.heappush(self._heap, (target.next_due, next(self._seq), target))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # --- запуск ---
+
+    def start(self):
+        """Запускает цикл asyncio в отдельном потоке"""
+        if self._thread is not None:
+            return
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            ready.set()
+            self._loop.run_until_complete(self.run())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name='target-scheduler', daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self):
+        self._stopping = True
+        loop = self._loop
+        if loop is not None and self._wakeup is not None:
+            loop.call_soon_threadsafe(self._wakeup.set)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    async def run(self):
+        """Основной цикл: запускает проверки по сроку, пока не вызван stop()"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = set()
+
+        while not self._stopping:
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                due, _, target = heapq.heappop(self._heap)
+                if not target.active or due != target.next_due:
+                    continue
+                target.next_due = due + target.interval
+                if target.next_due <= now:
+                    # Сильно отстали: не пытаемся наверстать пропущенные проверки
+                    target.next_due = now + target.interval
+                heapq.heappush(self._heap, (target.next_due, next(self._seq), target))
+                if target.in_flight:
+                    self.skipped += 1
+                    continue
+                target.in_flight = True
+                task = asyncio.ensure_future(self._probe(target, due, semaphore))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _probe(self, target, due, semaphore):
+        async with semaphore:
+            lag = time.monotonic() - due
+            self.dispatched += 1
+            self.lag_total += lag
+            self.lag_max = max(self.lag_max, lag)
+            target.sent += 1
+            if target.address is not None and time.monotonic() - target.resolved_at >= self.address_ttl:
+                target.address = None
+            rtt_ms = error = None
+            try:
+                rtt_ms = await asyncio.wait_for(self.probe(target), target.timeout)
+                target.received += 1
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                error = TimeoutError("timed out")
+            except Exception as e:
+                error = e
+            finally:
+                target.in_flight = False
+            target.last_rtt_ms = rtt_ms
+            target.last_error = error
+            self.completed += 1
+        if self.on_result is not None and target.active:
+            self.on_result(target, rtt_ms, error)
+
+    def summary(self):
+        """Сводка по состоянию всех целей"""
+        with self._lock:
+            results = [(t.last_rtt_ms, t.last_error) for t in self.targets.values()]
+        up = sum(1 for rtt_ms, _ in results if rtt_ms is not None)
+        down = sum(1 for _, error in results if error is not None)
+        return {
+            'targets': len(results),
+            'up': up,
+            'down': down,
+            'completed': self.completed,
+            'skipped': self.skipped,
+            'lag_avg_ms': self.lag_total / self.dispatched * 1000 if self.dispatched else 0.0,
+            'lag_max_ms': self.lag_max * 1000,
+        }
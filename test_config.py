@@ -0,0 +1,152 @@
+import json
+import os
+
+import pytest
+
+import config
+from config import ConfigError, ConfigWatcher, default_config, validate
+from monitor_engine import NetworkMonitorEngine, download_level, ping_level
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.jobs = {}
+        self.calls = []
+
+    def add_job(self, name, func, interval, run_now=True, blocking=False):
+        self.jobs[name] = interval
+        self.calls.append(('add', name, interval))
+
+    def set_interval(self, name, interval):
+        self.jobs[name] = interval
+        self.calls.append(('retime', name, interval))
+
+    def remove_job(self, name):
+        self.jobs.pop(name, None)
+        self.calls.append(('remove', name))
+
+    def has_job(self, name):
+        return name in self.jobs
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class FakeTargets:
+    def __init__(self):
+        self.calls = []
+
+    def add_target(self, key, host, port=443, interval=5.0, timeout=2.0):
+        self.calls.append(('add', key, host, port, interval))
+
+    def remove_target(self, key):
+        self.calls.append(('remove', key))
+
+    def retime_target(self, key, interval=None, timeout=None):
+        self.calls.append(('retime', key, interval, timeout))
+
+    def stop(self):
+        pass
+
+
+def write(path, data):
+    # Размер меняется вместе с содержимым, поэтому изменение видно даже при грубом mtime
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def test_validate_merges_over_base_and_collects_all_errors():
+    merged = validate({'monitor': {'ping_interval': 2}, 'targets': [{'name': 'web', 'host': 'example.com'}]})
+    assert merged['monitor']['ping_interval'] == 2.0
+    assert merged['monitor']['status_interval'] == default_config()['monitor']['status_interval']
+    assert merged['targets'] == [{'name': 'web', 'host': 'example.com', 'port': 443,
+                                  'interval': 5.0, 'timeout': 2.0}]
+
+    with pytest.raises(ConfigError) as error:
+        validate({'monitor': {'ping_intervl': 2, 'status_interval': 'often'},
+                  'thresholds': {'ping_good_ms': 300},
+                  'targets': [{'name': 'a', 'host': 'x'}, {'name': 'a', 'host': 'y', 'port': 0}],
+                  'extra': {}})
+    assert sorted(error.value.errors) == sorted([
+        "monitor.ping_intervl: неизвестный параметр",
+        "monitor.status_interval: ожидалось число, получено 'often'",
+        "targets[1].port: значение 0 меньше 1",
+        "extra: неизвестный раздел",
+        "targets: имя 'a' повторяется",
+        "thresholds.ping_good_ms: больше чем ping_fair_ms",
+    ])
+
+
+def test_parse_toml_and_json():
+    pytest.importorskip('tomllib')
+    text = '[monitor]\nping_interval = 3\n\n[[targets]]\nname = "dns"\nhost = "1.1.1.1"\nport = 53\n'
+    assert config.parse(text, 'config.toml') == {
+        'monitor': {'ping_interval': 3}, 'targets': [{'name': 'dns', 'host': '1.1.1.1', 'port': 53}]}
+    assert config.parse('{"monitor": {"ping_interval": 3}}', 'config.json') == {'monitor': {'ping_interval': 3}}
+    with pytest.raises(ConfigError):
+        config.parse('[monitor', 'config.toml')
+
+
+def test_watcher_applies_rejects_and_reverts(tmp_path):
+    path = str(tmp_path / 'config.json')
+    changes, errors = [], []
+    watcher = ConfigWatcher(path, default_config(), lambda old, new: changes.append(new), errors.append)
+    assert not watcher.poll()
+
+    write(path, {'monitor': {'ping_interval': 2}})
+    assert watcher.poll()
+    assert not watcher.poll()
+    assert changes[-1]['monitor']['ping_interval'] == 2.0
+
+    write(path, {'monitor': {'ping_interval': -1, 'unknown': True}})
+    assert not watcher.poll()
+    assert len(errors) == 1 and len(changes) == 1
+    assert watcher.current['monitor']['ping_interval'] == 2.0
+
+    os.remove(path)
+    assert watcher.poll()
+    assert changes[-1] == default_config()
+
+
+def test_engine_applies_only_changed_parts(tmp_path):
+    path = str(tmp_path / 'config.json')
+    engine = NetworkMonitorEngine(data_dir=str(tmp_path), config_path=path, process_interval=5)
+    engine.probes = FakeScheduler()
+    engine._targets = FakeTargets()
+    engine._targets_started = True
+    try:
+        write(path, {'targets': [{'name': 'web', 'host': 'example.com'},
+                                 {'name': 'dns', 'host': '1.1.1.1', 'port': 53}]})
+        engine.start()
+        assert engine.probes.jobs['processes'] == 5
+        assert 'dns' not in engine.probes.jobs
+        assert engine._targets.calls == [('add', 'dns', '1.1.1.1', 53, 5.0), ('add', 'web', 'example.com', 443, 5.0)]
+        engine.probes.calls.clear()
+        engine._targets.calls.clear()
+
+        write(path, {'monitor': {'status_interval': 30, 'process_interval': 0, 'dns_interval': 60},
+                     'thresholds': {'download_good_mbps': 100},
+                     'detection': {'fail_threshold': 5},
+                     'dns': {'servers': ['9.9.9.9']},
+                     'targets': [{'name': 'web', 'host': 'example.com', 'interval': 1},
+                                 {'name': 'ssh', 'host': '10.0.0.1', 'port': 22}]})
+        assert engine.config_watcher.poll()
+        assert engine.probes.calls == [('retime', 'status', 30.0), ('remove', 'processes'),
+                                       ('add', 'dns', 60.0)]
+        assert engine._targets.calls == [('remove', 'dns'), ('add', 'ssh', '10.0.0.1', 22, 5.0),
+                                         ('retime', 'web', 1.0, 2.0)]
+        assert download_level(50, engine.thresholds) == 'warning'
+        assert engine.detector.fail_threshold == 5
+        assert engine.dns.servers == [('9.9.9.9', 53)]
+    finally:
+        engine.stop()
+
+
+def test_default_thresholds_keep_previous_levels():
+    assert [ping_level(rtt) for rtt in (99, 150, 250)] == ['success', 'warning', 'error']
+    assert [download_level(speed) for speed in (25, 10, 1)] == ['success', 'warning', 'error']
+    strict = dict(config.DEFAULT_THRESHOLDS, ping_good_ms=50)
+    assert ping_level(70, strict) == 'warning'
@@ -0,0 +1,182 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from alert_sinks import AlertDispatcher, DesktopSink, FileSink, WebhookSink
+from detection import Alert, DetectionEngine, EwmaDetector, UpDownState
+from results_store import ResultsStore
+
+
+def test_up_down_hysteresis():
+    state = UpDownState(fail_threshold=3, recover_threshold=2)
+    results = [state.update(ok, ts) for ts, ok in enumerate([True, False, False, True, False, False, False,
+                                                             False, True, False, True, True])]
+    assert results == [None, None, None, None, None, None, 'down', None, None, None, None, 'up']
+    # Авария началась с первой неудачи серии, а закончилась с первым успехом
+    assert state.changed_at == 10
+
+
+def test_outage_interval_is_persisted(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    alerts = []
+    detector = DetectionEngine(store, on_alert=alerts.append)
+    for ts in range(5):
+        detector.observe('gw', 5.0, ts=ts)
+    for ts in range(5, 10):
+        detector.observe('gw', None, ts=ts)
+    assert detector.outage_start('gw') == 5
+    assert detector.open_outages() == {'gw': 5}
+    for ts in range(10, 12):
+        detector.observe('gw', 5.0, ts=ts)
+
+    assert [a.kind for a in alerts] == ['outage', 'recovered']
+    outages = list(store.query('outages'))
+    store.close()
+    assert len(outages) == 1
+    assert outages[0]['target'] == 'gw'
+    assert (outages[0]['start'], outages[0]['end'], outages[0]['duration']) == (5, 10, 5)
+    assert detector.is_up('gw')
+
+
+def test_latency_anomaly_detected_and_cleared():
+    random.seed(1)
+    detector = EwmaDetector(warmup=20)
+    changes = [detector.update(random.gauss(20, 1)) for _ in range(200)]
+    assert 'anomaly' not in changes
+    assert detector.update(80.0) == 'anomaly'
+    assert detector.update(81.0) is None
+    assert detector.update(20.0) == 'cleared'
+
+
+def test_throughput_drop():
+    alerts = []
+    detector = DetectionEngine(on_alert=alerts.append)
+    for mbps in (95, 100, 98, 102, 99):
+        detector.observe_throughput('download', mbps)
+    detector.observe_throughput('download', 20)
+    assert [a.kind for a in alerts] == ['throughput_drop']
+    assert alerts[0].data['mbps'] == 20
+
+
+def test_observe_is_constant_time_per_sample():
+    detector = DetectionEngine()
+    targets = [f'10.0.{i // 256}.{i % 256}' for i in range(5000)]
+    started = time.perf_counter()
+    for i in range(100_000):
+        detector.observe(targets[i % len(targets)], 10.0 + i % 7, ts=i)
+    assert time.perf_counter() - started < 5.0
+
+
+class Recorder:
+    def __init__(self):
+        self.alerts = []
+        self.event = threading.Event()
+
+    def send(self, alert):
+        self.alerts.append(alert)
+        self.event.set()
+
+
+def test_dispatcher_dedup_and_rate_limit():
+    now = [0.0]
+    sink = Recorder()
+    dispatcher = AlertDispatcher([sink], dedup_seconds=60, burst=2, rate=1.0, clock=lambda: now[0])
+    assert dispatcher.dispatch(Alert('outage', 'a', "a down", 'error'))
+    assert not dispatcher.dispatch(Alert('outage', 'a', "a down", 'error'))
+    assert dispatcher.dispatch(Alert('outage', 'b', "b down", 'error'))
+    assert not dispatcher.dispatch(Alert('outage', 'c', "c down", 'error'))
+    now[0] = 1.0
+    assert dispatcher.dispatch(Alert('outage', 'c', "c down", 'error'))
+    now[0] = 61.0
+    assert dispatcher.dispatch(Alert('outage', 'a', "a down", 'error'))
+    dispatcher.close()
+    assert [a.target for a in sink.alerts] == ['a', 'b', 'c', 'a']
+    assert (dispatcher.deduplicated, dispatcher.rate_limited) == (1, 1)
+
+
+def test_file_and_webhook_sinks(tmp_path):
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        path = tmp_path / 'alerts' / 'alerts.jsonl'
+        dispatcher = AlertDispatcher([FileSink(str(path)),
+                                      WebhookSink(f'http://127.0.0.1:{server.server_address[1]}/hook')])
+        dispatcher.dispatch(Alert('outage', 'gw', "gw: нет связи", 'error', data={'start': 5}))
+        dispatcher.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert json.loads(lines[0])['message'] == "gw: нет связи"
+    assert received[0]['kind'] == 'outage' and received[0]['start'] == 5
+
+
+def test_failing_sink_does_not_stop_delivery():
+    class Broken:
+        def send(self, alert):
+            raise OSError("нет сети")
+
+    sink = Recorder()
+    failures = []
+    dispatcher = AlertDispatcher([Broken(), sink], on_error=lambda s, alert, error: failures.append(error))
+    dispatcher.dispatch(Alert('outage', 'gw', "gw", 'error'))
+    assert sink.event.wait(5)
+    dispatcher.close()
+    assert dispatcher.errors == 1
+    assert str(failures[0]) == "нет сети"
+
+
+def test_state_change_resets_dedup_and_expired_keys_are_pruned():
+    now = [0.0]
+    dispatcher = AlertDispatcher(dedup_seconds=300, clock=lambda: now[0])
+    assert dispatcher.dispatch(Alert('outage', 'gw', "down", 'error'))
+    now[0] = 60.0
+    assert dispatcher.dispatch(Alert('recovered', 'gw', "up", 'success'))
+    now[0] = 120.0
+    # Новая авария вскоре после восстановления не подавляется
+    assert dispatcher.dispatch(Alert('outage', 'gw', "down", 'error'))
+    assert not dispatcher.dispatch(Alert('outage', 'gw', "down", 'error'))
+    assert dispatcher.dispatch(Alert('recovered', 'gw', "up", 'success'))
+
+    for i in range(5):
+        dispatcher.dispatch(Alert('latency_anomaly', f'host{i}', "slow", 'warning'))
+    now[0] = 1000.0
+    dispatcher.dispatch(Alert('outage', 'other', "down", 'error'))
+    assert list(dispatcher._last_sent) == ['outage:other']
+
+
+def test_availability_only_observation_skips_latency_anomalies():
+    alerts = []
+    detector = DetectionEngine(on_alert=alerts.append)
+    for _ in range(50):
+        detector.observe('internet', 20.0, latency=False)
+    detector.observe('internet', 5000.0, latency=False)
+    for _ in range(3):
+        detector.observe('internet', None, latency=False)
+    assert [a.kind for a in alerts] == ['outage']
+
+
+@pytest.mark.parametrize('platform, program', [('linux', 'notify-send'), ('darwin', 'osascript'),
+                                               ('win32', 'powershell')])
+def test_desktop_sink_command(monkeypatch, platform, program):
+    calls = []
+    monkeypatch.setattr('sys.platform', platform)
+    sink = DesktopSink(runner=lambda command, **kwargs: calls.append(command))
+    sink.send(Alert('outage', 'gw', "gw: нет 'связи'", 'error'))
+    assert calls[0][0] == program
@@ -0,0 +1,156 @@
+import json
+import socket
+import threading
+import time
+
+import diagnostics
+from latency import LatencyEngine, LatencySample
+from monitor_engine import NetworkMonitorEngine
+
+
+def test_probes_run_concurrently():
+    """Тест что общее время определяется самой медленной проверкой, а не суммой"""
+    def probe(address):
+        time.sleep(0.2)
+        return 10.0
+
+    targets = [(f"host{i}", f"10.0.0.{i}") for i in range(100)]
+    report = diagnostics.run_diagnostics(targets, probe, max_workers=100, deadline=5)
+    assert report.working == 100
+    assert report.elapsed < 2
+    assert report.level == "success"
+
+
+def test_deadline_marks_hanging_targets_unavailable():
+    release = threading.Event()
+
+    def probe(address):
+        if address == 'slow':
+            release.wait(5)
+        return 5.0
+
+    arrived = []
+    try:
+        report = diagnostics.run_diagnostics([('fast', 'fast'), ('slow', 'slow')], probe,
+                                             on_result=arrived.append, deadline=0.3)
+    finally:
+        release.set()
+    assert report.elapsed < 1
+    assert [r.name for r in arrived] == ['fast', 'slow']
+    assert isinstance(arrived[1].error, TimeoutError)
+    assert report.success_rate == 50
+
+
+def test_probe_errors_are_reported():
+    def probe(address):
+        raise OSError("unreachable")
+
+    report = diagnostics.run_diagnostics(diagnostics.DEFAULT_TARGETS, probe)
+    assert report.working == 0
+    assert report.level == "error"
+
+
+def test_load_targets(tmp_path):
+    path = tmp_path / 'targets.json'
+    path.write_text(json.dumps([['Router', '192.168.0.1'], {'address': '9.9.9.9'}]), encoding='utf-8')
+    assert diagnostics.load_targets(str(path)) == [('Router', '192.168.0.1'), ('9.9.9.9', '9.9.9.9')]
+    assert diagnostics.load_targets(str(tmp_path / 'missing.json')) == diagnostics.DEFAULT_TARGETS
+
+
+def test_engine_keeps_diagnostic_samples_apart_from_ping_target(tmp_path):
+    """Тест что диагностика не добавляет замеры в статистику цели ping"""
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(16)
+    engine = NetworkMonitorEngine(data_dir=str(tmp_path), ping_target='127.0.0.1')
+    try:
+        engine.latency = LatencyEngine(timeout=1, prefer_icmp=False, tcp_port=server.getsockname()[1])
+        engine.probe_dns = lambda: None
+        engine.diagnostics_targets = [('local', '127.0.0.1')]
+        assert engine.diagnose().working == 1
+        assert engine.stats.summary('127.0.0.1') is None
+        assert engine.stats.summary('diag:127.0.0.1')['count'] == 1
+
+        engine.diagnostics_targets = [('other', '127.0.0.2')]
+        engine.diagnose()
+        assert engine.stats.get('diag:127.0.0.1') is None
+        engine.flush_records()
+        assert [r['target'] for r in engine.store.query('diagnostic', 0)] == ['127.0.0.1', '127.0.0.2']
+    finally:
+        engine.stop()
+        server.close()
+
+
+def test_malformed_targets_file_falls_back_to_defaults(tmp_path):
+    errors = []
+    path = tmp_path / 'targets.json'
+    path.write_text('[["Router", "192.168.0.1"],', encoding='utf-8')
+    assert diagnostics.load_targets(str(path), on_error=errors.append) == diagnostics.DEFAULT_TARGETS
+    path.write_text('[{"name": "no address"}]', encoding='utf-8')
+    assert diagnostics.load_targets(str(path), on_error=errors.append) == diagnostics.DEFAULT_TARGETS
+    assert len(errors) == 2 and str(path) in errors[0]
+
+
+def test_batched_probe_covers_hundreds_of_unreachable_hosts():
+    """Тест что число серверов не ограничено числом потоков: все пакеты проверяются за один таймаут"""
+    calls = []
+
+    def probe_many(addresses, on_value):
+        calls.append(len(addresses))
+        time.sleep(0.2)
+        return [TimeoutError("timed out") if i % 2 else 10.0 for i in range(len(addresses))]
+
+    targets = [(f"host{i}", f"10.1.{i // 256}.{i % 256}") for i in range(1000)]
+    report = diagnostics.run_diagnostics(targets, probe_many=probe_many, deadline=5)
+    assert sorted(calls) == [200] * 5
+    assert report.total == 1000 and report.working == 500
+    assert report.elapsed < 0.6
+    assert not any(isinstance(r.error, TimeoutError) and str(r.error) == "deadline exceeded"
+                   for r in report.results)
+
+
+def test_latency_batch_probe_reports_resolution_errors():
+    class Engine:
+        def probe_many(self, hosts, on_sample=None):
+            return [LatencySample(host, None, 'tcp', rtt_ms=1.0) for host in hosts]
+
+    def resolve(address):
+        if address == 'bad.invalid':
+            raise OSError("not found")
+        return '192.0.2.1'
+
+    values = diagnostics.latency_batch_probe(Engine(), resolve=resolve)(['good.test', 'bad.invalid', '192.0.2.5'])
+    assert values[0] == 1.0 and isinstance(values[1], OSError) and values[2] == 1.0
+
+
+def test_batch_results_are_reported_as_each_server_answers():
+    """Тест что результат сервера приходит сразу, не дожидаясь остальных серверов пакета"""
+    reported = {}
+    started = time.monotonic()
+
+    def probe_many(addresses, on_value):
+        for index, address in enumerate(addresses):
+            time.sleep(0.1)
+            on_value(index, 1.0)
+        return [1.0] * len(addresses)
+
+    targets = [(f"host{i}", f"10.0.0.{i}") for i in range(3)]
+    report = diagnostics.run_diagnostics(
+        targets, probe_many=probe_many,
+        on_result=lambda result: reported.setdefault(result.address, time.monotonic() - started))
+    assert report.working == 3 and len(report.results) == 3
+    assert reported['10.0.0.0'] < 0.2 <= reported['10.0.0.2']
+
+
+def test_latency_engine_reports_each_sample():
+    class Engine:
+        def probe_many(self, hosts, on_sample=None):
+            for index, host in reversed(list(enumerate(hosts))):
+                on_sample(index, LatencySample(host, None, 'tcp', rtt_ms=float(index)))
+            return []
+
+    seen = []
+    probe_many = diagnostics.latency_batch_probe(Engine(), resolve=lambda address: address)
+    values = probe_many(['a', 'b', 'c'], lambda index, value: seen.append((index, value)))
+    assert values == [0.0, 1.0, 2.0]
+    assert seen == [(2, 2.0), (1, 1.0), (0, 0.0)]
@@ -0,0 +1,206 @@
+import socket
+import struct
+import threading
+
+import pytest
+
+import diagnostics
+from dns_probe import (DnsCache, DnsError, DnsProbe, QTYPE_A, QTYPE_AAAA, RCODE_NOERROR, RCODE_NXDOMAIN, build_query,
+                       parse_response)
+from latency import LatencySample
+from monitor_engine import NetworkMonitorEngine
+
+
+class StandInResolver:
+    """Локальный UDP-резолвер для тестов: отвечает A-записями из словаря.
+
+    IPv6-адрес отдается только на запрос AAAA, имя со значением None
+    существует, но без адресов (NODATA).
+    """
+
+    def __init__(self, records, ttl=300, rcode=0):
+        self.records = records
+        self.ttl = ttl
+        self.rcode = rcode
+        self.queries = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.address = self.sock.getsockname()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                data, peer = self.sock.recvfrom(512)
+            except OSError:
+                return
+            ident = struct.unpack('!H', data[:2])[0]
+            question = data[12:]
+            labels, offset = [], 0
+            while question[offset]:
+                labels.append(question[offset + 1:offset + 1 + question[offset]].decode())
+                offset += question[offset] + 1
+            name = '.'.join(labels)
+            qtype = struct.unpack_from('!H', question, offset + 1)[0]
+            self.queries.append(name)
+            address = self.records.get(name)
+            rcode = self.rcode if name in self.records or self.rcode else RCODE_NXDOMAIN
+            answers = b''
+            if address is not None and not self.rcode:
+                family, rtype = (socket.AF_INET6, QTYPE_AAAA) if ':' in address else (socket.AF_INET, QTYPE_A)
+                if rtype == qtype:
+                    # Имя в ответе — ссылка на вопрос (сжатие)
+                    rdata = socket.inet_pton(family, address)
+                    answers = struct.pack('!HHHIH', 0xc00c, rtype, 1, self.ttl, len(rdata)) + rdata
+            header = struct.pack('!HHHHHH', ident, 0x8180 | rcode, 1, 1 if answers else 0, 0, 0)
+            self.sock.sendto(header + question[:offset + 5] + answers, peer)
+
+    def close(self):
+        self.sock.close()
+
+
+@pytest.fixture
+def resolver():
+    server = StandInResolver({'example.test': '192.0.2.7'})
+    yield server
+    server.close()
+
+
+def test_query_roundtrip_with_compressed_answer(resolver):
+    probe = DnsProbe([resolver.address])
+    timing = probe.query(resolver.address, 'example.test')
+    assert timing.ok and timing.addresses == ('192.0.2.7',) and timing.ttl == 300
+    assert timing.rtt_ms > 0
+
+    missing = probe.query(resolver.address, 'missing.test')
+    assert missing.ok and missing.rcode == RCODE_NXDOMAIN and missing.addresses == ()
+
+
+def test_build_query_layout():
+    query = build_query('a.example.test', ident=0x1234)
+    assert query[:4] == b'\x12\x34\x01\x00'
+    assert query[12:] == b'\x01a\x07example\x04test\x00\x00\x01\x00\x01'
+    with pytest.raises(DnsError):
+        parse_response(query)
+
+
+def test_probe_measures_cold_and_warm_per_server(resolver):
+    silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    silent.bind(('127.0.0.1', 0))
+    try:
+        probe = DnsProbe([resolver.address, silent.getsockname()], timeout=0.3)
+        results = probe.probe('example.test')
+    finally:
+        silent.close()
+
+    good, dead = results
+    assert good.ok and good.cold.ok and good.cold.rcode == RCODE_NXDOMAIN
+    # Запрос без кэша — имя со случайной меткой, запрос из кэша — само имя дважды
+    cold_name = resolver.queries[0]
+    assert cold_name.endswith('.example.test') and cold_name != 'example.test'
+    assert resolver.queries[1:] == ['example.test', 'example.test']
+    assert not dead.ok and isinstance(dead.warm.error, TimeoutError)
+    assert good.to_dict()['addresses'] == ['192.0.2.7']
+    # Замер заполнил кэш имен
+    assert probe.cache.get('example.test') == ('192.0.2.7',)
+
+
+def test_resolve_respects_ttl(resolver):
+    now = [0.0]
+    resolver.ttl = 30
+    probe = DnsProbe([resolver.address], cache=DnsCache(clock=lambda: now[0]))
+    assert probe.resolve('example.test') == '192.0.2.7'
+    assert probe.resolve('EXAMPLE.test.') == '192.0.2.7'
+    assert len(resolver.queries) == 1
+
+    now[0] = 31
+    probe.resolve('example.test')
+    assert len(resolver.queries) == 2
+    assert probe.resolve('10.0.0.1') == '10.0.0.1'
+
+    with pytest.raises(DnsError):
+        probe.resolve('missing.test')
+    with pytest.raises(DnsError):
+        probe.resolve('missing.test')
+    # Отрицательный ответ тоже кэшируется
+    assert resolver.queries.count('missing.test') == 1
+
+
+def test_nodata_is_not_reported_as_missing_name():
+    server = StandInResolver({'noaddr.test': None})
+    try:
+        probe = DnsProbe([server.address])
+        for _ in range(2):
+            with pytest.raises(DnsError) as error:
+                probe.resolve('noaddr.test')
+            assert error.value.rcode == RCODE_NOERROR and 'не найдено' not in str(error.value)
+        with pytest.raises(DnsError) as error:
+            probe.resolve('missing.test')
+        assert error.value.rcode == RCODE_NXDOMAIN
+    finally:
+        server.close()
+    # Запрошены A и AAAA, повтор взят из кэша
+    assert server.queries.count('noaddr.test') == 2
+    assert probe.cache.entry('noaddr.test') == ((), RCODE_NOERROR)
+
+
+def test_ipv6_only_name_resolves_to_aaaa():
+    server = StandInResolver({'v6only.test': '2001:db8::7', 'example.test': '192.0.2.7'})
+    try:
+        probe = DnsProbe([server.address])
+        assert probe.resolve('v6only.test') == '2001:db8::7'
+        assert probe.resolve('v6only.test') == '2001:db8::7'
+        assert probe.resolve('example.test') == '192.0.2.7'
+    finally:
+        server.close()
+    # AAAA запрашивается только после пустого ответа на A
+    assert server.queries == ['v6only.test', 'v6only.test', 'example.test']
+
+
+def test_server_errors_are_failures():
+    server = StandInResolver({'example.test': '192.0.2.7'}, rcode=2)
+    try:
+        timing = DnsProbe([server.address]).query(server.address, 'example.test')
+    finally:
+        server.close()
+    assert not timing.ok and timing.error.rcode == 2
+
+
+def test_cache_evicts_oldest_entries():
+    cache = DnsCache(max_entries=2, clock=lambda: 0)
+    for name in ('a', 'b', 'c'):
+        cache.put(name, ['192.0.2.1'], 60)
+    assert cache.get('a') is None and cache.get('c') == ('192.0.2.1',)
+    assert len(cache) == 2
+
+
+def test_diagnostics_probe_uses_resolved_address(resolver):
+    class Engine:
+        probed = []
+
+        def probe(self, address):
+            self.probed.append(address)
+            return LatencySample(address, None, 'tcp', rtt_ms=3.0)
+
+    engine = Engine()
+    probe = diagnostics.latency_probe(engine, resolve=DnsProbe([resolver.address]).resolve)
+    assert probe('example.test') == 3.0
+    assert engine.probed == ['192.0.2.7']
+
+
+def test_engine_reports_dns_metrics(tmp_path, resolver):
+    engine = NetworkMonitorEngine(data_dir=str(tmp_path), dns_servers=[resolver.address])
+    events = []
+    engine.subscribe(events.append)
+    try:
+        engine.probe_dns('example.test')
+    finally:
+        engine.stop()
+
+    event = next(e for e in events if e.kind == 'dns')
+    assert event.data['results'][0]['failure_ratio'] == 0
+    text = engine.metrics.exposition().decode()
+    server = f'127.0.0.1:{resolver.address[1]}'
+    assert f'netmon_dns_lookup_seconds_count{{server="{server}",cache="warm"}} 1' in text
+    assert f'netmon_dns_failure_ratio{{server="{server}"}} 0' in text
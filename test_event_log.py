@@ -0,0 +1,74 @@
+import threading
+import time
+import tracemalloc
+
+from event_log import EventLog
+
+
+def test_ring_buffer_keeps_latest_records():
+    log = EventLog(capacity=3)
+    for i in range(5):
+        log.append("{}: {:.0f} мс ✓", 'success', (f"host{i}", i * 10.0))
+    log.append("Таймаут", 'error')
+
+    assert len(log) == 3
+    assert [text for _, _, text in log.tail(10)] == ["host3: 30 мс ✓", "host4: 40 мс ✓", "Таймаут"]
+    assert log.tail(1)[0][1] == 'error'
+
+
+def test_soak_million_messages_keeps_memory_flat():
+    """Тест что 10^6 сообщений не увеличивают потребление памяти"""
+    log = EventLog(capacity=10000)
+    tracemalloc.start()
+    try:
+        for i in range(100_000):
+            log.append("{}: {:.0f} мс ✓", 'success', ("Google DNS", i))
+        warm, _ = tracemalloc.get_traced_memory()
+        for i in range(900_000):
+            log.append("{}: {:.0f} мс ✓", 'success', ("Google DNS", i))
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert log.total == 1_000_000
+    assert after - warm < 64 * 1024
+
+
+def test_spill_file_rotates(tmp_path):
+    path = tmp_path / 'events.log'
+    log = EventLog(capacity=10, spill_path=str(path), max_bytes=1024, backup_count=2)
+    for i in range(200):
+        log.append(f"сообщение номер {i}", 'info')
+    log.close()
+
+    assert path.exists()
+    assert (tmp_path / 'events.log.1').exists()
+    assert (tmp_path / 'events.log.2').exists()
+    assert not (tmp_path / 'events.log.3').exists()
+    assert "сообщение номер 199" in path.read_text(encoding='utf-8')
+
+
+def test_append_does_not_wait_for_spill_file(tmp_path):
+    """Тест что запись в файл идет в фоне: медленный диск не задерживает append"""
+    path = tmp_path / 'events.log'
+    log = EventLog(capacity=10, spill_path=str(path), max_pending=50)
+    release = threading.Event()
+    write = log._write_spill
+
+    def slow_write(ts, level, text):
+        release.wait(5)
+        write(ts, level, text)
+
+    log._write_spill = slow_write
+    started = time.perf_counter()
+    for i in range(100):
+        log.append("{}: {}", 'info', ("запись", i))
+    elapsed = time.perf_counter() - started
+    release.set()
+    log.close()
+
+    assert elapsed < 1
+    assert log.spill_dropped > 0
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 100 - log.spill_dropped
+    assert lines[0].endswith("INFO: запись: 0")
@@ -0,0 +1,133 @@
+import json
+import math
+import time
+
+import pytest
+
+from history import ROLLUP_SEGMENT_SECONDS, History, export_columnar, export_csv, lttb, read_columnar, series_key
+from results_store import ResultsStore
+
+BASE = 1_700_000_000 - 1_700_000_000 % 86400
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / 'store'))
+    yield store
+    store.close()
+
+
+def test_rollups_written_when_interval_closes(store):
+    history = History(store, clock=lambda: BASE + 200)
+    for i in range(120):
+        history.record('ping', {'target': 'a', 'rtt_ms': 10.0 + i % 10}, ts=BASE + i)
+        if i == 5:
+            history.record('ping', {'target': 'a', 'rtt_ms': None}, ts=BASE + i)
+
+    rollups = list(store.query('rollup_1m'))
+    assert [r['ts'] for r in rollups] == [BASE]
+    first = rollups[0]
+    assert first['series'] == 'ping:rtt_ms:a'
+    assert first['count'] == 60 and first['lost'] == 1
+    assert first['min'] == 10.0 and first['max'] == 19.0
+    assert first['avg'] == pytest.approx(14.5)
+    assert first['p50'] == pytest.approx(14.0, rel=0.03)
+
+    history.tick(BASE + 3600)
+    assert [r['ts'] for r in store.query('rollup_1m')] == [BASE, BASE + 60]
+    assert [r['ts'] for r in store.query('rollup_1h')] == [BASE]
+
+
+def test_query_picks_resolution_and_downsamples(store):
+    history = History(store, clock=lambda: BASE + 3 * 86400)
+    for i in range(0, 3 * 86400, 10):
+        history.add('traffic:rx_bps', 1e6 + (i % 3600), ts=BASE + i)
+
+    day = history.query('traffic:rx_bps', BASE, BASE + 86400, max_points=100, max_buckets=1000)
+    assert day['resolution'] == '1h'
+    assert len(day['ts']) == 24
+
+    fine = history.query('traffic:rx_bps', BASE, BASE + 86400, max_points=100, max_buckets=5000)
+    assert fine['resolution'] == '1m'
+    assert len(fine['ts']) == 100
+    assert fine['ts'][0] == BASE
+
+    started = time.perf_counter()
+    month = history.query('traffic:rx_bps', BASE, BASE + 30 * 86400, max_points=500)
+    assert month['resolution'] == '1h'
+    assert time.perf_counter() - started < 1.0
+    # Текущий, еще не закрытый интервал тоже попадает в выборку
+    assert month['ts'][-1] == BASE + 3 * 86400 - 3600
+
+
+def test_raw_query_for_short_ranges(store):
+    history = History(store, clock=lambda: BASE + 100)
+    for i in range(10):
+        record = {'target': 'a', 'rtt_ms': float(i) if i != 3 else None}
+        store.append('ping', record, ts=BASE + i)
+        store.append('ping', {'target': 'b', 'rtt_ms': 99.0}, ts=BASE + i)
+    columns = history.query(series_key('ping', 'rtt_ms', 'a'), BASE, BASE + 100)
+    assert columns['resolution'] == 'raw'
+    assert columns['avg'] == [0.0, 1.0, 2.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0]
+
+
+def test_flushed_partial_interval_is_merged(store):
+    history = History(store, clock=lambda: BASE + 30)
+    history.add('ping:rtt_ms', 10.0, ts=BASE + 1)
+    history.flush()
+    history.add('ping:rtt_ms', 30.0, ts=BASE + 2)
+    history.flush()
+    columns = history.query('ping:rtt_ms', BASE, BASE + 86400, raw_span=0)
+    assert columns['resolution'] == '1m'
+    assert columns['count'] == [2]
+    assert columns['avg'] == [20.0]
+    assert columns['min'] == [10.0] and columns['max'] == [30.0]
+
+
+def test_rollup_query_reads_only_its_series(tmp_path, monkeypatch):
+    """Тест что запрос агрегатов не разбирает агрегаты других рядов"""
+    store = ResultsStore(str(tmp_path / 'store'), kind_segment_seconds=ROLLUP_SEGMENT_SECONDS)
+    history = History(store, clock=lambda: BASE + 3 * 3600)
+    for minute in range(3 * 60):
+        for target in range(50):
+            history.record('ping', {'target': f'host{target}', 'rtt_ms': float(target)}, ts=BASE + minute * 60)
+    history.flush()
+    store.flush()
+
+    parsed = []
+    real_loads = json.loads
+    monkeypatch.setattr(json, 'loads', lambda line: parsed.append(line) or real_loads(line))
+    columns = history.query(series_key('ping', 'rtt_ms', 'host7'), BASE, BASE + 3 * 3600, raw_span=0)
+    monkeypatch.undo()
+    store.close()
+
+    assert columns['resolution'] == '1m' and len(columns['ts']) == 180
+    assert set(columns['avg']) == {7.0}
+    assert len(parsed) == 180
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    xs = list(range(1000))
+    ys = [math.sin(x / 50) for x in xs]
+    ys[500] = 10.0
+    indices = lttb(xs, ys, 50)
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert 500 in indices
+    assert indices == sorted(indices)
+    assert lttb(xs[:10], ys[:10], 50) == list(range(10))
+
+
+def test_exports(tmp_path):
+    columns = {'series': 'ping:rtt_ms', 'resolution': '1m', 'ts': [BASE, BASE + 60],
+               'avg': [1.5, 2.5], 'min': [1.0, 2.0], 'max': [2.0, 3.0], 'p95': [2.0, None], 'count': [2, 2]}
+    export_csv(str(tmp_path / 'h.csv'), columns)
+    lines = (tmp_path / 'h.csv').read_text(encoding='utf-8').splitlines()
+    assert lines[0] == 'time,ts,avg,min,max,p95,count'
+    assert len(lines) == 3
+
+    export_columnar(str(tmp_path / 'h.npcol'), columns)
+    loaded = read_columnar(str(tmp_path / 'h.npcol'))
+    assert loaded['series'] == 'ping:rtt_ms'
+    assert loaded['avg'] == [1.5, 2.5]
+    assert math.isnan(loaded['p95'][1])
@@ -0,0 +1,94 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_probe import HttpProbe
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        Handler.connections += 1
+
+    def do_HEAD(self):
+        status = 204 if self.path == '/generate_204' else 404
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_GET = do_HEAD
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.connections = 0
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_keep_alive_connection_is_reused(server):
+    """Тест что повторные проверки не открывают новое соединение"""
+    probe = HttpProbe(endpoints=[f"{server}/generate_204"])
+    first = probe.check_any()
+    second = probe.check_any()
+    probe.close()
+
+    assert first.ok and second.ok
+    assert first.status == 204
+    assert not first.reused and second.reused
+    assert first.dns_ms is not None and first.connect_ms is not None
+    assert second.connect_ms is None
+    assert second.first_byte_ms is not None
+    assert Handler.connections == 1
+
+
+def test_falls_back_to_next_endpoint(server):
+    probe = HttpProbe(endpoints=[f"{server}/missing", f"{server}/generate_204"])
+    timing = probe.check_any()
+    probe.close()
+    assert timing.ok
+    assert timing.url.endswith('/generate_204')
+
+
+class IdleClosingHandler(Handler):
+    def do_HEAD(self):
+        super().do_HEAD()
+        # Сервер молча закрывает keep-alive соединение после ответа
+        self.close_connection = True
+
+
+def test_reconnects_when_server_drops_idle_connection():
+    Handler.connections = 0
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), IdleClosingHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        probe = HttpProbe(endpoints=[f"http://127.0.0.1:{httpd.server_address[1]}/generate_204"], timeout=1)
+        assert probe.check_any().ok
+        timing = probe.check_any()
+        probe.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+    assert timing.ok
+    assert not timing.reused
+    assert Handler.connections == 2
+
+
+def test_unreachable_endpoint_reports_error():
+    probe = HttpProbe(endpoints=['http://127.0.0.1:9/generate_204'], timeout=1)
+    timing = probe.check_any()
+    assert not timing.ok
+    assert timing.error is not None
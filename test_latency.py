@@ -0,0 +1,102 @@
+import errno
+import socket
+
+import pytest
+
+from latency import ICMP_ECHO_REPLY, LatencyEngine, _checksum, _echo_request, _parse_echo_reply
+
+
+@pytest.fixture
+def listener():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(128)
+    yield server.getsockname()[1]
+    server.close()
+
+
+def test_tcp_probe_against_local_listener(listener):
+    """Тест замера задержки через TCP на loopback"""
+    engine = LatencyEngine(timeout=1)
+    sample = engine.probe('127.0.0.1', listener)
+    assert sample.ok
+    assert sample.method == 'tcp'
+    assert 0 <= sample.rtt_ms < 1000
+
+
+def test_many_probes_in_flight(listener):
+    """Тест что десятки замеров выполняются одновременно"""
+    engine = LatencyEngine(timeout=1)
+    samples = engine.probe_many([('127.0.0.1', listener)] * 50)
+    assert len(samples) == 50
+    assert all(s.ok for s in samples)
+
+
+def test_unresolvable_host_reports_error():
+    engine = LatencyEngine(timeout=0.5, prefer_icmp=False)
+    sample = engine.probe('host.invalid', 80)
+    assert not sample.ok
+    assert sample.error is not None
+
+
+def test_echo_request_checksum_is_valid():
+    assert _checksum(_echo_request(0x1234, 7)) == 0
+
+
+def test_icmp_probe_to_loopback():
+    engine = LatencyEngine(timeout=1)
+    if not engine.icmp_available:
+        pytest.skip("ICMP datagram-сокеты запрещены в этой системе")
+    sample = engine.probe('127.0.0.1')
+    assert sample.ok
+    assert sample.method == 'icmp'
+
+
+def test_echo_reply_with_and_without_ip_header():
+    """Тест разбора ответа: Linux без IP-заголовка, macOS/BSD с ним"""
+    reply = bytes((ICMP_ECHO_REPLY,)) + _echo_request(1, 7)[1:]
+    ip_header = bytes((0x45,)) + bytes(19)
+    assert _parse_echo_reply(reply) == 7
+    assert _parse_echo_reply(ip_header + reply) == 7
+    assert _parse_echo_reply(_echo_request(1, 7)) is None
+    assert _parse_echo_reply(ip_header) is None
+
+
+def test_target_without_ipv4_falls_back_to_tcp(listener, monkeypatch):
+    """Тест что цель только с IPv6-адресом проверяется по TCP, а не дает ошибку"""
+    real_getaddrinfo = socket.getaddrinfo
+
+    def getaddrinfo(host, port, family=0, *args):
+        if family == socket.AF_INET:
+            raise socket.gaierror(socket.EAI_NONAME, "no IPv4 address")
+        return real_getaddrinfo('127.0.0.1', port, socket.AF_INET, *args)
+
+    engine = LatencyEngine(timeout=1, tcp_port=listener)
+    engine._icmp_available = True
+    monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+    sample = engine.probe('ipv6-only.test')
+    assert sample.ok and sample.method == 'tcp' and sample.port == listener
+
+
+def test_immediate_refusal_counts_as_reachable(monkeypatch):
+    """Тест что немедленный ECONNREFUSED из connect_ex — ответ хоста, как и отказ после ожидания"""
+    monkeypatch.setattr(socket.socket, 'connect_ex', lambda self, address: errno.ECONNREFUSED)
+    sample = LatencyEngine(timeout=0.5, prefer_icmp=False).probe('127.0.0.1', 9)
+    assert sample.ok
+
+
+def test_socket_failure_mid_batch_closes_created_sockets(listener, monkeypatch):
+    created = []
+    real_socket = socket.socket
+
+    class FlakySocket(real_socket):
+        def __init__(self, *args, **kwargs):
+            if len(created) == 3:
+                raise OSError(errno.EMFILE, "too many open files")
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(socket, 'socket', FlakySocket)
+    samples = LatencyEngine(timeout=1, prefer_icmp=False).probe_many([('127.0.0.1', listener)] * 5)
+    assert [s.ok for s in samples] == [True, True, True, False, False]
+    assert all(sock.fileno() == -1 for sock in created)
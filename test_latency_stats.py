@@ -0,0 +1,62 @@
+from latency_stats import LatencyStats, LatencyStatsRegistry
+from monitor_engine import latency_level
+
+
+def test_percentiles_within_histogram_precision():
+    """Тест что перцентили совпадают с точными с погрешностью корзины"""
+    stats = LatencyStats()
+    for i in range(1, 1001):
+        stats.add(float(i) / 10, now=10.0)
+
+    summary = stats.summary('1m', now=10.0)
+    assert summary['count'] == 1000
+    assert abs(summary['p50'] - 50.0) / 50.0 < 0.03
+    assert abs(summary['p95'] - 95.0) / 95.0 < 0.03
+    assert abs(summary['p99'] - 99.0) / 99.0 < 0.03
+    assert abs(summary['avg'] - 50.05) < 1e-6
+
+
+def test_loss_and_jitter():
+    stats = LatencyStats()
+    for i in range(100):
+        stats.add(None if i % 10 == 0 else (20.0 if i % 2 else 30.0), now=float(i) / 10)
+
+    summary = stats.summary('1m', now=10.0)
+    assert summary['loss_pct'] == 10
+    # Чередование 20/30 мс дает джиттер, стремящийся к 10 мс
+    assert 8 < summary['jitter'] <= 10
+
+
+def test_windows_expire_old_samples():
+    stats = LatencyStats()
+    stats.add(500.0, now=0.0)
+    stats.add(10.0, now=120.0)
+
+    assert stats.summary('1m', now=120.0)['count'] == 1
+    assert stats.summary('5m', now=120.0)['count'] == 2
+    assert stats.summary('1h', now=7200.0)['count'] == 0
+
+
+def test_quality_level_comes_from_window():
+    registry = LatencyStatsRegistry()
+    for i in range(20):
+        registry.add('8.8.8.8', 30.0, now=float(i))
+    assert latency_level(registry.summary('8.8.8.8', now=20.0)) == 'success'
+
+    for i in range(5):
+        registry.add('8.8.8.8', None, now=20.0 + i)
+    assert latency_level(registry.summary('8.8.8.8', now=25.0)) == 'error'
+    assert registry.summary('unknown') is None
+
+
+def test_jitter_is_computed_per_window():
+    stats = LatencyStats()
+    # Час назад связь была неровной (20/80 мс), последнюю минуту — ровной
+    for i in range(60):
+        stats.add(20.0 if i % 2 else 80.0, now=float(i))
+    for i in range(60):
+        stats.add(30.0, now=3000.0 + i)
+
+    assert stats.summary('1m', now=3060.0)['jitter'] == 0
+    assert stats.summary('1h', now=3060.0)['jitter'] > 25
+    assert stats.summary('5m', now=9000.0)['jitter'] is None
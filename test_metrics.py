@@ -0,0 +1,107 @@
+import threading
+import urllib.request
+
+import pytest
+
+from metrics import CONTENT_TYPE, MetricsRegistry, MetricsServer
+
+
+def test_exposition_format():
+    registry = MetricsRegistry(max_age=0)
+    up = registry.gauge('netmon_up', "Доступность")
+    probes = registry.counter('netmon_probes', "Проверки", ('target', 'result'))
+    rtt = registry.histogram('netmon_rtt_seconds', "Задержка", ('target',), buckets=(0.01, 0.1))
+
+    up.set(1)
+    probes.labels('a"b', 'ok').inc()
+    probes.labels('a"b', 'ok').inc(2)
+    rtt.labels('x').observe(0.005)
+    rtt.labels('x').observe(0.05)
+    rtt.labels('x').observe(3)
+
+    text = registry.exposition().decode('utf-8')
+    assert '# TYPE netmon_up gauge\n' in text
+    assert 'netmon_up 1\n' in text
+    assert 'netmon_probes_total{target="a\\"b",result="ok"} 3\n' in text
+    assert 'netmon_rtt_seconds_bucket{target="x",le="0.01"} 1\n' in text
+    assert 'netmon_rtt_seconds_bucket{target="x",le="0.1"} 2\n' in text
+    assert 'netmon_rtt_seconds_bucket{target="x",le="+Inf"} 3\n' in text
+    assert 'netmon_rtt_seconds_count{target="x"} 3\n' in text
+    assert text.endswith('# EOF\n')
+
+
+def test_float_values_are_canonical():
+    registry = MetricsRegistry(max_age=0)
+    gauge = registry.gauge('level', "Уровень", ('state',))
+    rtt = registry.histogram('rtt_seconds', "Задержка", buckets=(0.5, 1, 2.5))
+    gauge.labels('nan').set(float('nan'))
+    gauge.labels('low').set(float('-inf'))
+    gauge.labels('float').set(2.0)
+    rtt.observe(1)
+
+    text = registry.exposition().decode('utf-8')
+    assert 'rtt_seconds_bucket{le="1.0"} 1\n' in text
+    assert 'rtt_seconds_bucket{le="+Inf"} 1\n' in text
+    assert 'level{state="nan"} NaN\n' in text
+    assert 'level{state="low"} -Inf\n' in text
+    assert 'level{state="float"} 2.0\n' in text
+
+
+def test_exposition_is_cached_until_max_age():
+    now = [0.0]
+    registry = MetricsRegistry(max_age=5, clock=lambda: now[0])
+    counter = registry.counter('events', "События")
+    first = registry.exposition()
+    counter.inc()
+    assert registry.exposition() is first
+    now[0] = 5
+    assert b'events_total 1\n' in registry.exposition()
+
+
+def test_labels_and_remove():
+    registry = MetricsRegistry(max_age=0)
+    rtt = registry.histogram('rtt_seconds', "Задержка", ('target',))
+    rtt.labels('a').observe(0.01)
+    rtt.remove('a')
+    assert b'target="a"' not in registry.exposition()
+    with pytest.raises(ValueError):
+        rtt.labels('a', 'b')
+    with pytest.raises(ValueError):
+        registry.counter('rtt_seconds', "Повтор")
+    with pytest.raises(ValueError):
+        registry.counter('c', "Счетчик").inc(-1)
+
+
+def test_concurrent_updates_are_not_lost():
+    registry = MetricsRegistry(max_age=0)
+    counter = registry.counter('hits', "Попадания", ('target',))
+    histogram = registry.histogram('rtt_seconds', "Задержка")
+
+    def work():
+        child = counter.labels('t')
+        for i in range(10000):
+            child.inc()
+            histogram.observe(0.02)
+            if i % 1000 == 0:
+                registry.exposition()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    text = registry.exposition().decode('utf-8')
+    assert 'hits_total{target="t"} 40000\n' in text
+    assert 'rtt_seconds_count 40000\n' in text
+
+
+def test_metrics_endpoint():
+    registry = MetricsRegistry()
+    registry.gauge('netmon_up', "Доступность").set(1)
+    server = MetricsServer(registry, port=0).start()
+    try:
+        with urllib.request.urlopen(server.url, timeout=5) as response:
+            assert response.headers['Content-Type'] == CONTENT_TYPE
+            assert b'netmon_up 1\n' in response.read()
+    finally:
+        server.stop()
@@ -0,0 +1,67 @@
+import io
+import json
+import socket
+import subprocess
+import sys
+import threading
+
+import monitor_daemon
+from latency import LatencyEngine
+from monitor_engine import NetworkMonitorEngine
+
+
+def test_headless_mode_does_not_import_tkinter():
+    """Тест что консольный режим не загружает tkinter"""
+    code = ("import sys, network_monitor, monitor_daemon; "
+            "sys.exit('tkinter' in sys.modules)")
+    assert subprocess.run([sys.executable, '-c', code]).returncode == 0
+
+
+def test_daemon_writes_json_events(tmp_path):
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(16)
+    try:
+        engine = NetworkMonitorEngine(data_dir=str(tmp_path), ping_target='127.0.0.1',
+                                      ping_interval=0.05, status_interval=0.05)
+        engine.latency = LatencyEngine(timeout=1, prefer_icmp=False, tcp_port=server.getsockname()[1])
+        engine.check_internet_connection = lambda: True
+
+        args = monitor_daemon.build_parser().parse_args(['--duration', '0.5'])
+        output = io.StringIO()
+        monitor_daemon.run(engine, args, output=output, stop_event=threading.Event())
+    finally:
+        server.close()
+
+    events = [json.loads(line) for line in output.getvalue().splitlines()]
+    kinds = {e['kind'] for e in events}
+    assert {'log', 'status', 'ping'} <= kinds
+    ping = next(e for e in events if e['kind'] == 'ping')
+    assert ping['status'] == 'ok' and ping['method'] == 'tcp'
+    status = next(e for e in events if e['kind'] == 'status')
+    assert status['online'] is True
+
+
+def test_daemon_watches_targets_from_file(tmp_path):
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(64)
+    port = server.getsockname()[1]
+    targets_file = tmp_path / 'targets.json'
+    targets_file.write_text(json.dumps([{'name': f"svc{i}", 'host': '127.0.0.1', 'port': port,
+                                         'interval': 0.1} for i in range(5)]), encoding='utf-8')
+    try:
+        engine = NetworkMonitorEngine(data_dir=str(tmp_path), status_interval=0.2)
+        engine.check_internet_connection = lambda: True
+        args = monitor_daemon.build_parser().parse_args(
+            ['--duration', '0.7', '--targets-file', str(targets_file)])
+        output = io.StringIO()
+        monitor_daemon.run(engine, args, output=output, stop_event=threading.Event())
+    finally:
+        server.close()
+
+    events = [json.loads(line) for line in output.getvalue().splitlines()]
+    summaries = [e for e in events if e['kind'] == 'targets']
+    assert summaries and summaries[-1]['targets'] == 5
+    assert summaries[-1]['up'] == 5
+    assert engine.stats.summary('svc0')['count'] >= 3
@@ -0,0 +1,191 @@
+import io
+import os
+import subprocess
+import threading
+
+import pytest
+
+from ping_process import PingBackend, PingOutputParser, ping_command
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'ping')
+
+
+def read_fixture(name, encoding='utf-8'):
+    with open(os.path.join(FIXTURES, name), 'r', encoding=encoding, newline='') as f:
+        return f.read().splitlines()
+
+
+def parse(name, platform, encoding='utf-8'):
+    parser = PingOutputParser('8.8.8.8', platform)
+    samples = [sample for line in read_fixture(name, encoding) for sample in parser.feed(line)]
+    return samples, parser.summary
+
+
+def test_command_per_platform():
+    assert ping_command('8.8.8.8', 3, platform='win32') == ['ping', '-w', '2000', '-n', '3', '8.8.8.8']
+    assert ping_command('8.8.8.8', platform='win32') == ['ping', '-w', '2000', '-t', '8.8.8.8']
+    assert ping_command('8.8.8.8', 3, interval=0.5, platform='linux') == \
+        ['ping', '-n', '-O', '-i', '0.5', '-W', '2', '-c', '3', '8.8.8.8']
+    assert '-O' not in ping_command('8.8.8.8', 3, platform='linux', report_lost=False)
+    assert ping_command('8.8.8.8', None, platform='linux')[-1] == '8.8.8.8'
+    assert '-c' not in ping_command('8.8.8.8', None, platform='linux')
+    assert ping_command('8.8.8.8', 1, timeout=1.5, platform='darwin') == \
+        ['ping', '-n', '-i', '1', '-W', '1500', '-c', '1', '8.8.8.8']
+
+
+def test_linux_iputils_output():
+    samples, summary = parse('linux_iputils.txt', 'linux')
+    assert [s.rtt_ms for s in samples] == [14.2, 13.9, None, 21.5, None, 0.873]
+    assert [s.ttl for s in samples if s.ok] == [117, 117, 117, 117]
+    assert all(s.method == 'ping' for s in samples)
+    assert (summary.sent, summary.received) == (6, 4)
+    assert summary.loss_pct == pytest.approx(33.3333)
+
+
+def test_busybox_output():
+    samples, summary = parse('linux_busybox.txt', 'linux')
+    assert [s.rtt_ms for s in samples] == [9.614, 9.385, 10.012]
+    assert summary.loss_pct == 0
+
+
+def test_macos_output():
+    samples, summary = parse('macos.txt', 'darwin')
+    assert [s.rtt_ms for s in samples] == [18.431, None, 17.902, 19.055]
+    assert samples[0].ttl == 116
+    assert summary.loss_pct == 25.0
+
+
+def test_windows_english_output():
+    samples, summary = parse('windows_en.txt', 'win32')
+    assert [s.rtt_ms for s in samples] == [15.0, 0.5, None, 16.0]
+    assert samples[0].ttl == 117
+    assert (summary.sent, summary.received, summary.loss_pct) == (4, 3, 25.0)
+
+
+def test_windows_russian_oem_output():
+    samples, summary = parse('windows_ru_cp866.txt', 'win32', encoding='cp866')
+    assert [s.rtt_ms for s in samples] == [14.0, None, 15.0]
+    assert (summary.sent, summary.received) == (3, 2)
+
+
+def test_windows_unreachable_counts_as_loss():
+    samples, _ = parse('windows_unreachable.txt', 'win32')
+    assert [s.ok for s in samples] == [False, False]
+
+
+def test_late_reply_after_loss_is_ignored():
+    parser = PingOutputParser('h', 'linux')
+    parser.feed('no answer yet for icmp_seq=1')
+    assert parser.feed('64 bytes from h: icmp_seq=1 ttl=64 time=2500 ms') == []
+
+
+class FakeProcess:
+    def __init__(self, lines):
+        self.stdout = io.StringIO(''.join(line + '\n' for line in lines))
+        self.returncode = None
+        self.terminated = False
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self.terminated = True
+        self.returncode = -15
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+
+def test_long_lived_process_streams_samples():
+    commands = []
+    processes = []
+
+    def popen(args, **kwargs):
+        commands.append(args)
+        processes.append(FakeProcess(read_fixture('linux_iputils.txt')))
+        return processes[-1]
+
+    received = []
+    done = threading.Event()
+
+    def on_sample(sample):
+        received.append(sample)
+        if len(received) == 6:
+            done.set()
+
+    backend = PingBackend(popen=popen, platform='linux')
+    backend.watch('8.8.8.8', on_sample)
+    backend.watch('8.8.8.8', on_sample)
+    assert done.wait(5)
+    # Для одной цели запускается один процесс
+    assert len(commands) == 1 and '-c' not in commands[0]
+    assert backend.probe('8.8.8.8').rtt_ms == 0.873
+    backend.close()
+    assert processes[0].terminated
+
+
+def test_busybox_usage_error_restarts_without_report_flag():
+    commands = []
+    received = threading.Event()
+
+    def popen(args, **kwargs):
+        commands.append(args)
+        if '-O' in args:
+            return FakeProcess(["ping: unrecognized option '-O'", "BusyBox v1.36.1 multi-call binary.",
+                                "Usage: ping [OPTIONS] HOST"])
+        return FakeProcess(read_fixture('linux_busybox.txt'))
+
+    exits = []
+    backend = PingBackend(popen=popen, platform='linux')
+    backend.watch('8.8.8.8', lambda sample: received.set(), lambda *args: exits.append(args))
+    assert received.wait(5)
+    backend.close()
+    assert '-O' in commands[0] and '-O' not in commands[1]
+    assert exits[0][0] == '8.8.8.8' and exits[0][3] == 0
+
+
+def test_exited_process_is_restarted_with_backoff():
+    commands = []
+    exits = []
+    restarted = threading.Event()
+
+    def popen(args, **kwargs):
+        commands.append(args)
+        if len(commands) == 3:
+            restarted.set()
+        return FakeProcess(['ping: unknown host nowhere.invalid'])
+
+    backend = PingBackend(popen=popen, platform='linux', max_backoff=0.01)
+    backend.watch('nowhere.invalid', on_exit=lambda *args: exits.append(args))
+    assert restarted.wait(5)
+    backend.close()
+    assert exits[0] == ('nowhere.invalid', None, 'ping: unknown host nowhere.invalid', 0.01)
+
+
+def test_one_shot_probe_uses_reported_rtt():
+    def run(args, **kwargs):
+        assert args[:2] == ['ping', '-w'] and '-n' in args
+        return subprocess.CompletedProcess(args, 0, '\r\n'.join(read_fixture('windows_en.txt')), '')
+
+    backend = PingBackend(run=run, platform='win32')
+    sample = backend.probe('8.8.8.8', count=4)
+    assert sample.ok and sample.rtt_ms == 0.5
+
+    backend = PingBackend(run=lambda args, **kwargs: subprocess.CompletedProcess(args, 1, '', ''),
+                          platform='linux')
+    assert not backend.probe('10.255.255.1').ok
+
+
+def test_one_shot_probe_retries_without_report_flag():
+    calls = []
+
+    def run(args, **kwargs):
+        calls.append(args)
+        if '-O' in args:
+            return subprocess.CompletedProcess(args, 1, '', "ping: unrecognized option '-O'\n")
+        return subprocess.CompletedProcess(args, 0, '\n'.join(read_fixture('linux_busybox.txt')), '')
+
+    backend = PingBackend(run=run, platform='linux')
+    assert backend.probe('8.8.8.8', count=3).rtt_ms == 9.385
+    assert backend.probe('8.8.8.8', count=3).ok
+    assert len(calls) == 3
@@ -0,0 +1,103 @@
+import threading
+import time
+
+from probe_scheduler import ProbeScheduler
+
+
+def test_drain_does_not_block_on_hanging_probe():
+    """Тест что главный поток не ждет зависшую проверку"""
+    release = threading.Event()
+    scheduler = ProbeScheduler()
+    scheduler.add_job('hang', lambda: release.wait(10), 0.05)
+    scheduler.add_job('fast', lambda: True, 0.05)
+    scheduler.start()
+    try:
+        handled = []
+        worst_tick = 0.0
+        deadline = time.monotonic() + 0.5
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            scheduler.drain(handled.append)
+            worst_tick = max(worst_tick, time.perf_counter() - started)
+            time.sleep(0.01)
+
+        assert worst_tick < 0.005
+        assert any(r.name == 'fast' and r.value is True for r in handled)
+        assert not any(r.name == 'hang' for r in handled)
+    finally:
+        release.set()
+        scheduler.stop()
+
+
+def test_probe_errors_are_reported():
+    """Тест что исключение проверки попадает в результат"""
+    def broken():
+        raise OSError("network down")
+
+    scheduler = ProbeScheduler()
+    scheduler.add_job('broken', broken, 10)
+    scheduler.start()
+    try:
+        result = scheduler.results.get(timeout=2)
+        assert result.name == 'broken'
+        assert not result.ok
+        assert isinstance(result.error, OSError)
+    finally:
+        scheduler.stop()
+
+
+def test_set_interval_reschedules_without_duplicates():
+    """Тест что новый интервал действует сразу, а старая запись в очереди не срабатывает"""
+    runs = []
+    scheduler = ProbeScheduler()
+    scheduler.add_job('slow', lambda: runs.append(time.monotonic()), 60, run_now=False)
+    scheduler.start()
+    try:
+        scheduler.set_interval('slow', 0.05)
+        time.sleep(0.5)
+        assert 5 <= len(runs) <= 11
+        assert scheduler.has_job('slow')
+    finally:
+        scheduler.stop()
+
+
+def test_set_interval_during_run_does_not_start_duplicate():
+    """Тест что смена интервала во время долгого запуска не запускает его повторно"""
+    release = threading.Event()
+    runs = []
+
+    def slow():
+        runs.append(time.monotonic())
+        release.wait(5)
+
+    scheduler = ProbeScheduler()
+    scheduler.add_job('speedtest', slow, 60, blocking=True)
+    scheduler.start()
+    try:
+        time.sleep(0.1)
+        scheduler.set_interval('speedtest', 0.05)
+        time.sleep(0.3)
+        assert len(runs) == 1
+        release.set()
+        time.sleep(0.2)
+        assert len(runs) >= 2
+    finally:
+        release.set()
+        scheduler.stop()
+
+
+def test_blocking_jobs_do_not_starve_short_probes():
+    """Тест что зависшие долгие проверки не занимают потоки коротких"""
+    release = threading.Event()
+    runs = []
+    scheduler = ProbeScheduler(max_workers=2, blocking_workers=4)
+    for name in ('status', 'dns', 'diagnostics', 'speedtest'):
+        scheduler.add_job(name, lambda: release.wait(10), 0.05, blocking=True)
+    scheduler.add_job('traffic', lambda: runs.append(1), 0.05)
+    scheduler.start()
+    try:
+        time.sleep(0.5)
+        assert len(runs) >= 5
+    finally:
+        release.set()
+        scheduler.stop()
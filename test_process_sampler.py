@@ -0,0 +1,98 @@
+from collections import namedtuple
+
+from process_sampler import ProcessSampler
+
+Connection = namedtuple('Connection', ('pid', 'laddr', 'raddr', 'status'))
+Io = namedtuple('Io', ('read_chars', 'write_chars'))
+
+
+class FakeProcess:
+    def __init__(self, pid, io):
+        self.pid = pid
+        self.io = io
+
+    def name(self):
+        return {10: 'browser', 20: 'backup', 30: 'sshd'}[self.pid]
+
+    def io_counters(self):
+        if self.pid not in self.io:
+            raise PermissionError("access denied")
+        return self.io[self.pid]
+
+
+def connection(pid, port, remote='203.0.113.1', status='ESTABLISHED'):
+    return Connection(pid, ('10.0.0.2', port), (remote, 443) if remote else (), status)
+
+
+def make_sampler(state, io, top=5):
+    opened = []
+
+    def open_process(pid):
+        opened.append(pid)
+        return FakeProcess(pid, io)
+
+    now = [0.0]
+
+    def clock():
+        now[0] += 2.0
+        return now[0]
+
+    sampler = ProcessSampler(top=top, connections=lambda: list(state), process=open_process, clock=clock)
+    return sampler, opened
+
+
+def test_connections_are_attributed_incrementally():
+    state = [connection(10, 5000), connection(10, 5001, '198.51.100.7'), connection(30, 22, None, 'LISTEN'),
+             connection(None, 6000, status='TIME_WAIT')]
+    sampler, opened = make_sampler(state, io={})
+    top = {u.pid: u for u in sampler.sample()}
+    assert top[10].connections == 2 and top[10].established == 2
+    assert top[30].listening == 1 and top[30].name == 'sshd'
+    assert top[None].name == '—'
+    assert sampler.total_connections == 4
+
+    state[1] = connection(10, 5002, '203.0.113.1')
+    state.append(connection(30, 22, '192.0.2.9'))
+    top = {u.pid: u for u in sampler.sample()}
+    assert top[10].connections == 2
+    assert top[10].to_dict()['remotes'] == ['203.0.113.1']
+    assert top[30].connections == 2
+    # Сведения о процессе запрашиваются один раз
+    assert sorted(opened) == [10, 30]
+
+
+def test_io_rates_rank_top_talkers():
+    state = [connection(10, 5000), connection(10, 5001), connection(20, 5002)]
+    io = {10: Io(1_000, 1_000), 20: Io(1_000, 1_000)}
+    sampler, _ = make_sampler(state, io, top=1)
+    first = sampler.sample()
+    # Без скорости впереди процесс с большим числом соединений
+    assert first[0].pid == 10 and first[0].read_bps is None
+
+    io[10] = Io(2_000, 1_000)
+    io[20] = Io(1_000, 251_000)
+    top = sampler.sample()
+    assert [u.pid for u in top] == [20]
+    assert top[0].write_bps == 250_000 * 8 / 2.0
+    assert top[0].read_bps == 0
+
+
+def test_closed_processes_are_forgotten():
+    state = [connection(10, 5000), connection(20, 5001)]
+    sampler, opened = make_sampler(state, io={10: Io(0, 0)})
+    sampler.sample()
+    state.pop()
+    for _ in range(3):
+        top = sampler.sample()
+    assert [u.pid for u in top] == [10]
+    state.append(connection(20, 5003))
+    sampler.sample()
+    assert opened.count(20) == 2
+
+
+def test_unreadable_counters_keep_connection_counts():
+    state = [connection(30, 22)]
+    sampler, _ = make_sampler(state, io={})
+    sampler.sample()
+    top = sampler.sample()
+    assert top[0].connections == 1 and top[0].read_bps is None
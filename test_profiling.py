@@ -0,0 +1,102 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from metrics import MetricsRegistry
+from monitor_engine import NetworkMonitorEngine
+from probe_scheduler import ProbeScheduler
+from profiling import Profiler
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def busy_function():
+    return sum(i * i for i in range(20_000))
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    with profiler.stage('status'):
+        pass
+    assert profiler.stage('status') is profiler.stage('traffic')
+    assert profiler.report()['stages'] == {}
+
+
+def test_stage_timers_feed_metrics():
+    registry = MetricsRegistry(max_age=0)
+    profiler = Profiler(registry=registry)
+    profiler.enable_timers()
+    for _ in range(3):
+        with profiler.stage('status'):
+            time.sleep(0.01)
+    stages = profiler.report()['stages']
+    assert stages['status']['count'] == 3
+    assert stages['status']['max_s'] >= 0.01
+    assert 'netmon_stage_seconds_count{stage="status"} 3' in registry.exposition().decode()
+
+
+def test_capture_profiles_stages_in_worker_threads(tmp_path):
+    profiler = Profiler(output_dir=str(tmp_path))
+    profiler.start()
+
+    def worker():
+        with profiler.stage('worker'):
+            busy_function()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    leaked = [bytearray(1024) for _ in range(1000)]
+    report = profiler.stop()
+
+    assert 'busy_function' in report['cprofile']
+    assert report['stages']['worker']['count'] == 1
+    assert any('test_profiling.py' in line for line in report['memory'])
+    assert sorted(os.path.basename(path).split('-', 2)[-1] for path in report['files']) == \
+        ['cprofile.prof', 'report.json']
+    assert not profiler.active
+    del leaked
+
+
+def test_scheduler_jobs_are_timed_as_stages():
+    profiler = Profiler()
+    profiler.enable_timers()
+    done = threading.Event()
+    scheduler = ProbeScheduler(on_result=lambda result: done.set(), profiler=profiler)
+    scheduler.add_job('status', busy_function, 60)
+    scheduler.start()
+    try:
+        assert done.wait(5)
+    finally:
+        scheduler.stop()
+    assert profiler.report()['stages']['status']['count'] == 1
+
+
+def test_trigger_file_toggles_capture_on_running_engine(tmp_path):
+    engine = NetworkMonitorEngine(data_dir=str(tmp_path))
+    try:
+        assert engine.poll_profiler() is None
+        open(os.path.join(str(tmp_path), 'profiling.on'), 'w').close()
+        assert engine.poll_profiler() == 'started'
+        engine.record('ping', {'target': '8.8.8.8', 'rtt_ms': 12.0})
+        engine.flush_records()
+        assert engine.profiler.report()['stages']['store']['count'] == 1
+        os.remove(os.path.join(str(tmp_path), 'profiling.on'))
+        assert engine.poll_profiler() == 'stopped'
+    finally:
+        engine.stop()
+    files = os.listdir(os.path.join(str(tmp_path), 'profiles'))
+    assert sorted(name.split('-', 2)[-1] for name in files) == ['cprofile.prof', 'report.json']
+
+
+def test_benchmark_runner_emits_json(tmp_path):
+    output = tmp_path / 'results.json'
+    subprocess.run([sys.executable, os.path.join(ROOT, 'benchmarks', 'run.py'), '--quick',
+                    '--only', 'log_insert', 'save_test_result', '--output', str(output)],
+                   check=True, timeout=120)
+    document = json.loads(output.read_text(encoding='utf-8'))
+    assert [r['name'] for r in document['results']] == ['save_test_result', 'log_insert']
+    assert document['results'][1]['metrics']['template_us'] > 0
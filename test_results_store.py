@@ -0,0 +1,96 @@
+import json
+import os
+
+from results_store import ResultsStore
+
+
+def test_append_and_query_range(tmp_path):
+    """Тест выборки по диапазону времени через индекс"""
+    store = ResultsStore(str(tmp_path), segment_seconds=100, index_every=4)
+    for i in range(1000):
+        store.append('ping', {'rtt_ms': i}, ts=1_000_000 + i)
+
+    records = list(store.query('ping', 1_000_250, 1_000_260))
+    assert [r['rtt_ms'] for r in records] == list(range(250, 260))
+    store.close()
+    assert len(os.listdir(tmp_path / 'ping')) == 2 * 10
+
+
+def test_partial_line_after_crash_is_skipped(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.append('speedtest', {'download': 10.0}, ts=1000.0)
+    store.close()
+
+    segment = next(p for p in (tmp_path / 'speedtest').iterdir() if p.suffix == '.jsonl')
+    with open(segment, 'ab') as f:
+        f.write(b'{"download": 20')
+
+    store = ResultsStore(str(tmp_path))
+    store.append('speedtest', {'download': 30.0}, ts=1001.0)
+    assert [r['download'] for r in store.query('speedtest')] == [10.0, 30.0]
+    assert store.latest('speedtest')[0]['download'] == 30.0
+    store.close()
+
+
+def test_retention_removes_old_segments(tmp_path):
+    store = ResultsStore(str(tmp_path), segment_seconds=86400, retention_days=7)
+    for day in range(10):
+        store.append('ping', {'rtt_ms': day}, ts=day * 86400)
+    assert store.apply_retention(now=10 * 86400) == 3
+    assert [r['rtt_ms'] for r in store.query('ping')] == list(range(3, 10))
+    store.close()
+
+
+def test_key_query_reads_only_that_key(tmp_path, monkeypatch):
+    """Тест что выборка по цели не разбирает записи других целей"""
+    store = ResultsStore(str(tmp_path), segment_seconds=100)
+    for i in range(300):
+        store.append('ping', {'target': f'host{i % 10}', 'rtt_ms': i}, ts=1000 + i)
+    store.append('ping', {'rtt_ms': -1}, ts=1300)
+    # Закрытые сегменты упакованы в фоне при ротации
+    store.close()
+    assert sorted(p.name for p in (tmp_path / 'ping').iterdir()) == [
+        '19700101T001640.jsonl', '19700101T001640.keys', '19700101T001820.jsonl', '19700101T001820.keys',
+        '19700101T002000.jsonl', '19700101T002000.keys', '19700101T002140.idx', '19700101T002140.jsonl']
+
+    store = ResultsStore(str(tmp_path), segment_seconds=100)
+    store.append('ping', {'target': 'host3', 'rtt_ms': 1000}, ts=1301)
+    parsed = []
+    real_loads = json.loads
+    monkeypatch.setattr(json, 'loads', lambda line: parsed.append(line) or real_loads(line))
+    assert [r['rtt_ms'] for r in store.query('ping', 1050, key='host3')] == list(range(53, 300, 10)) + [1000]
+    # По 10 записей цели в трех упакованных сегментах и одна в открытом
+    assert len(parsed) == 31
+    monkeypatch.undo()
+
+    assert [r['rtt_ms'] for r in store.query('ping')] == list(range(300)) + [-1, 1000]
+    assert [r['rtt_ms'] for r in store.latest('ping', 3)] == [299, -1, 1000]
+    store.close()
+
+
+def test_fsync_only_touches_segments_with_new_records(tmp_path, monkeypatch):
+    store = ResultsStore(str(tmp_path), fsync_batch=1)
+    store.append('speedtest', {'download': 1.0}, ts=1000)
+    synced = []
+    monkeypatch.setattr(os, 'fsync', synced.append)
+    for i in range(5):
+        store.append('ping', {'target': 'a', 'rtt_ms': i}, ts=1000 + i)
+    assert len(synced) == 5 and len(set(synced)) == 1
+    store.close()
+
+
+def test_append_after_packing_keeps_all_records(tmp_path):
+    """Тест дозаписи в уже упакованный сегмент (например, после перезапуска)"""
+    store = ResultsStore(str(tmp_path), segment_seconds=100)
+    for i in range(6):
+        store.append('ping', {'target': 'ab'[i % 2], 'rtt_ms': i}, ts=1000 + i)
+    store.close()
+    assert store.compact(now=2000) == 1
+
+    store = ResultsStore(str(tmp_path), segment_seconds=100)
+    store.append('ping', {'target': 'a', 'rtt_ms': 6}, ts=1006)
+    assert [r['rtt_ms'] for r in store.query('ping', 1001, key='a')] == [2, 4, 6]
+    assert [r['rtt_ms'] for r in store.query('ping', 1001)] == [1, 2, 3, 4, 5, 6]
+    store.close()
+    assert store.apply_retention(now=10 ** 10) == 1
+    assert os.listdir(tmp_path / 'ping') == []
@@ -0,0 +1,108 @@
+import types
+
+import pytest
+
+from speedtest_cache import SpeedtestServerCache
+
+SERVERS = {
+    12.5: [{'id': '1', 'name': 'Moscow', 'country': 'Russia', 'url': 'http://a/upload.php', 'd': 12.5}],
+    40.0: [{'id': '2', 'name': 'Tver', 'country': 'Russia', 'url': 'http://b/upload.php', 'd': 40.0}],
+}
+CONFIG = {'client': {'lat': '55.7', 'lon': '37.6'}, 'sizes': {'upload': [32768]}}
+
+
+def make_module(dead=()):
+    calls = {'config': 0, 'servers': 0, 'best': []}
+
+    class Speedtest:
+        def __init__(self):
+            self.servers = {}
+            self.closest = []
+            self.get_config()
+
+        def get_config(self):
+            calls['config'] += 1
+            self.config = dict(CONFIG)
+            return self.config
+
+        def get_servers(self):
+            calls['servers'] += 1
+            self.servers = SERVERS
+            return self.servers
+
+        def get_best_server(self, servers=None):
+            if servers is None:
+                servers = [s for d in sorted(self.servers) for s in self.servers[d]]
+            calls['best'].append([s['id'] for s in servers])
+            alive = [s for s in servers if s['id'] not in dead]
+            if not alive:
+                raise RuntimeError("Unable to connect to servers to test latency.")
+            return dict(alive[0], latency=10.0)
+
+    return types.SimpleNamespace(Speedtest=Speedtest), calls
+
+
+@pytest.fixture
+def clock():
+    now = [1000.0]
+    return now
+
+
+def make_cache(tmp_path, module, clock):
+    return SpeedtestServerCache(str(tmp_path / 'cache.json'), module, ttl=3600,
+                                revalidate_after=1800, clock=lambda: clock[0])
+
+
+def test_second_run_reuses_cached_best_server(tmp_path, clock):
+    """Тест что повторный тест не загружает конфигурацию и список серверов"""
+    module, calls = make_module()
+    _, best, source = make_cache(tmp_path, module, clock).prepare()
+    assert source == 'discovery' and best['id'] == '1'
+    assert calls['config'] == 1 and calls['servers'] == 1
+
+    clock[0] += 60
+    st, best, source = make_cache(tmp_path, module, clock).prepare()
+    assert source == 'cached_best' and best['id'] == '1'
+    assert calls['config'] == 1 and calls['servers'] == 1
+    assert calls['best'][-1] == ['1']
+    assert st.lat_lon == (55.7, 37.6)
+
+
+def test_falls_back_when_cached_server_fails(tmp_path, clock):
+    module, calls = make_module()
+    make_cache(tmp_path, module, clock).prepare()
+
+    dead_module, dead_calls = make_module(dead={'1'})
+    _, best, source = make_cache(tmp_path, dead_module, clock).prepare()
+    assert source == 'cached_servers' and best['id'] == '2'
+    assert dead_calls['servers'] == 0
+
+    everything_dead, calls = make_module(dead={'1', '2'})
+    with pytest.raises(RuntimeError):
+        make_cache(tmp_path, everything_dead, clock).prepare()
+    assert calls['servers'] == 1
+
+
+def test_expired_cache_triggers_discovery_and_stale_cache_revalidates(tmp_path, clock):
+    module, calls = make_module()
+    cache = make_cache(tmp_path, module, clock)
+    cache.prepare()
+
+    clock[0] += 2000
+    _, _, source = cache.prepare()
+    assert source == 'cached_best'
+    cache._revalidating.join(timeout=5)
+    assert calls['servers'] == 2
+
+    clock[0] += 4000
+    _, _, source = cache.prepare()
+    assert source == 'discovery'
+
+
+def test_invalidate_best(tmp_path, clock):
+    module, calls = make_module()
+    cache = make_cache(tmp_path, module, clock)
+    cache.prepare()
+    cache.invalidate_best()
+    _, _, source = cache.prepare()
+    assert source == 'cached_servers'
@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Модули, которые загружаются только при первом использовании функции
+DEFERRED = ('speedtest', 'requests', 'psutil', 'tkinter', 'asyncio')
+
+# Бюджет времени импорта с большим запасом для медленных машин CI
+IMPORT_BUDGET_SECONDS = 1.0
+
+
+def run_fresh(script, *args):
+    completed = subprocess.run([sys.executable, '-c', script, *args], cwd=ROOT,
+                               capture_output=True, text=True, timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def test_engine_startup_defers_heavy_imports(tmp_path):
+    result = run_fresh(f"""
+import json, sys, time
+started = time.perf_counter()
+import network_monitor, monitor_engine
+elapsed = time.perf_counter() - started
+engine = monitor_engine.NetworkMonitorEngine(data_dir=sys.argv[1])
+engine.stop()
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {DEFERRED!r} if m in sys.modules]}}))
+""", str(tmp_path))
+    assert result['loaded'] == []
+    assert result['seconds'] < IMPORT_BUDGET_SECONDS
+
+
+def test_features_load_their_modules_on_first_use(tmp_path):
+    result = run_fresh("""
+import json, sys
+import monitor_engine
+engine = monitor_engine.NetworkMonitorEngine(data_dir=sys.argv[1])
+engine.sample_traffic()
+engine.targets.summary()
+engine.stop()
+print(json.dumps({'psutil': 'psutil' in sys.modules, 'asyncio': 'asyncio' in sys.modules}))
+""", str(tmp_path))
+    assert result == {'psutil': True, 'asyncio': True}
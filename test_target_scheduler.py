@@ -0,0 +1,148 @@
+import asyncio
+import socket
+import threading
+import time
+
+from target_scheduler import TargetScheduler
+
+
+def test_loopback_targets_hold_schedule():
+    """Тест что все цели проверяются по своему интервалу"""
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(1024)
+    port = server.getsockname()[1]
+    results = {}
+    lock = threading.Lock()
+
+    def on_result(target, rtt_ms, error):
+        with lock:
+            results.setdefault(target.key, []).append(rtt_ms)
+
+    scheduler = TargetScheduler(on_result=on_result)
+    for i in range(50):
+        scheduler.add_target(f"t{i}", '127.0.0.1', port, interval=0.2, timeout=1)
+    scheduler.start()
+    try:
+        time.sleep(1.1)
+        summary = scheduler.summary()
+    finally:
+        scheduler.stop()
+        server.close()
+
+    assert len(results) == 50
+    assert all(4 <= len(samples) <= 6 for samples in results.values())
+    assert all(rtt is not None for samples in results.values() for rtt in samples)
+    assert summary['lag_max_ms'] < 100
+
+
+def test_concurrency_cap_and_timeouts():
+    active = 0
+    peak = 0
+
+    async def slow_probe(target):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            await asyncio.sleep(10 if target.key == 'hang' else 0.05)
+            return 1.0
+        finally:
+            active -= 1
+
+    errors = []
+    scheduler = TargetScheduler(probe=slow_probe, max_concurrency=5,
+                                on_result=lambda t, rtt, err: err and errors.append(t.key))
+    for i in range(20):
+        scheduler.add_target(f"t{i}", 'stub', interval=0.1, timeout=1)
+    scheduler.add_target('hang', 'stub', interval=0.1, timeout=0.2)
+    scheduler.start()
+    time.sleep(0.6)
+    scheduler.stop()
+
+    assert peak <= 5
+    assert 'hang' in errors
+
+
+def test_remove_and_retime_targets():
+    calls = []
+
+    async def probe(target):
+        calls.append((target.key, time.monotonic()))
+        return 1.0
+
+    scheduler = TargetScheduler(probe=probe)
+    scheduler.add_target('keep', 'stub', interval=0.5)
+    scheduler.add_target('drop', 'stub', interval=0.05)
+    scheduler.start()
+    time.sleep(0.2)
+    scheduler.remove_target('drop')
+    scheduler.retime_target('keep', interval=0.05)
+    time.sleep(0.1)
+    removed_at = time.monotonic()
+    time.sleep(0.3)
+    scheduler.stop()
+
+    assert not [c for c in calls if c[0] == 'drop' and c[1] > removed_at]
+    assert len([c for c in calls if c[0] == 'keep' and c[1] > removed_at]) >= 4
+    assert 'drop' not in scheduler.targets
+
+
+def test_stop_before_run_is_kept():
+    scheduler = TargetScheduler(probe=lambda target: asyncio.sleep(0, 1.0))
+    scheduler.add_target('t', 'stub', interval=0.05)
+    scheduler.stop()
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(asyncio.wait_for(scheduler.run(), 1))
+    finally:
+        loop.close()
+    assert scheduler.dispatched == 0
+
+
+def test_resolved_address_expires():
+    resolved = []
+
+    async def probe(target):
+        if target.address is None:
+            resolved.append(target.key)
+            target.address = socket.AF_INET, ('127.0.0.1', target.port)
+            target.resolved_at = time.monotonic()
+        return 1.0
+
+    scheduler = TargetScheduler(probe=probe, address_ttl=0.15)
+    scheduler.add_target('t', 'stub', interval=0.05)
+    scheduler.start()
+    time.sleep(0.4)
+    scheduler.stop()
+
+    assert scheduler.summary()['completed'] >= 5
+    assert 2 <= len(resolved) <= 4
+
+
+def test_retime_keeps_single_probe_in_flight():
+    active = 0
+    peak = 0
+    results = []
+
+    async def probe(target):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            await asyncio.sleep(0.3)
+            return 1.0
+        finally:
+            active -= 1
+
+    scheduler = TargetScheduler(probe=probe, on_result=lambda t, rtt, err: results.append(rtt))
+    scheduler.add_target('slow', 'stub', interval=0.05, timeout=1)
+    scheduler.start()
+    time.sleep(0.1)
+    scheduler.retime_target('slow', interval=0.02)
+    time.sleep(0.5)
+    scheduler.stop()
+
+    assert peak == 1
+    # Результат проверки, начатой до смены интервала, не теряется
+    assert results and results[0] == 1.0
@@ -0,0 +1,88 @@
+import pytest
+
+from monitor_engine import NetworkMonitorEngine
+from throughput import HttpThroughputBackend, ThroughputResult
+from throughput_server import ThroughputServer
+
+
+@pytest.fixture
+def server():
+    httpd = ThroughputServer().start()
+    yield httpd.url
+    httpd.stop()
+
+
+def test_download_runs_for_duration_and_excludes_warmup(server):
+    backend = HttpThroughputBackend(f'{server}/download', streams=3, duration=0.6, warmup=0.2,
+                                    interval=0.1, chunk_size=64 * 1024)
+    result = backend.download()
+
+    assert result.direction == 'download'
+    assert result.streams == 3
+    assert result.total_bytes > 0
+    assert result.mbps > 0
+    assert 0.5 <= result.duration < 2.0
+    assert result.samples and all(elapsed >= 0.2 for elapsed, _ in result.samples)
+
+
+def test_download_restarts_short_responses(server):
+    backend = HttpThroughputBackend(f'{server}/download?size=1000', streams=1, duration=0.3, warmup=0,
+                                    interval=0.1)
+    result = backend.download()
+    # Ответы по 1000 байт запрашиваются повторно до истечения времени
+    assert result.total_bytes > 1000
+
+
+def test_upload_to_bundled_server(server):
+    backend = HttpThroughputBackend(f'{server}/download', f'{server}/upload', streams=2, duration=0.4,
+                                    warmup=0.1, interval=0.1)
+    result = backend.upload()
+    assert result.direction == 'upload'
+    assert result.total_bytes > 0
+    assert result.mbps > 0
+    assert backend.ping() >= 0
+
+
+def test_unreachable_endpoint_raises():
+    backend = HttpThroughputBackend('http://127.0.0.1:9/download', streams=2, duration=0.3, timeout=1)
+    with pytest.raises(OSError):
+        backend.download()
+
+
+class FakeBackend:
+    name = 'fake'
+
+    def __init__(self):
+        self.invalidated = False
+
+    def prepare(self):
+        return 'local'
+
+    def download(self):
+        return ThroughputResult('download', 80.0)
+
+    def upload(self):
+        raise ConnectionResetError("reset")
+
+    def ping(self):
+        return 5.0
+
+    def invalidate(self):
+        self.invalidated = True
+
+
+def test_engine_uses_pluggable_backend(tmp_path):
+    backend = FakeBackend()
+    engine = NetworkMonitorEngine(data_dir=str(tmp_path), throughput_backend=backend)
+    events = []
+    engine.subscribe(events.append)
+    try:
+        assert engine.speed_test() is None
+    finally:
+        engine.stop()
+
+    kinds = [event.kind for event in events]
+    assert 'speedtest_download' in kinds
+    assert 'speedtest_failed' in kinds
+    assert kinds[-1] == 'speedtest_finished'
+    assert backend.invalidated
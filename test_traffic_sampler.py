@@ -0,0 +1,62 @@
+from collections import namedtuple
+
+from traffic_sampler import TrafficSampler, counter_delta
+
+Counters = namedtuple('Counters', 'bytes_recv bytes_sent packets_recv packets_sent errin errout dropin dropout')
+
+
+class FakeCounters:
+    def __init__(self):
+        self.now = 0.0
+        self.nics = {}
+
+    def set(self, name, recv, sent, packets=0, errors=0, drops=0):
+        self.nics[name] = Counters(recv, sent, packets, packets, errors, 0, drops, 0)
+
+
+def make_sampler(fake, window=4):
+    return TrafficSampler(window=window, counters=lambda: dict(fake.nics), clock=lambda: fake.now)
+
+
+def test_rates_from_deltas():
+    """Тест расчета скоростей по разности счетчиков"""
+    fake = FakeCounters()
+    sampler = make_sampler(fake)
+    fake.set('eth0', 1000, 500)
+    assert sampler.sample() == {}
+
+    fake.now = 2.0
+    fake.set('eth0', 251_000, 10_500, packets=20, errors=2, drops=4)
+    rates = sampler.sample()['eth0']
+    assert rates['rx_bps'] == 1_000_000
+    assert rates['tx_bps'] == 40_000
+    assert rates['rx_pps'] == 10
+    assert rates['errors_ps'] == 1
+    assert rates['drops_ps'] == 2
+
+
+def test_counter_reset_is_not_taken_for_wraparound():
+    assert counter_delta(100, 150) == 50
+    # Сброс счетчика с малым предыдущим значением не дает всплеска в 4 ГиБ
+    assert counter_delta(2 ** 32 - 100, 50) == 50
+    assert counter_delta(2 ** 40, 1000) == 1000
+
+
+def test_hot_plug_and_history_window():
+    fake = FakeCounters()
+    sampler = make_sampler(fake, window=3)
+    fake.set('eth0', 0, 0)
+    sampler.sample()
+    for second in range(1, 6):
+        fake.now = float(second)
+        fake.set('eth0', second * 125, 0)
+        if second == 3:
+            fake.set('wlan0', 0, 0)
+        if second == 4:
+            del fake.nics['wlan0']
+        rates = sampler.sample()
+
+    assert set(rates) == {'eth0'}
+    assert 'wlan0' not in sampler.interfaces
+    assert sampler.interfaces['eth0'].series('rx_bps') == [1000.0, 1000.0, 1000.0]
+    assert TrafficSampler.totals(rates)['rx_bps'] == 1000.0
@@ -0,0 +1,38 @@
+import threading
+
+from monitor_engine import MonitorEvent
+from ui_bus import UIUpdateBus
+
+
+def test_metric_updates_are_coalesced():
+    """Тест что из потока замеров применяется только последнее значение"""
+    bus = UIUpdateBus()
+
+    def worker(offset):
+        for i in range(10_000):
+            bus.publish(MonitorEvent('ping', {'rtt_ms': offset + i}))
+
+    threads = [threading.Thread(target=worker, args=(n * 100_000,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    bus.publish(MonitorEvent('ping', {'rtt_ms': -1}))
+
+    ordered, latest = bus.drain()
+    assert not ordered
+    assert [e.data['rtt_ms'] for e in latest] == [-1]
+    assert bus.published == 40_001
+    assert bus.pending() == 0
+
+
+def test_log_events_keep_order_and_are_bounded():
+    bus = UIUpdateBus(max_pending=100)
+    for i in range(150):
+        bus.publish(MonitorEvent('log', {'message': str(i), 'level': 'info'}))
+
+    first, _ = bus.drain(max_ordered=30)
+    rest, _ = bus.drain()
+    messages = [e.data['message'] for e in list(first) + list(rest)]
+    assert messages == [str(i) for i in range(50, 150)]
+    assert bus.dropped == 50
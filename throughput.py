@@ -0,0 +1,207 @@
+import http.client
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Условная длина тела при отправке: поток обрывается по истечении времени теста
+_UNBOUNDED_LENGTH = 1 << 40
+
+
+class ThroughputResult:
+    """Результат измерения пропускной способности в одном направлении"""
+
+    def __init__(self, direction, mbps, total_bytes=0, duration=0.0, streams=1, samples=None, warmup=0.0):
+        self.direction = direction
+        self.mbps = mbps
+        self.total_bytes = total_bytes
+        self.duration = duration
+        self.streams = streams
+        # Скорость по интервалам, Мбит/с: (время от начала, скорость)
+        self.samples = samples or []
+        self.warmup = warmup
+
+    def to_dict(self):
+        return {
+            'direction': self.direction,
+            'mbps': self.mbps,
+            'total_bytes': self.total_bytes,
+            'duration': self.duration,
+            'streams': self.streams,
+            'warmup': self.warmup,
+            'samples': self.samples,
+        }
+
+
+class SpeedtestBackend:
+    """Измерение через speedtest-cli с кэшем выбора сервера"""
+    name = 'speedtest'
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._st = None
+        self.server = None
+        self.source = None
+
+    def prepare(self):
+        """Выбирает сервер и возвращает его описание для журнала"""
+        self._st, self.server, self.source = self.cache.prepare()
+        origin = "поиск серверов" if self.source == 'discovery' else "из кэша"
+        return f"{self.server['name']} ({self.server['country']}), {origin}"
+
+    def download(self):
+        return ThroughputResult('download', self._st.download() / 1_000_000,
+                                total_bytes=self._st.results.bytes_received)
+
+    def upload(self):
+        return ThroughputResult('upload', self._st.upload() / 1_000_000,
+                                total_bytes=self._st.results.bytes_sent)
+
+    def ping(self):
+        return self._st.results.ping
+
+    def invalidate(self):
+        # В следующий раз сервер будет выбран заново
+        self.cache.invalidate_best()
+
+
+class HttpThroughputBackend:
+    """Измерение пропускной способности по HTTP с несколькими параллельными потоками.
+
+    Тест ограничен временем, а не объемом: каждый поток качает (или
+    отправляет) данные до истечения duration. Первые warmup секунд
+    (разгон TCP) в итог не входят. Скорость снимается каждые interval
+    секунд. Данные читаются через readinto в заранее выделенный буфер и
+    отправляются из memoryview, поэтому клиент не создает новые объекты
+    на каждый блок. Подходит любой HTTP-сервер, отдающий большой ответ на
+    GET и принимающий POST, например throughput_server из комплекта.
+    """
+    name = 'http'
+
+    def __init__(self, download_url, upload_url=None, streams=4, duration=10.0, warmup=2.0,
+                 interval=0.5, chunk_size=256 * 1024, timeout=10.0):
+        self.download_url = download_url
+        self.upload_url = upload_url or download_url
+        self.streams = streams
+        self.duration = duration
+        self.warmup = warmup
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self._payload = memoryview(bytes(chunk_size))
+
+    def prepare(self):
+        return f"{urlsplit(self.download_url).netloc} ({self.streams} потоков, {self.duration:.0f} с)"
+
+    def download(self):
+        return self._run('download', self._download_stream)
+
+    def upload(self):
+        return self._run('upload', self._upload_stream)
+
+    def ping(self):
+        """Минимальное время TCP-соединения с сервером из трех попыток, мс"""
+        parts = urlsplit(self.download_url)
+        address = (parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        best = None
+        for _ in range(3):
+            started = time.perf_counter()
+            with socket.create_connection(address, timeout=self.timeout):
+                elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def invalidate(self):
+        pass
+
+    def _run(self, direction, stream_func):
+        counters = [0] * self.streams
+        errors = []
+        stop = threading.Event()
+        threads = [threading.Thread(target=self._guard, args=(stream_func, index, counters, stop, errors),
+                                    name=f'throughput-{direction}-{index}', daemon=True)
+                   for index in range(self.streams)]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        samples = []
+        warm_bytes = None
+        previous_bytes, previous_time = 0, started
+        deadline = started + self.duration
+        while True:
+            now = time.perf_counter()
+            if now >= deadline or all(not t.is_alive() for t in threads):
+                break
+            time.sleep(min(self.interval, deadline - now))
+            now = time.perf_counter()
+            current = sum(counters)
+            samples.append((now - started, (current - previous_bytes) * 8 / (now - previous_time) / 1_000_000))
+            previous_bytes, previous_time = current, now
+            if warm_bytes is None and now - started >= self.warmup:
+                warm_bytes, warm_time = current, now
+
+        stop.set()
+        finished = time.perf_counter()
+        total = sum(counters)
+        for thread in threads:
+            thread.join(timeout=self.timeout)
+        if errors and total == 0:
+            raise errors[0]
+
+        if warm_bytes is None:
+            # Тест короче разгона: считаем по всему времени
+            warm_bytes, warm_time = 0, started
+        measured = max(finished - warm_time, 1e-9)
+        mbps = (total - warm_bytes) * 8 / measured / 1_000_000
+        return ThroughputResult(direction, mbps, total_bytes=total, duration=finished - started,
+                                streams=self.streams, warmup=self.warmup,
+                                samples=[s for s in samples if s[0] >= self.warmup])
+
+    @staticmethod
+    def _guard(stream_func, index, counters, stop, errors):
+        try:
+            stream_func(index, counters, stop)
+        except Exception as e:
+            if not stop.is_set():
+                errors.append(e)
+
+    def _connection(self, url):
+        parts = urlsplit(url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        path = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+        return connection_class(parts.hostname, parts.port, timeout=self.timeout), path
+
+    def _download_stream(self, index, counters, stop):
+        connection, path = self._connection(self.download_url)
+        buffer = memoryview(bytearray(self.chunk_size))
+        try:
+            while not stop.is_set():
+                connection.request('GET', path, headers={'Cache-Control': 'no-cache'})
+                response = connection.getresponse()
+                while not stop.is_set():
+                    received = response.readinto(buffer)
+                    if not received:
+                        break
+                    counters[index] += received
+                # Ответ закончился раньше времени: запрашиваем заново
+                if response.will_close:
+                    connection.close()
+        finally:
+            connection.close()
+
+    def _upload_stream(self, index, counters, stop):
+        connection, path = self._connection(self.upload_url)
+        payload = self._payload
+        try:
+            connection.putrequest('POST', path)
+            connection.putheader('Content-Type', 'application/octet-stream')
+            connection.putheader('Content-Length', str(_UNBOUNDED_LENGTH))
+            connection.endheaders()
+            sock = connection.sock
+            while not stop.is_set():
+                sock.sendall(payload)
+                counters[index] += len(payload)
+        finally:
+            connection.close()
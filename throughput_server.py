@@ -0,0 +1,115 @@
+import argparse
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Ответ на /download без параметра size: клиент сам обрывает поток по времени
+DEFAULT_DOWNLOAD_BYTES = 1 << 40
+_BLOCK = memoryview(bytes(1 << 20))
+
+
+class ThroughputHandler(BaseHTTPRequestHandler):
+    """GET /download?size=N отдает N нулевых байт, POST /upload принимает и отбрасывает тело"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path != '/download':
+            self.send_error(404)
+            return
+        try:
+            size = int(parse_qs(parts.query).get('size', [DEFAULT_DOWNLOAD_BYTES])[0])
+        except ValueError:
+            self.send_error(400)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(size))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        try:
+            # Один и тот же блок отправляется без копирования
+            while size > 0:
+                block = _BLOCK if size >= len(_BLOCK) else _BLOCK[:size]
+                self.wfile.write(block)
+                size -= len(block)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/upload':
+            self.send_error(404)
+            return
+        remaining = int(self.headers.get('Content-Length', 0))
+        buffer = memoryview(bytearray(1 << 18))
+        received = 0
+        try:
+            while remaining > 0:
+                count = self.rfile.readinto(buffer[:min(remaining, len(buffer))])
+                if not count:
+                    # Клиент закончил отправку, оборвав соединение
+                    self.close_connection = True
+                    return
+                received += count
+                remaining -= count
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+            return
+        body = str(received).encode('ascii')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ThroughputServer(ThreadingHTTPServer):
+    """Локальный сервер для измерения пропускной способности без внешних сервисов"""
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), ThroughputHandler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Запускает сервер в фоновом потоке"""
+        self._thread = threading.Thread(target=self.serve_forever, name='throughput-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальный сервер для теста пропускной способности")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8089)
+    args = parser.parse_args(argv)
+
+    server = ThroughputServer(args.host, args.port)
+    print(f"Сервер пропускной способности: {server.url}/download, {server.url}/upload", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
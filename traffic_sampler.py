@@ -0,0 +1,113 @@
+import time
+from array import array
+
+# Счетчики psutil, из которых считаются скорости
+COUNTER_FIELDS = ('bytes_recv', 'bytes_sent', 'packets_recv', 'packets_sent',
+                  'errin', 'errout', 'dropin', 'dropout')
+# Скорости, которые хранятся в скользящих окнах
+RATE_FIELDS = ('rx_bps', 'tx_bps', 'rx_pps', 'tx_pps', 'errors_ps', 'drops_ps')
+
+
+def counter_delta(previous, current):
+    """Прирост счетчика. Уменьшение считается сбросом (интерфейс пересоздан).
+
+    Переполнение 32-битных счетчиков уже компенсирует psutil (nowrap=True),
+    а принять сброс 64-битного счетчика за переполнение значило бы получить
+    ложный всплеск в 4 ГиБ.
+    """
+    if current >= previous:
+        return current - previous
+    return current
+
+
+class InterfaceRates:
+    """Скорости одного интерфейса и их история в предвыделенных массивах"""
+    __slots__ = ('name', 'window', 'counters', 'deltas', 'last', 'samples', 'history')
+
+    def __init__(self, name, counters, window):
+        self.name = name
+        self.window = window
+        self.counters = counters
+        self.deltas = (0,) * len(COUNTER_FIELDS)
+        self.last = dict.fromkeys(RATE_FIELDS, 0.0)
+        self.samples = 0
+        self.history = {field: array('d', [0.0]) * window for field in RATE_FIELDS}
+
+    def update(self, counters, elapsed):
+        deltas = tuple(counter_delta(old, new) for old, new in zip(self.counters, counters))
+        self.counters = counters
+        self.deltas = deltas
+        rx_bytes, tx_bytes, rx_packets, tx_packets, errin, errout, dropin, dropout = deltas
+        rates = (rx_bytes * 8 / elapsed, tx_bytes * 8 / elapsed,
+                 rx_packets / elapsed, tx_packets / elapsed,
+                 (errin + errout) / elapsed, (dropin + dropout) / elapsed)
+        slot = self.samples % self.window
+        for field, rate in zip(RATE_FIELDS, rates):
+            self.last[field] = rate
+            self.history[field][slot] = rate
+        self.samples += 1
+
+    def series(self, field):
+        """История скорости field от старых значений к новым"""
+        values = self.history[field]
+        if self.samples < self.window:
+            return list(values[:self.samples])
+        slot = self.samples % self.window
+        return list(values[slot:]) + list(values[:slot])
+
+
+def _psutil_counters():
+    # psutil загружается при первом замере, а не при импорте
+    import psutil
+    return psutil.net_io_counters(pernic=True, nowrap=True)
+
+
+class TrafficSampler:
+    """Считает скорости по интерфейсам из разностей psutil.net_io_counters(pernic=True).
+
+    Учитывает сброс счетчиков и появление/исчезновение интерфейсов; переполнение
+    32-битных счетчиков компенсирует сам psutil.
+    Для каждого интерфейса хранит скользящее окно последних window замеров.
+    """
+
+    def __init__(self, window=300, counters=None, clock=time.monotonic):
+        self.window = window
+        self._read_counters = counters or _psutil_counters
+        self._clock = clock
+        self._last_time = None
+        self.interfaces = {}
+
+    def sample(self):
+        """Снимает счетчики и возвращает {интерфейс: скорости} для интерфейсов с историей"""
+        now = self._clock()
+        raw = self._read_counters()
+        elapsed = now - self._last_time if self._last_time is not None else 0
+        self._last_time = now
+
+        rates = {}
+        for name, stats in raw.items():
+            counters = tuple(getattr(stats, field) for field in COUNTER_FIELDS)
+            interface = self.interfaces.get(name)
+            if interface is None:
+                # Новый интерфейс: первый замер служит точкой отсчета
+                self.interfaces[name] = InterfaceRates(name, counters, self.window)
+                continue
+            if elapsed <= 0:
+                interface.counters = counters
+                continue
+            interface.update(counters, elapsed)
+            rates[name] = dict(interface.last)
+
+        # Отключенные интерфейсы больше не отслеживаем
+        for name in set(self.interfaces) - set(raw):
+            del self.interfaces[name]
+        return rates
+
+    @staticmethod
+    def totals(rates):
+        """Суммарные скорости по всем интерфейсам"""
+        total = dict.fromkeys(RATE_FIELDS, 0.0)
+        for interface_rates in rates.values():
+            for field in RATE_FIELDS:
+                total[field] += interface_rates[field]
+        return total
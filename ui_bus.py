@@ -0,0 +1,52 @@
+import threading
+from collections import deque
+
+# События, для которых важно только последнее значение (одно на виджет)
+COALESCED_KINDS = frozenset(['status', 'traffic', 'ping', 'processes', 'speedtest_download', 'speedtest_upload'])
+
+
+class UIUpdateBus:
+    """Шина обновлений интерфейса между рабочими потоками и главным циклом Tk.
+
+    Рабочие потоки публикуют события, не трогая виджеты. События из
+    COALESCED_KINDS схлопываются: хранится только последнее значение по ключу.
+    Остальные (сообщения журнала, смена состояния кнопок) сохраняют порядок в
+    ограниченной очереди. Главный поток забирает все накопленное методом
+    drain() с фиксированной частотой кадров.
+    """
+
+    def __init__(self, max_pending=5000, coalesced_kinds=COALESCED_KINDS):
+        self.coalesced_kinds = coalesced_kinds
+        self.published = 0
+        self.dropped = 0
+        self._latest = {}
+        self._ordered = deque()
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        """Публикует MonitorEvent из любого потока"""
+        with self._lock:
+            self.published += 1
+            if event.kind in self.coalesced_kinds:
+                self._latest[event.kind] = event
+                return
+            if len(self._ordered) >= self._max_pending:
+                # При перегрузке отбрасываем самые старые события
+                self._ordered.popleft()
+                self.dropped += 1
+            self._ordered.append(event)
+
+    def drain(self, max_ordered=None):
+        """Возвращает (упорядоченные события, последние значения) и очищает буфер"""
+        with self._lock:
+            latest, self._latest = self._latest, {}
+            if max_ordered is None or len(self._ordered) <= max_ordered:
+                ordered, self._ordered = self._ordered, deque()
+            else:
+                ordered = [self._ordered.popleft() for _ in range(max_ordered)]
+        return ordered, list(latest.values())
+
+    def pending(self):
+        with self._lock:
+            return len(self._ordered) + len(self._latest)